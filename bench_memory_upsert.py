@@ -0,0 +1,63 @@
+"""Microbenchmark: SecondBrain graph writes, per-item upserts vs batch_upsert_memory.
+
+Usage: python bench_memory_upsert.py [entities]
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from nanobot.game import memory, models
+
+
+def make_session(path: Path):
+    engine = create_engine(f"sqlite:///{path}")
+
+    @event.listens_for(engine, "connect")
+    def _pragmas(conn, _):
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+
+    models.Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    commits = [0]
+    event.listen(db, "after_commit", lambda _: commits.__setitem__(0, commits[0] + 1))
+    return db, commits
+
+
+def workload(n: int, round_: int) -> tuple[list[dict], list[dict]]:
+    entities = [{"type": "concept", "name": f"Concept {i}", "properties": {"round": round_}} for i in range(n)]
+    relations = [
+        {"source_id": f"concept_concept_{i}", "target_id": f"concept_concept_{i + 1}", "relation": "leads_to"}
+        for i in range(n - 1)
+    ]
+    return entities, relations
+
+
+def per_item(db, entities, relations) -> None:
+    for ent in entities:
+        memory.add_memory_node(db, type=ent["type"], name=ent["name"], properties=ent.get("properties", {}))
+    for rel in relations:
+        memory.link_memory_nodes(db, source_id=rel["source_id"], target_id=rel["target_id"], relation=rel["relation"])
+
+
+def run(label: str, write, n: int, rounds: int = 5) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        db, commits = make_session(Path(tmp) / "brain.sqlite")
+        t0 = time.perf_counter()
+        for r in range(rounds):
+            write(db, *workload(n, r))  # Round 0 inserts, later rounds update
+        elapsed = (time.perf_counter() - t0) * 1000 / rounds
+        print(f"{label:<12} {commits[0] / rounds:>8.0f} commits/call {elapsed:>10.1f} ms/call")
+        db.close()
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    print(f"{n} entities + {n - 1} relations per call")
+    run("per-item", per_item, n)
+    run("batch", memory.batch_upsert_memory, n)
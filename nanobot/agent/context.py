@@ -1,13 +1,22 @@
 """Context builder for assembling agent prompts."""
 
-import base64
-import mimetypes
+import asyncio
 import platform
+import time
+from collections import OrderedDict
+from datetime import datetime
 from pathlib import Path
 from typing import Any
 
+from loguru import logger
+
 from nanobot.agent.memory import MemoryStore
+from nanobot.agent.recall import MemoryRecall
 from nanobot.agent.skills import SkillsLoader
+from nanobot.agent.tracing import span
+from nanobot.utils.filecache import workspace_files
+from nanobot.utils.images import image_cache
+from nanobot.utils.tokens import estimate_tokens
 
 
 class ContextBuilder:
@@ -19,11 +28,18 @@ class ContextBuilder:
     """
     
     BOOTSTRAP_FILES = ["AGENTS.md", "SOUL.md", "USER.md", "TOOLS.md", "IDENTITY.md"]
+    RUNTIME_CONTEXT_TAG = "[Runtime Context]"
     
-    def __init__(self, workspace: Path):
+    def __init__(self, workspace: Path, memory_budget_tokens: int = 1000):
         self.workspace = workspace
         self.memory = MemoryStore(workspace)
+        self.recall = MemoryRecall(
+            self.memory.memory_file, graph_db=_graph_db_path(), budget_tokens=memory_budget_tokens,
+        )
         self.skills = SkillsLoader(workspace)
+        # Estimated system prompt + runtime block size of each session's last build
+        self._prefix_tokens: OrderedDict[str, int] = OrderedDict()
+        self._digimon = None  # PromptSnapshot of the game state, created on first use
     
     def build_system_prompt(self, skill_names: list[str] | None = None) -> str:
         """
@@ -45,10 +61,18 @@ class ContextBuilder:
         if bootstrap:
             parts.append(bootstrap)
         
-        # Memory context
-        memory = self.memory.get_memory_context()
-        if memory:
-            parts.append(f"# Memory\n\n{memory}")
+        # Memory context: the whole file while it fits the recall budget,
+        # otherwise per-message excerpts go into the runtime block
+        if self.recall.budget_tokens <= 0 or self.recall.memory_fits():
+            memory = self.memory.get_memory_context()
+            if memory:
+                parts.append(f"# Memory\n\n{memory}")
+        else:
+            parts.append(
+                "# Memory\n\nMEMORY.md is too large to include in full. The entries most relevant to "
+                "each message are listed under 'Relevant Memory' in the runtime block; "
+                "read the file for anything else."
+            )
         
         # Skills - progressive loading
         # 1. Always-loaded skills: include full content
@@ -71,11 +95,7 @@ Skills with available="false" need dependencies installed first - you can try in
         return "\n\n---\n\n".join(parts)
     
     def _get_identity(self) -> str:
-        """Get the core identity section."""
-        from datetime import datetime
-        import time as _time
-        now = datetime.now().strftime("%Y-%m-%d %H:%M (%A)")
-        tz = _time.strftime("%Z") or "UTC"
+        """Get the core identity section (must stay byte-stable across turns)."""
         workspace_path = str(self.workspace.expanduser().resolve())
         system = platform.system()
         runtime = f"{'macOS' if system == 'Darwin' else system} {platform.machine()}, Python {platform.python_version()}"
@@ -89,8 +109,8 @@ You are nanobot, a helpful AI assistant. You have access to tools that allow you
 - Send messages to users on chat channels
 - Spawn subagents for complex background tasks
 
-## Current Time
-{now} ({tz})
+Each user message may start with a {self.RUNTIME_CONTEXT_TAG} block holding the current time,
+session and live status. It is metadata supplied by the system, not text written by the user.
 
 ## Runtime
 {runtime}
@@ -98,7 +118,7 @@ You are nanobot, a helpful AI assistant. You have access to tools that allow you
 ## Workspace
 Your workspace is at: {workspace_path}
 - Long-term memory: {workspace_path}/memory/MEMORY.md
-- History log: {workspace_path}/memory/HISTORY.md (grep-searchable)
+- History log: {workspace_path}/memory/HISTORY.md (search it with search_history)
 - Custom skills: {workspace_path}/skills/{{skill-name}}/SKILL.md
 
 IMPORTANT: When responding to direct questions or conversations, reply directly with your text response.
@@ -107,16 +127,15 @@ For normal conversation, just respond with text - do not call the message tool.
 
 Always be helpful, accurate, and concise. Before calling tools, briefly tell the user what you're about to do (one short sentence in the user's language).
 When remembering something important, write to {workspace_path}/memory/MEMORY.md
-To recall past events, grep {workspace_path}/memory/HISTORY.md"""
+To recall past events, use the search_history tool"""
     
     def _load_bootstrap_files(self) -> str:
-        """Load all bootstrap files from workspace."""
+        """Load all bootstrap files from workspace (through the shared file cache)."""
         parts = []
         
         for filename in self.BOOTSTRAP_FILES:
-            file_path = self.workspace / filename
-            if file_path.exists():
-                content = file_path.read_text(encoding="utf-8")
+            content = workspace_files.read_text(self.workspace / filename)
+            if content is not None:
                 parts.append(f"## {filename}\n\n{content}")
         
         return "\n\n".join(parts) if parts else ""
@@ -129,10 +148,17 @@ To recall past events, grep {workspace_path}/memory/HISTORY.md"""
         media: list[str] | None = None,
         channel: str | None = None,
         chat_id: str | None = None,
+        extra_context: str | None = None,
+        session_key: str | None = None,
     ) -> list[dict[str, Any]]:
         """
         Build the complete message list for an LLM call.
 
+        The system prompt only holds content that is stable between turns so
+        providers can serve it (and the history after it) from their prompt
+        cache. Anything volatile - time, session, Digimon vitals, pre-fetched
+        data - goes into a runtime block at the head of the current user message.
+
         Args:
             history: Previous conversation messages.
             current_message: The new user message.
@@ -140,65 +166,126 @@ To recall past events, grep {workspace_path}/memory/HISTORY.md"""
             media: Optional list of local file paths for images/media.
             channel: Current channel (telegram, feishu, etc.).
             chat_id: Current chat/user ID.
+            extra_context: Optional per-turn data for the runtime block.
+            session_key: Session the prefix size is remembered for (default channel:chat_id).
 
         Returns:
             List of messages including system prompt.
         """
+        with span("context.build", history=len(history)):
+            return await self._build_messages(
+                history, current_message, skill_names, media, channel, chat_id, extra_context,
+                session_key or f"{channel}:{chat_id}",
+            )
+
+    async def _build_messages(
+        self,
+        history: list[dict[str, Any]],
+        current_message: str,
+        skill_names: list[str] | None,
+        media: list[str] | None,
+        channel: str | None,
+        chat_id: str | None,
+        extra_context: str | None,
+        session_key: str,
+    ) -> list[dict[str, Any]]:
         messages = []
 
+        recalled = ""
+        if self.recall.budget_tokens > 0:
+            with span("context.recall"):
+                recalled = await asyncio.to_thread(self.recall.format, current_message)
+
         # System prompt
         system_prompt = self.build_system_prompt(skill_names)
-        
-        # --- DIGIMON INJECTION START ---
-        try:
-            import asyncio
-            from nanobot.game.database import SessionLocal
-            from nanobot.game.context import build_system_prompt as build_digimon_prompt
-            
-            def _get_digimon_prompt():
-                db = SessionLocal()
-                try:
-                    return build_digimon_prompt(db, current_message)
-                finally:
-                    db.close()
-                    
-            try:
-                digi_prompt = await asyncio.to_thread(_get_digimon_prompt)
-                if digi_prompt:
-                    system_prompt += f"\n\n{digi_prompt}"
-            except Exception as e:
-                import logging
-                logging.error(f"Digimon context integration failed: {e}")
-        except ImportError:
-            pass # fallback to pure nanobot if not running digimon daemon
-        # --- DIGIMON INJECTION END ---
-        
-        if channel and chat_id:
-            system_prompt += f"\n\n## Current Session\nChannel: {channel}\nChat ID: {chat_id}"
+        with span("context.digimon"):
+            persona, status = await self._get_digimon_prompt()
+        if persona:
+            system_prompt += f"\n\n{persona}"
         messages.append({"role": "system", "content": system_prompt})
 
         # History
         messages.extend(history)
 
-        # Current message (with optional image attachments)
-        user_content = self._build_user_content(current_message, media)
+        # Current message (with optional image attachments), prefixed by runtime data
+        runtime = self._build_runtime_context(channel, chat_id, status, extra_context, recalled)
+        self._prefix_tokens[session_key] = estimate_tokens(system_prompt) + estimate_tokens(runtime)
+        self._prefix_tokens.move_to_end(session_key)
+        if len(self._prefix_tokens) > 1024:
+            self._prefix_tokens.popitem(last=False)
+        user_content = await self._build_user_content(f"{runtime}\n\n{current_message}", media)
         messages.append({"role": "user", "content": user_content})
 
         return messages
 
-    def _build_user_content(self, text: str, media: list[str] | None) -> str | list[dict[str, Any]]:
-        """Build user message content with optional base64-encoded images."""
+    def estimate_prefix_tokens(self, session_key: str) -> int:
+        """
+        Estimate the tokens taken by the system prompt and runtime block of
+        the session's last build (just the system prompt before its first).
+        """
+        tokens = self._prefix_tokens.get(session_key)
+        if tokens is None:
+            tokens = estimate_tokens(self.build_system_prompt())
+        return tokens
+
+    async def _get_digimon_prompt(self) -> tuple[str, str]:
+        """Fetch the Digimon (persona, status) prompt parts, from the game DB only when they changed."""
+        if self._digimon is None:
+            try:
+                from nanobot.game.context import PromptSnapshot
+                from nanobot.game.database import SessionLocal
+            except ImportError:
+                return "", ""  # fallback to pure nanobot if not running digimon daemon
+            self._digimon = PromptSnapshot(SessionLocal)
+
+        parts = self._digimon.cached()
+        if parts is not None:
+            return parts
+        try:
+            return await asyncio.to_thread(self._digimon.get)
+        except Exception as e:
+            logger.error("Digimon context integration failed: {}", e)
+            return "", ""
+
+    def _build_runtime_context(
+        self,
+        channel: str | None,
+        chat_id: str | None,
+        status: str | None = None,
+        extra: str | None = None,
+        recalled: str | None = None,
+    ) -> str:
+        """Build the volatile per-turn block that trails the cached prompt prefix."""
+        now = datetime.now().strftime("%Y-%m-%d %H:%M (%A)")
+        tz = time.strftime("%Z") or "UTC"
+        lines = [self.RUNTIME_CONTEXT_TAG, f"Current Time: {now} ({tz})"]
+        if channel and chat_id:
+            lines += [f"Channel: {channel}", f"Chat ID: {chat_id}"]
+        parts = ["\n".join(lines)]
+        if status:
+            parts.append(status.strip())
+        if extra:
+            parts.append(extra.strip())
+        if recalled:
+            parts.append(recalled)
+        return "\n\n".join(parts)
+
+    async def _build_user_content(self, text: str, media: list[str] | None) -> str | list[dict[str, Any]]:
+        """
+        Build user message content with optional base64-encoded images.
+
+        Images are downscaled and encoded in a worker thread through the
+        shared content-addressed image cache.
+        """
         if not media:
             return text
         
-        images = []
-        for path in media:
-            p = Path(path)
-            mime, _ = mimetypes.guess_type(path)
-            if not p.is_file() or not mime or not mime.startswith("image/"):
-                continue
-            b64 = base64.b64encode(p.read_bytes()).decode()
-            images.append({"type": "image_url", "image_url": {"url": f"data:{mime};base64,{b64}"}})
+        with span("context.images", count=len(media)):
+            payloads = await asyncio.to_thread(lambda: [image_cache.encode(path) for path in media])
+        images = [
+            {"type": "image_url", "image_url": {"url": f"data:{mime};base64,{b64}"}}
+            for mime, b64 in filter(None, payloads)
+        ]
         
         if not images:
             return text
@@ -265,3 +352,12 @@ To recall past events, grep {workspace_path}/memory/HISTORY.md"""
 
         messages.append(msg)
         return messages
+
+
+def _graph_db_path() -> Path | None:
+    """Location of the Second Brain database, if the game package is available."""
+    try:
+        from nanobot.game.database import engine
+    except ImportError:
+        return None
+    return Path(engine.url.database) if engine.url.database else None
@@ -5,6 +5,8 @@ from __future__ import annotations
 import asyncio
 import json
 import re
+import time
+from collections import deque
 from contextlib import AsyncExitStack
 from pathlib import Path
 from typing import TYPE_CHECKING, Awaitable, Callable
@@ -19,13 +21,18 @@ from nanobot.agent.tools.cron import CronTool
 from nanobot.agent.tools.filesystem import EditFileTool, ListDirTool, ReadFileTool, WriteFileTool
 from nanobot.agent.tools.message import MessageTool
 from nanobot.agent.tools.registry import ToolRegistry
+from nanobot.agent.tools.history import SearchHistoryTool
+from nanobot.agent.tools.results import ReadResultTool
 from nanobot.agent.tools.shell import ExecTool
 from nanobot.agent.tools.spawn import SpawnTool
 from nanobot.agent.tools.web import WebFetchTool, WebSearchTool
+from nanobot.agent.tracing import Tracer, span
 from nanobot.bus.events import InboundMessage, OutboundMessage
 from nanobot.bus.queue import MessageBus
-from nanobot.providers.base import LLMProvider
-from nanobot.session.manager import Session, SessionManager
+from nanobot.proactive import ProactiveAlerts, ProactiveScheduler
+from nanobot.providers.base import LLMProvider, LLMResponse
+from nanobot.session.manager import Session, SessionManager, SessionStoreBusyError
+from nanobot.utils.tokens import estimate_tokens
 
 if TYPE_CHECKING:
     from nanobot.config.schema import ExecToolConfig
@@ -44,6 +51,8 @@ class AgentLoop:
     5. Sends responses back
     """
 
+    STREAM_INTERVAL = 0.8  # Min seconds between streamed progress updates
+
     def __init__(
         self,
         bus: MessageBus,
@@ -54,12 +63,20 @@ class AgentLoop:
         temperature: float = 0.7,
         max_tokens: int = 4096,
         memory_window: int = 50,
+        context_window: int = 65536,
+        memory_budget_tokens: int = 1000,
         brave_api_key: str | None = None,
         exec_config: ExecToolConfig | None = None,
         cron_service: CronService | None = None,
         restrict_to_workspace: bool = False,
         session_manager: SessionManager | None = None,
         mcp_servers: dict | None = None,
+        max_concurrency: int = 4,
+        stream: bool = True,
+        tracing: bool = True,
+        coalesce_window_ms: int = 200,
+        session_flush_ms: int = 1000,
+        session_archive_days: float = 30,
     ):
         from nanobot.config.schema import ExecToolConfig
         self.bus = bus
@@ -70,13 +87,20 @@ class AgentLoop:
         self.temperature = temperature
         self.max_tokens = max_tokens
         self.memory_window = memory_window
+        self.context_window = context_window
         self.brave_api_key = brave_api_key
         self.exec_config = exec_config or ExecToolConfig()
         self.cron_service = cron_service
         self.restrict_to_workspace = restrict_to_workspace
+        self.stream = stream
+        self.coalesce_window_ms = coalesce_window_ms
+        self.session_flush_ms = session_flush_ms
 
-        self.context = ContextBuilder(workspace)
+        self.context = ContextBuilder(workspace, memory_budget_tokens=memory_budget_tokens)
+        self.tracer = Tracer(workspace / "traces" if tracing else None)
         self.sessions = session_manager or SessionManager(workspace)
+        if not self.sessions.hold():
+            logger.debug("Session store is held by another process; it will not be archived from here")
         self.tools = ToolRegistry()
         self.subagents = SubagentManager(
             provider=provider,
@@ -96,6 +120,24 @@ class AgentLoop:
         self._mcp_connected = False
         self._mcp_connecting = False
         self._consolidating: set[str] = set()  # Session keys with consolidation in progress
+        self.retry_stats = {"fired": 0, "changed": 0}  # Text-only retries / retries that led to tool calls
+        self.usage_totals: dict[str, int] = {}  # Token usage across LLM calls (see _record_usage)
+        # Per-session FIFO queues drained by one worker each; the semaphore caps
+        # how many turns run at once across all sessions.
+        self._turn_slots = asyncio.Semaphore(max(1, max_concurrency))
+        self._session_queues: dict[str, deque[InboundMessage]] = {}
+        self._session_workers: dict[str, asyncio.Task[None]] = {}
+        self.results = ReadResultTool()  # Per-turn store for oversized tool output
+        self.proactive = ProactiveScheduler()
+        ProactiveAlerts(bus, self.sessions).register(self.proactive)
+        # Write-behind: turns mark sessions dirty and run() starts a timer that writes them in
+        # batches. It is not a scheduler job so slow alert fetches can't hold a flush back.
+        self._flush_task: asyncio.Task[None] | None = None
+        if session_archive_days > 0:
+            self.proactive.add_job(
+                "session_archive", lambda: self._archive_sessions(session_archive_days),
+                interval_s=86400, first_delay_s=3600,
+            )
         self._register_default_tools()
 
     def _register_default_tools(self) -> None:
@@ -106,6 +148,8 @@ class AgentLoop:
         self.tools.register(WriteFileTool(workspace=self.workspace, allowed_dir=allowed_dir))
         self.tools.register(EditFileTool(workspace=self.workspace, allowed_dir=allowed_dir))
         self.tools.register(ListDirTool(workspace=self.workspace, allowed_dir=allowed_dir))
+        self.tools.register(self.results)
+        self.tools.register(SearchHistoryTool(self.context.memory.history_index))
 
         # Shell tool
         self.tools.register(ExecTool(
@@ -139,7 +183,7 @@ class AgentLoop:
         # Game tools (for Digimon companion)
         try:
             from nanobot.agent.tools.game import FeedTool, HealTool, PlayTool, ListTasksTool, CompleteTaskTool, AddAssignmentTool, LogPhysicalActivityTool
-            from nanobot.agent.tools.second_brain import ManageMemoryGraphTool, SearchMemoryGraphTool
+            from nanobot.agent.tools.second_brain import ExploreMemoryGraphTool, ManageMemoryGraphTool, SearchMemoryGraphTool
             from nanobot.agent.tools.init import InitDigimonTool
             from nanobot.agent.tools.calendar import BlockTimeTool, ListCalendarTool, ManageCalendarTool
             
@@ -152,6 +196,7 @@ class AgentLoop:
             self.tools.register(LogPhysicalActivityTool())
             self.tools.register(ManageMemoryGraphTool())
             self.tools.register(SearchMemoryGraphTool())
+            self.tools.register(ExploreMemoryGraphTool())
             self.tools.register(InitDigimonTool())
             self.tools.register(BlockTimeTool())
             self.tools.register(ListCalendarTool())
@@ -201,6 +246,30 @@ class AgentLoop:
             return None
         return re.sub(r"<think>[\s\S]*?</think>", "", text).strip() or None
 
+    @staticmethod
+    def _strip_think_partial(text: str) -> str:
+        """Like _strip_think, but also hides a <think> block that is still being streamed."""
+        text = re.sub(r"<think>[\s\S]*?</think>", "", text)
+        return re.sub(r"<think>[\s\S]*$", "", text).strip()
+
+    # A clause that opens with a promise to act now and ends the reply, e.g.
+    # "Sure, let me check your calendar." or "I'll look that up..."
+    _TOOL_INTENT_RE = re.compile(
+        r"""(?:^|[.!?]\s+|,\s*)
+        (?:let\ me|i'll|i\ will|i'm\ going\ to|i\ am\ going\ to|allow\ me\ to)\s+(?:quickly\s+|just\s+)?
+        (?:check|search|fetch|find|read|open|run|execute|pull\ up|grab|query|browse|scan|sync
+           |look(?:\s+(?:\w+\s+)?up|\s+into|\s+at|\s+for|\s+around|(?![^.!?\n]*\w)))
+        \b[^.!?\n:,]*(?:\.{3}|…|[.!])?\s*$""",
+        re.IGNORECASE | re.VERBOSE,
+    )
+
+    @classmethod
+    def _announces_tool_action(cls, text: str) -> bool:
+        """Whether a short text-only reply ends by promising a tool call it did not make."""
+        if len(text) > 200:
+            return False
+        return bool(cls._TOOL_INTENT_RE.search(text.strip()))
+
     @staticmethod
     def _tool_hint(tool_calls: list) -> str:
         """Format tool calls as concise hint, e.g. 'web_search("query")'."""
@@ -214,7 +283,7 @@ class AgentLoop:
     async def _run_agent_loop(
         self,
         initial_messages: list[dict],
-        on_progress: Callable[[str], Awaitable[None]] | None = None,
+        on_progress: Callable[..., Awaitable[None]] | None = None,
     ) -> tuple[str | None, list[str]]:
         """
         Run the agent iteration loop.
@@ -222,6 +291,8 @@ class AgentLoop:
         Args:
             initial_messages: Starting messages for the LLM conversation.
             on_progress: Optional callback to push intermediate content to the user.
+                When streaming, it is also called with ``streaming=True`` and the
+                text generated so far by the current LLM call.
 
         Returns:
             Tuple of (final_content, list_of_tools_used).
@@ -231,22 +302,20 @@ class AgentLoop:
         final_content = None
         tools_used: list[str] = []
         text_only_retried = False
+        result_pages = 0  # Iterations spent only on read_result, up to results.free_pages
+        self.results.start_turn()
 
         while iteration < min(self.max_iterations, 5): # STRICT COST GUARDRAIL
             iteration += 1
 
-            response = await self.provider.chat(
-                messages=messages,
-                tools=self.tools.get_definitions(),
-                model=self.model,
-                temperature=self.temperature,
-                max_tokens=self.max_tokens,
-            )
+            response, streamed = await self._chat(messages, on_progress)
 
             if response.has_tool_calls:
+                if text_only_retried and not tools_used:
+                    self.retry_stats["changed"] += 1  # The retry turned into real tool calls
                 if on_progress:
                     clean = self._strip_think(response.content)
-                    if clean:
+                    if clean and not streamed:
                         await on_progress(clean)
                     await on_progress(self._tool_hint(response.tool_calls))
 
@@ -270,216 +339,113 @@ class AgentLoop:
                     tools_used.append(tool_call.name)
                     args_str = json.dumps(tool_call.arguments, ensure_ascii=False)
                     logger.info("Tool call: {}({})", tool_call.name, args_str[:200])
-                    result = await self.tools.execute(tool_call.name, tool_call.arguments)
+                results = await self.tools.execute_many(
+                    [(tc.name, tc.arguments) for tc in response.tool_calls]
+                )
+                for tool_call, result in zip(response.tool_calls, results):
                     messages = self.context.add_tool_result(
-                        messages, tool_call.id, tool_call.name, result
+                        messages, tool_call.id, tool_call.name,
+                        self.results.spill(tool_call.name, result),
                     )
+                if (result_pages < self.results.free_pages
+                        and all(tc.name == self.results.name for tc in response.tool_calls)):
+                    result_pages += 1
+                    iteration -= 1  # Reading a stored result does not use up the cap
             else:
                 final_content = self._strip_think(response.content)
-                # Some models send an interim text response before tool calls.
-                # Give them one retry; don't forward the text to avoid duplicates.
-                if not tools_used and not text_only_retried and final_content:
+                # Some models announce a tool call ("Let me check...") and stop.
+                # Only then retry once; any other first reply is the answer.
+                if (not tools_used and not text_only_retried and final_content
+                        and self._announces_tool_action(final_content)):
                     text_only_retried = True
-                    logger.debug("Interim text response (no tools used yet), retrying: {}", final_content[:80])
+                    self.retry_stats["fired"] += 1
+                    logger.info("Text-only reply announces a tool action, retrying: {}", final_content[:80])
                     final_content = None
                     continue
                 break
 
         return final_content, tools_used
 
-    async def _proactive_mas_alerts_loop(self):
-        """Background task to poll MAS Dashboard and trigger LLM alerts."""
-        while self._running:
-            try:
-                # Give the agent a few seconds to start up fully
-                await asyncio.sleep(10)
-                
-                # 1. Look for an active telegram session
-                sessions = self.sessions.list_sessions()
-                tg_session = next((s for s in sessions if s["key"].startswith("telegram:")), None)
-                if not tg_session:
-                    await asyncio.sleep(300)
-                    continue
-                    
-                channel, chat_id = tg_session["key"].split(":", 1)
-                
-                # 2. Check Notion
-                from nanobot.game.notion_api import NotionIntegration
-                from nanobot.game.database import SessionLocal
-                from nanobot.game import models
-                from datetime import datetime, timezone
-                
-                notion = NotionIntegration()
-                if not notion.is_authenticated():
-                    await asyncio.sleep(3600)
-                    continue
-                    
-                tasks = await asyncio.to_thread(notion.fetch_mas_deadlines)
-                
-                def _check_and_mark_mas_alert(tid: str, title: str, task_type: str) -> bool:
-                    db = SessionLocal()
-                    try:
-                        state = db.query(models.TaskSyncState).filter_by(id=tid).first()
-                        if not state:
-                            state = models.TaskSyncState(id=tid, source="notion", title=title, status="pending", task_type=task_type)
-                            db.add(state)
-                            
-                        skip = False
-                        if state.last_notified_at:
-                            try:
-                                last = datetime.fromisoformat(state.last_notified_at)
-                                if (datetime.utcnow() - last).total_seconds() < 86400: # 1 msg per day
-                                    skip = True
-                            except Exception:
-                                pass
-                                
-                        if not skip:
-                            state.last_notified_at = datetime.utcnow().isoformat()
-                            db.commit()
-                            return True
-                        return False
-                    finally:
-                        db.close()
-                
-                for t in tasks:
-                    if not t["due_date"]: continue
-                    try:
-                        due_str = t["due_date"]
-                        if len(due_str) == 10: # YYYY-MM-DD
-                            due = datetime.strptime(due_str, "%Y-%m-%d").replace(tzinfo=timezone.utc)
-                        else:
-                            due = datetime.fromisoformat(due_str.replace('Z', '+00:00'))
-                    except Exception:
-                        continue
-                        
-                    now = datetime.now(timezone.utc)
-                    days_left = (due - now).days
-                    
-                    is_urgent = False
-                    if t["type"].lower() == "exam" and 0 <= days_left <= 7:
-                        is_urgent = True
-                    elif t["type"].lower() in ["assignment", "task"] and 0 <= days_left <= 3:
-                        is_urgent = True
-                        
-                    if is_urgent:
-                        should_alert = await asyncio.to_thread(_check_and_mark_mas_alert, t["id"], t["title"], t["type"])
-                        if should_alert:
-                            clean_title = str(t['title']).replace('{', '{{').replace('}', '}}')
-                            alert_text = f"PROACTIVE SYSTEM ALERT: Look at my schedule, I have an upcoming {t['type']} called '{clean_title}' due on {t['due_date']} (in {days_left} days). Stop whatever you are doing and proactively act as my Study Guide! Break down what I need to do, ask me what topics I am weak at, and suggest we schedule focus blocks on the Calendar to prepare. Act like my smart Digimon partner urging me to success!"
-                            msg = InboundMessage(
-                                channel=channel,
-                                sender_id="system",
-                                chat_id=chat_id,
-                                content=alert_text
-                            )
-                            logger.info(f"Triggering proactive MAS alert for {clean_title}")
-                            await self.bus.publish_inbound(msg)
-                            break # Process one alert per loop to avoid spam
-            except Exception as e:
-                logger.error(f"Proactive MAS loop error: {e}")
-                
-            # Sleep for an hour before checking again
-            await asyncio.sleep(3600)
+    async def _chat(
+        self,
+        messages: list[dict],
+        on_progress: Callable[..., Awaitable[None]] | None = None,
+    ) -> tuple[LLMResponse, bool]:
+        """
+        Call the LLM, streaming partial text to on_progress when enabled.
 
-    async def _proactive_calendar_alerts_loop(self):
-        """Background task to poll Google Calendar and trigger real-time panic alerts."""
-        while self._running:
-            try:
-                await asyncio.sleep(60) # check roughly every minute
-                
-                sessions = self.sessions.list_sessions()
-                tg_session = next((s for s in sessions if s["key"].startswith("telegram:")), None)
-                if not tg_session:
-                    continue
-                    
-                channel, chat_id = tg_session["key"].split(":", 1)
-                
-                from nanobot.game.google_api import GoogleIntegration
-                google = GoogleIntegration()
-                events = await asyncio.to_thread(google.get_upcoming_events)
-                if not events:
-                    continue
-                    
-                from datetime import datetime, timezone
-                now = datetime.now(timezone.utc)
-                
-                from nanobot.game.database import SessionLocal
-                from nanobot.game import models
-                
-                def _check_and_mark_alert(eid: str, summary: str) -> bool:
-                    db = SessionLocal()
-                    try:
-                        state_id = f"cal_alert_{eid}"
-                        state = db.query(models.TaskSyncState).filter_by(id=state_id).first()
-                        if not state:
-                            state = models.TaskSyncState(id=state_id, source="calendar", title=summary, status="alerted", task_type="event")
-                            db.add(state)
-                            db.commit()
-                            return True
-                        return False
-                    finally:
-                        db.close()
-
-                for e in events:
-                    start_str = e['start'].get('dateTime')
-                    if not start_str: 
-                        continue # Ignore all-day events
-                    
-                    if start_str.endswith('Z'):
-                        start_str = start_str[:-1] + '+00:00'
-                    start_time = datetime.fromisoformat(start_str)
-                    start_time_utc = start_time.astimezone(timezone.utc)
-                    seconds_until = (start_time_utc - now).total_seconds()
-                    
-                    # If starting in less than 5 minutes
-                    if 0 <= seconds_until <= 300:
-                        is_new = await asyncio.to_thread(_check_and_mark_alert, e['id'], e.get('summary', ''))
-                        if is_new:
-                            # Sanitize summary just in case
-                            clean_summary = str(e.get('summary', 'Unknown')).replace('{', '{{').replace('}', '}}')
-                            alert_text = f"PROACTIVE SYSTEM ALERT: TAMER! A time block called '{clean_summary}' is starting in {int(seconds_until//60)} minutes! This is your Combat Zone! Tell the Tamer to drop everything and FOCUS!"
-                            msg = InboundMessage(
-                                channel=channel,
-                                sender_id="system",
-                                chat_id=chat_id,
-                                content=alert_text
-                            )
-                            logger.info(f"Triggering proactive Calendar alert for {clean_summary}")
-                            await self.bus.publish_inbound(msg)
-                            break
-            except Exception as e:
-                logger.error(f"Proactive Calendar loop error: {e}")
+        Partial text is throttled to one update per STREAM_INTERVAL so chat
+        platforms that edit a message in place stay under their rate limits.
 
-    async def _proactive_daily_scheduler_loop(self):
-        """Background task to proactively recommend a daily time-blocked schedule."""
-        while self._running:
-            try:
-                # Run once a day (check every 24 hours essentially, or immediately upon boot with some delay)
-                await asyncio.sleep(600) # Boot wait
-                
-                sessions = self.sessions.list_sessions()
-                tg_session = next((s for s in sessions if s["key"].startswith("telegram:")), None)
-                if not tg_session:
-                    await asyncio.sleep(3600)
-                    continue
-                    
-                channel, chat_id = tg_session["key"].split(":", 1)
-                
-                alert_text = "DAILY PROACTIVE ROUTINE: It is time to plan the day! Use your ListTasksTool and list_calendar tools. Analyze my unscheduled tasks and upcoming Notion deadlines against my calendar free time. Suggest a highly optimized time-blocking schedule for the next 24-48 hours. Ask me if you should go ahead and use BlockTimeTool to lock these into my calendar!"
-                msg = InboundMessage(
-                    channel=channel,
-                    sender_id="system",
-                    chat_id=chat_id,
-                    content=alert_text
-                )
-                logger.info("Triggering Daily Proactive Scheduler Routine")
-                await self.bus.publish_inbound(msg)
-                
-            except Exception as e:
-                logger.error(f"Proactive Daily Scheduler loop error: {e}")
-                
-            # Sleep 24 hours before recommending again
-            await asyncio.sleep(86400)
+        Returns:
+            Tuple of (response, whether any text was streamed to on_progress).
+        """
+        kwargs = dict(
+            messages=messages,
+            tools=self.tools.get_definitions(),
+            model=self.model,
+            temperature=self.temperature,
+            max_tokens=self.max_tokens,
+        )
+        with span("llm.chat", model=self.model, messages=len(messages)) as s:
+            response, streamed = await self._call_provider(kwargs, on_progress)
+            s.set(streamed=streamed, finish_reason=response.finish_reason,
+                  tool_calls=len(response.tool_calls), **response.usage)
+        self._record_usage(response.usage)
+        return response, streamed
+
+    async def _call_provider(
+        self,
+        kwargs: dict,
+        on_progress: Callable[..., Awaitable[None]] | None,
+    ) -> tuple[LLMResponse, bool]:
+        """Run one provider call for _chat, streaming snapshots when possible."""
+        if not (self.stream and on_progress):
+            return await self.provider.chat(**kwargs), False
+
+        text, sent, last_sent = "", "", 0.0
+        response: LLMResponse | None = None
+        async for chunk in self.provider.chat_stream(**kwargs):
+            if chunk.response:
+                response = chunk.response
+                continue
+            text += chunk.delta
+            if time.monotonic() - last_sent < self.STREAM_INTERVAL:
+                continue
+            snapshot = self._strip_think_partial(text)
+            if snapshot and snapshot != sent:
+                await on_progress(snapshot, streaming=True)
+                sent, last_sent = snapshot, time.monotonic()
+
+        snapshot = self._strip_think_partial(text)
+        if snapshot and snapshot != sent:
+            await on_progress(snapshot, streaming=True)
+            sent = snapshot
+        if response is None:
+            response = LLMResponse(content=text or None)
+        return response, bool(sent)
+
+    def _record_usage(self, usage: dict[str, int]) -> None:
+        """Accumulate token usage, including prompt-cache reads and writes."""
+        if not usage:
+            return
+        totals = self.usage_totals
+        totals["calls"] = totals.get("calls", 0) + 1
+        for key in ("prompt_tokens", "completion_tokens", "cache_read_tokens", "cache_write_tokens"):
+            totals[key] = totals.get(key, 0) + usage.get(key, 0)
+        prompt = usage.get("prompt_tokens", 0)
+        logger.debug(
+            "LLM usage: prompt={} (cache read={}, write={}, hit {:.0%}), completion={}; overall hit {:.0%}",
+            prompt, usage.get("cache_read_tokens", 0), usage.get("cache_write_tokens", 0),
+            usage.get("cache_read_tokens", 0) / prompt if prompt else 0.0,
+            usage.get("completion_tokens", 0), self.cache_hit_rate,
+        )
+
+    @property
+    def cache_hit_rate(self) -> float:
+        """Share of prompt tokens served from the provider's prompt cache so far."""
+        prompt = self.usage_totals.get("prompt_tokens", 0)
+        return self.usage_totals.get("cache_read_tokens", 0) / prompt if prompt else 0.0
 
     async def run(self) -> None:
         """Run the agent loop, processing messages from the bus."""
@@ -487,10 +453,10 @@ class AgentLoop:
         await self._connect_mcp()
         logger.info("Agent loop started")
         
-        # Start proactive background tasks
-        asyncio.create_task(self._proactive_mas_alerts_loop())
-        asyncio.create_task(self._proactive_calendar_alerts_loop())
-        asyncio.create_task(self._proactive_daily_scheduler_loop())
+        # Proactive alerts (deadlines, calendar, daily plan) share one scheduler
+        await self.proactive.start()
+        if self.session_flush_ms > 0:
+            self._flush_task = asyncio.create_task(self._flush_loop())
 
         while self._running:
             try:
@@ -498,20 +464,104 @@ class AgentLoop:
                     self.bus.consume_inbound(),
                     timeout=1.0
                 )
-                try:
-                    response = await self._process_message(msg)
-                    await self.bus.publish_outbound(response or OutboundMessage(
-                        channel=msg.channel, chat_id=msg.chat_id, content="",
-                    ))
-                except Exception as e:
-                    logger.error("Error processing message: {}", e)
-                    await self.bus.publish_outbound(OutboundMessage(
-                        channel=msg.channel,
-                        chat_id=msg.chat_id,
-                        content=f"Sorry, I encountered an error: {str(e)}"
-                    ))
             except asyncio.TimeoutError:
                 continue
+            self._dispatch(msg)
+
+    @staticmethod
+    def _dispatch_key(msg: InboundMessage) -> str:
+        """Session key a message is serialized on (system messages route via chat_id)."""
+        return msg.chat_id if msg.channel == "system" else msg.session_key
+
+    def _dispatch(self, msg: InboundMessage) -> None:
+        """Queue a message behind earlier turns of its session and make sure a worker drains it."""
+        key = self._dispatch_key(msg)
+        self._session_queues.setdefault(key, deque()).append(msg)
+        if key not in self._session_workers:
+            self._session_workers[key] = asyncio.create_task(self._session_worker(key))
+
+    async def _session_worker(self, key: str) -> None:
+        """Process one session's messages in arrival order, then exit when its queue is empty."""
+        queue = self._session_queues[key]
+        try:
+            while queue:
+                if self._can_coalesce(queue[0]):
+                    await self._await_burst(queue)
+                msg = self._take_burst(queue)
+                async with self._turn_slots:
+                    await self._handle_inbound(msg)
+        finally:
+            self._session_workers.pop(key, None)
+            self._session_queues.pop(key, None)
+
+    @staticmethod
+    def _can_coalesce(msg: InboundMessage) -> bool:
+        """Plain user messages can be merged; system messages and slash commands run alone."""
+        return msg.channel != "system" and not msg.content.strip().startswith("/")
+
+    async def _await_burst(self, queue: deque[InboundMessage]) -> None:
+        """
+        Wait until the chat has been quiet for coalesce_window_ms (at most 4 windows).
+
+        Every turn pays this wait before the model starts, even a lone message,
+        so the window trades time to first token for fewer split turns. The
+        default of 200 ms catches messages sent in one go (forwarded albums,
+        pasted paragraphs); messages queued while a turn runs are merged
+        regardless of it.
+        """
+        window = self.coalesce_window_ms / 1000
+        if window <= 0:
+            return
+        deadline = time.monotonic() + 4 * window
+        while True:
+            seen = len(queue)
+            await asyncio.sleep(min(window, max(0.0, deadline - time.monotonic())))
+            if len(queue) == seen or time.monotonic() >= deadline:
+                return
+
+    def _take_burst(self, queue: deque[InboundMessage]) -> InboundMessage:
+        """
+        Pop the next turn's message, merging the burst of messages queued behind it.
+
+        Messages that piled up in the window, or while the previous turn of the
+        session was running, become one turn as long as they come from the same
+        sender and none of them is a command.
+        """
+        first = queue.popleft()
+        if self.coalesce_window_ms <= 0 or not self._can_coalesce(first):
+            return first
+        burst = [first]
+        while queue and self._can_coalesce(queue[0]) and queue[0].sender_id == first.sender_id:
+            burst.append(queue.popleft())
+        if len(burst) == 1:
+            return first
+        last = burst[-1]
+        logger.info("Coalesced {} messages from {} into one turn", len(burst), first.session_key)
+        return InboundMessage(
+            channel=first.channel,
+            sender_id=first.sender_id,
+            chat_id=first.chat_id,
+            content="\n".join(m.content for m in burst if m.content),
+            timestamp=first.timestamp,
+            media=[p for m in burst for p in m.media],
+            metadata={**last.metadata, "buffered_count": len(burst)},
+        )
+
+    async def _handle_inbound(self, msg: InboundMessage) -> None:
+        """Process one bus message and publish its response (or an error reply)."""
+        try:
+            with self.tracer.turn("turn", session=self._dispatch_key(msg), channel=msg.channel):
+                response = await self._process_message(msg)
+            await self.bus.publish_outbound(response or OutboundMessage(
+                channel=msg.channel, chat_id=msg.chat_id, content="",
+            ))
+        except Exception as e:
+            logger.error("Error processing message: {}", e)
+            await self.bus.publish_outbound(OutboundMessage(
+                channel=msg.channel,
+                chat_id=msg.chat_id,
+                content=f"Sorry, I encountered an error: {str(e)}"
+            ))
 
     async def close_mcp(self) -> None:
         """Close MCP connections."""
@@ -522,16 +572,66 @@ class AgentLoop:
                 pass  # MCP SDK cancel scope cleanup is noisy but harmless
             self._mcp_stack = None
 
-    def stop(self) -> None:
-        """Stop the agent loop."""
+    async def stop(self, grace_s: float = 10.0) -> None:
+        """
+        Stop the agent loop.
+
+        Turns in flight get grace_s seconds to finish (their sessions are then
+        saved directly) and are cancelled after that; the flush timer is
+        stopped first and the final flush runs once no turn can mark a
+        session dirty any more.
+        """
         self._running = False
+        self.proactive.stop()
+        if self._flush_task:
+            self._flush_task.cancel()
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+            self._flush_task = None
+        if workers := list(self._session_workers.values()):
+            _, pending = await asyncio.wait(workers, timeout=grace_s)
+            for task in pending:
+                task.cancel()
+            if pending:
+                logger.warning("Cancelled {} turns still running at shutdown", len(pending))
+                await asyncio.gather(*pending, return_exceptions=True)
+        await asyncio.to_thread(self.sessions.flush)
+        self.sessions.release()
         logger.info("Agent loop stopping")
 
+    async def _save_session(self, session: Session) -> None:
+        """Save after a turn: queued for the next batch while run() flushes, written now otherwise."""
+        with span("session.save", messages=len(session.messages)) as s:
+            if self._running and self.session_flush_ms > 0:
+                self.sessions.mark_dirty(session)
+                s.set(deferred=True)
+            else:
+                await asyncio.to_thread(self.sessions.save, session)
+
+    async def _flush_loop(self) -> None:
+        """Flush queued sessions every session_flush_ms until stop()."""
+        while True:
+            await asyncio.sleep(self.session_flush_ms / 1000)
+            try:
+                await self._flush_sessions()
+            except Exception as e:
+                logger.error("Session flush failed: {}", e)
+
+    async def _flush_sessions(self) -> None:
+        if written := await asyncio.to_thread(self.sessions.flush):
+            logger.debug("Flushed {} sessions", written)
+
+    async def _archive_sessions(self, idle_days: float) -> None:
+        with self.tracer.turn("session.archive", idle_days=idle_days) as s:
+            try:
+                s.set(**await asyncio.to_thread(self.sessions.archive_idle, idle_days))
+            except SessionStoreBusyError as e:
+                logger.info("Skipping session archive: {}", e)
+
     async def _process_message(
         self,
         msg: InboundMessage,
         session_key: str | None = None,
-        on_progress: Callable[[str], Awaitable[None]] | None = None,
+        on_progress: Callable[..., Awaitable[None]] | None = None,
     ) -> OutboundMessage | None:
         """
         Process a single inbound message.
@@ -552,7 +652,9 @@ class AgentLoop:
         logger.info("Processing message from {}:{}: {}", msg.channel, msg.sender_id, preview)
 
         key = session_key or msg.session_key
-        session = await asyncio.to_thread(self.sessions.get_or_create, key)
+        with span("session.load") as s:
+            session = await asyncio.to_thread(self.sessions.get_or_create, key)
+            s.set(**self.sessions.cache_info)
 
         # Handle slash commands
         cmd = msg.content.strip().lower()
@@ -561,12 +663,13 @@ class AgentLoop:
             messages_to_archive = session.messages.copy()
             session.clear()
             await asyncio.to_thread(self.sessions.save, session)
-            self.sessions.invalidate(session.key)
+            await asyncio.to_thread(self.sessions.invalidate, session.key)
 
             async def _consolidate_and_cleanup():
                 temp_session = Session(key=session.key)
                 temp_session.messages = messages_to_archive
-                await self._consolidate_memory(temp_session, archive_all=True)
+                with self.tracer.turn("consolidation", session=session.key, archive_all=True):
+                    await self._consolidate_memory(temp_session, archive_all=True)
 
             asyncio.create_task(_consolidate_and_cleanup())
             return OutboundMessage(channel=msg.channel, chat_id=msg.chat_id,
@@ -580,7 +683,8 @@ class AgentLoop:
 
             async def _consolidate_and_unlock():
                 try:
-                    await self._consolidate_memory(session)
+                    with self.tracer.turn("consolidation", session=session.key):
+                        await self._consolidate_memory(session)
                 finally:
                     self._consolidating.discard(session.key)
 
@@ -591,42 +695,46 @@ class AgentLoop:
             if isinstance(message_tool, MessageTool):
                 message_tool.start_turn()
 
-        initial_messages = await self.context.build_messages(
-            history=session.get_history(max_messages=self.memory_window),
-            current_message=msg.content,
-            media=msg.media if msg.media else None,
-            channel=msg.channel,
-            chat_id=msg.chat_id,
-        )
-
         # --- FORCED TASK PRE-FETCH ---
         # Gemini refuses to call list_tasks while roleplaying as a baby Digimon.
         # If the user asks about tasks, we pre-execute the tool and inject results
-        # directly into the system prompt so the LLM has real data to work with.
+        # into the runtime context so the LLM has real data to work with.
+        task_context = None
         _msg_lower = msg.content.lower()
         _task_triggers = ["task", "to do", "todo", "what should i do", "what do i need", "dark data", "pending"]
         if any(t in _msg_lower for t in _task_triggers):
             try:
                 list_tasks_tool = self.tools.get("list_tasks")
                 if list_tasks_tool:
-                    task_result = await list_tasks_tool.execute()
-                    # Inject pre-fetched data into system prompt
-                    if initial_messages and initial_messages[0].get("role") == "system":
-                        initial_messages[0]["content"] += (
-                            f"\n\n--- PRE-FETCHED TASK DATA (use this data in your response!) ---\n"
-                            f"{task_result}\n"
-                            f"--- END TASK DATA ---\n"
-                            f"IMPORTANT: The task data above was retrieved by your Digivice. "
-                            f"Present this data to the Tamer in your response. Do NOT say you cannot see tasks."
-                        )
-                    logger.info("Pre-fetched tasks for system prompt")
+                    with span("tasks.prefetch"):
+                        task_result = await list_tasks_tool.execute()
+                    task_context = (
+                        f"--- PRE-FETCHED TASK DATA (use this data in your response!) ---\n"
+                        f"{task_result}\n"
+                        f"--- END TASK DATA ---\n"
+                        f"IMPORTANT: The task data above was retrieved by your Digivice. "
+                        f"Present this data to the Tamer in your response. Do NOT say you cannot see tasks."
+                    )
+                    logger.info("Pre-fetched tasks for runtime context")
             except Exception as e:
                 logger.error("Task pre-fetch failed: {}", e)
         # --- END FORCED TASK PRE-FETCH ---
 
-        async def _bus_progress(content: str) -> None:
+        initial_messages = await self.context.build_messages(
+            history=self._get_history(session, msg.content),
+            current_message=msg.content,
+            media=msg.media if msg.media else None,
+            channel=msg.channel,
+            chat_id=msg.chat_id,
+            extra_context=task_context,
+            session_key=key,
+        )
+
+        async def _bus_progress(content: str, *, streaming: bool = False) -> None:
             meta = dict(msg.metadata or {})
             meta["_progress"] = True
+            if streaming:
+                meta["_stream"] = True
             await self.bus.publish_outbound(OutboundMessage(
                 channel=msg.channel, chat_id=msg.chat_id, content=content,
                 metadata=meta,
@@ -645,10 +753,10 @@ class AgentLoop:
         session.add_message("user", msg.content)
         session.add_message("assistant", final_content,
                             tools_used=tools_used if tools_used else None)
-        await asyncio.to_thread(self.sessions.save, session)
+        await self._save_session(session)
 
         if message_tool := self.tools.get("message"):
-            if isinstance(message_tool, MessageTool) and message_tool._sent_in_turn:
+            if isinstance(message_tool, MessageTool) and message_tool.sent_in_turn:
                 return None
 
         return OutboundMessage(
@@ -678,13 +786,16 @@ class AgentLoop:
             origin_chat_id = msg.chat_id
 
         session_key = f"{origin_channel}:{origin_chat_id}"
-        session = await asyncio.to_thread(self.sessions.get_or_create, session_key)
+        with span("session.load") as s:
+            session = await asyncio.to_thread(self.sessions.get_or_create, session_key)
+            s.set(**self.sessions.cache_info)
         self._set_tool_context(origin_channel, origin_chat_id, msg.metadata.get("message_id"))
         initial_messages = await self.context.build_messages(
-            history=session.get_history(max_messages=self.memory_window),
+            history=self._get_history(session, msg.content),
             current_message=msg.content,
             channel=origin_channel,
             chat_id=origin_chat_id,
+            session_key=session_key,
         )
         final_content, _ = await self._run_agent_loop(initial_messages)
 
@@ -693,7 +804,7 @@ class AgentLoop:
 
         session.add_message("user", f"[System: {msg.sender_id}] {msg.content}")
         session.add_message("assistant", final_content)
-        await asyncio.to_thread(self.sessions.save, session)
+        await self._save_session(session)
 
         return OutboundMessage(
             channel=origin_channel,
@@ -701,6 +812,24 @@ class AgentLoop:
             content=final_content
         )
 
+    def _get_history(self, session: Session, current_message: str) -> list[dict]:
+        """
+        Select session history for the next prompt.
+
+        With a context_window set, history fills whatever token budget is left
+        after the reply reservation, the system prompt, the tool schemas and
+        the current message; otherwise the last memory_window messages are used.
+        """
+        if self.context_window <= 0:
+            return session.get_history(max_messages=self.memory_window)
+        fixed = (
+            self.max_tokens
+            + self.context.estimate_prefix_tokens(session.key)
+            + estimate_tokens(json.dumps(self.tools.get_definitions(), ensure_ascii=False))
+            + estimate_tokens(current_message)
+        )
+        return session.get_history(max_tokens=max(0, self.context_window - fixed))
+
     async def _consolidate_memory(self, session, archive_all: bool = False) -> None:
         """Consolidate old messages into MEMORY.md + HISTORY.md.
 
@@ -741,7 +870,7 @@ class AgentLoop:
 
         prompt = f"""You are a memory consolidation agent. Process this conversation and return a JSON object with exactly two keys:
 
-1. "history_entry": A paragraph (2-5 sentences) summarizing the key events/decisions/topics. Start with a timestamp like [YYYY-MM-DD HH:MM]. Include enough detail to be useful when found by grep search later.
+1. "history_entry": A paragraph (2-5 sentences) summarizing the key events/decisions/topics. Start with a timestamp like [YYYY-MM-DD HH:MM]. Include enough detail to be useful when found by search later.
 
 2. "memory_update": The updated long-term memory content. Add any new facts: user location, preferences, personal info, habits, project context, technical decisions, tools/services used. If nothing new, return the existing content unchanged.
 
@@ -806,7 +935,7 @@ Respond with ONLY valid JSON, no markdown fences."""
         session_key: str = "cli:direct",
         channel: str = "cli",
         chat_id: str = "direct",
-        on_progress: Callable[[str], Awaitable[None]] | None = None,
+        on_progress: Callable[..., Awaitable[None]] | None = None,
     ) -> str:
         """
         Process a message directly (for CLI or cron usage).
@@ -829,5 +958,6 @@ Respond with ONLY valid JSON, no markdown fences."""
             content=content
         )
 
-        response = await self._process_message(msg, session_key=session_key, on_progress=on_progress)
+        with self.tracer.turn("turn", session=session_key, channel=channel):
+            response = await self._process_message(msg, session_key=session_key, on_progress=on_progress)
         return response.content if response else ""
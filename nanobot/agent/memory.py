@@ -1,29 +1,188 @@
 """Memory system for persistent agent memory."""
 
+import hashlib
+import re
+import sqlite3
+from contextlib import closing
 from pathlib import Path
+from typing import Any
 
+from loguru import logger
+
+from nanobot.utils.filecache import workspace_files
 from nanobot.utils.helpers import ensure_dir
 
+_TIMESTAMP_RE = re.compile(r"^\[(\d{4}-\d{2}-\d{2}(?:[ T]\d{2}:\d{2})?)")
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class HistoryIndex:
+    """
+    SQLite FTS5 index over the paragraphs of HISTORY.md.
+
+    The index remembers how many bytes of the file it has seen, and a hash
+    of them, and sync() indexes whatever was appended since, so entries
+    written by other means (e.g. the model editing the file) are picked up
+    too. If the indexed part was edited or truncated, the file is reindexed
+    from scratch. An unchanged file (same size and mtime) is not read at all.
+    Without FTS5 support, search falls back to a scan of the file.
+    """
+
+    def __init__(self, history_file: Path, db_path: Path):
+        self.history_file = history_file
+        self.db_path = db_path
+        self._fts: bool | None = None  # Unknown until the first connection
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+        conn.execute("CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value)")
+        if self._fts is None:
+            try:
+                conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS history USING fts5(entry, ts UNINDEXED)")
+                self._fts = True
+            except sqlite3.OperationalError as e:
+                logger.warning("SQLite FTS5 unavailable, history search will scan the file: {}", e)
+                self._fts = False
+        return conn
+
+    def sync(self) -> int:
+        """Index entries appended to HISTORY.md since the last sync; returns how many."""
+        if not self.history_file.exists():
+            return 0
+        with closing(self._connect()) as conn:
+            if not self._fts:
+                return 0
+            conn.execute("BEGIN IMMEDIATE")  # Serializes concurrent syncs, including other processes
+            try:
+                state = dict(conn.execute("SELECT key, value FROM state").fetchall())
+                st = self.history_file.stat()
+                if state.get("size") == st.st_size and state.get("mtime_ns") == st.st_mtime_ns:
+                    conn.execute("COMMIT")
+                    return 0
+                with open(self.history_file, "rb") as f:
+                    content = f.read()
+                offset = state.get("offset", 0)
+                prefix = hashlib.sha256(content[:offset])
+                if offset and (len(content) < offset or prefix.hexdigest() != state.get("prefix_sha256")):
+                    # Edited or truncated: what was indexed no longer matches the file
+                    conn.execute("DELETE FROM history")
+                    offset, prefix = 0, hashlib.sha256()
+                data = content[offset:]
+                # Only complete paragraphs; a trailing partial entry waits for the next sync
+                end = data.rfind(b"\n\n")
+                entries = []
+                if end >= 0:
+                    entries = [
+                        p.strip() for p in data[:end].decode("utf-8", errors="replace").split("\n\n") if p.strip()
+                    ]
+                    conn.executemany(
+                        "INSERT INTO history (entry, ts) VALUES (?, ?)",
+                        [(e, _entry_timestamp(e)) for e in entries],
+                    )
+                    prefix.update(data[:end + 2])
+                    offset += end + 2
+                conn.executemany("INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)", [
+                    ("offset", offset), ("prefix_sha256", prefix.hexdigest()),
+                    ("size", st.st_size), ("mtime_ns", st.st_mtime_ns),
+                ])
+                conn.execute("COMMIT")
+                return len(entries)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def rebuild(self) -> int:
+        """Drop the index and reindex HISTORY.md from the start; returns the entry count."""
+        with closing(self._connect()) as conn:
+            if self._fts:
+                conn.execute("DELETE FROM history")
+            conn.execute("DELETE FROM state")
+        return self.sync()
+
+    def search(
+        self,
+        query: str,
+        limit: int = 5,
+        since: str | None = None,
+        until: str | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Best-matching entries first, as dicts with ts, snippet and entry.
+
+        All query words must match (prefix matches count); if nothing does,
+        entries matching any word are returned. since/until are inclusive
+        YYYY-MM-DD dates compared against the entry's leading timestamp.
+        """
+        terms = _TERM_RE.findall(query.lower())
+        if not terms:
+            return []
+        self.sync()
+        if not self._fts:
+            return self._scan(terms, limit, since, until)
+
+        where, params = "history MATCH ?", []
+        if since:
+            where += " AND ts >= ?"
+            params.append(since)
+        if until:
+            where += " AND ts < ?"
+            params.append(until + "~")  # Past any time on that day
+        sql = (
+            "SELECT ts, snippet(history, 0, '**', '**', '…', 24) AS snippet, entry, bm25(history) AS score "
+            f"FROM history WHERE {where} ORDER BY score LIMIT ?"
+        )
+        with closing(self._connect()) as conn:
+            conn.row_factory = sqlite3.Row
+            for joiner in (" ", " OR "):
+                match = joiner.join(f'"{t}"*' for t in terms)
+                rows = conn.execute(sql, [match, *params, limit]).fetchall()
+                if rows or len(terms) == 1:
+                    return [dict(r) for r in rows]
+        return []
+
+    def _scan(self, terms: list[str], limit: int, since: str | None, until: str | None) -> list[dict[str, Any]]:
+        text = self.history_file.read_text(encoding="utf-8") if self.history_file.exists() else ""
+        hits = []
+        for entry in (p.strip() for p in text.split("\n\n")):
+            ts = _entry_timestamp(entry)
+            if not entry or (since and ts < since) or (until and ts > until + "~"):
+                continue
+            lowered = entry.lower()
+            score = sum(lowered.count(t) for t in terms)
+            if score:
+                hits.append({"ts": ts, "snippet": entry[:300], "entry": entry, "score": -score})
+        return sorted(hits, key=lambda h: h["score"])[:limit]
+
+
+def _entry_timestamp(entry: str) -> str:
+    """The leading [YYYY-MM-DD HH:MM] of a history entry, or '' if it has none."""
+    m = _TIMESTAMP_RE.match(entry)
+    return m.group(1).replace("T", " ") if m else ""
+
 
 class MemoryStore:
-    """Two-layer memory: MEMORY.md (long-term facts) + HISTORY.md (grep-searchable log)."""
+    """Two-layer memory: MEMORY.md (long-term facts) + HISTORY.md (searchable log)."""
 
     def __init__(self, workspace: Path):
         self.memory_dir = ensure_dir(workspace / "memory")
         self.memory_file = self.memory_dir / "MEMORY.md"
         self.history_file = self.memory_dir / "HISTORY.md"
+        self.history_index = HistoryIndex(self.history_file, self.memory_dir / "history.sqlite3")
 
     def read_long_term(self) -> str:
-        if self.memory_file.exists():
-            return self.memory_file.read_text(encoding="utf-8")
-        return ""
+        return workspace_files.read_text(self.memory_file) or ""
 
     def write_long_term(self, content: str) -> None:
         self.memory_file.write_text(content, encoding="utf-8")
+        workspace_files.invalidate(self.memory_file)
 
     def append_history(self, entry: str) -> None:
         with open(self.history_file, "a", encoding="utf-8") as f:
             f.write(entry.rstrip() + "\n\n")
+        try:
+            self.history_index.sync()
+        except sqlite3.Error as e:
+            logger.warning("Failed to index history entry: {}", e)
 
     def get_memory_context(self) -> str:
         long_term = self.read_long_term()
@@ -0,0 +1,237 @@
+"""Relevance retrieval over long-term memory for per-turn prompt injection."""
+
+import json
+import math
+import re
+import sqlite3
+import threading
+from collections import Counter
+from contextlib import closing
+from pathlib import Path
+from typing import Any
+
+from loguru import logger
+
+from nanobot.utils.filecache import workspace_files
+from nanobot.utils.tokens import estimate_tokens
+
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+_HEADING_RE = re.compile(r"^#{1,6}\s+(.*)")
+
+
+def tokenize(text: str) -> list[str]:
+    return _TERM_RE.findall(text.lower())
+
+
+class BM25Index:
+    """
+    Okapi BM25 over a fixed list of documents, kept as an inverted index.
+
+    Building is linear in the corpus and a query only touches the postings
+    of its own terms, so ranking stays cheap however much memory piles up.
+    """
+
+    def __init__(self, docs: list[str], k1: float = 1.5, b: float = 0.75):
+        self.docs = docs
+        self.k1 = k1
+        self.b = b
+        self._postings: dict[str, list[tuple[int, int]]] = {}
+        self._lengths: list[int] = []
+        for i, doc in enumerate(docs):
+            counts = Counter(tokenize(doc))
+            self._lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self._postings.setdefault(term, []).append((i, tf))
+        self._avgdl = (sum(self._lengths) / len(docs)) if docs else 0.0
+
+    def search(self, query: str, limit: int = 10) -> list[tuple[int, float]]:
+        """(document index, score) pairs for the best matches, highest score first."""
+        n = len(self.docs)
+        scores: dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for i, tf in postings:
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[i] / (self._avgdl or 1))
+                scores[i] = scores.get(i, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda s: (-s[1], s[0]))[:limit]
+
+
+def chunk_markdown(text: str, max_chars: int = 600) -> list[str]:
+    """
+    Split markdown into paragraph-sized chunks, each prefixed with its heading.
+
+    Paragraphs longer than max_chars are split between lines so that one
+    oversized section cannot eat the whole retrieval budget.
+    """
+    chunks: list[str] = []
+    heading = ""
+    block: list[str] = []
+
+    def flush() -> None:
+        body = "\n".join(block).strip()
+        block.clear()
+        if body:
+            chunks.append(f"{heading}: {body}" if heading else body)
+
+    for line in text.splitlines():
+        m = _HEADING_RE.match(line)
+        if m:
+            flush()
+            heading = m.group(1).strip()
+        elif not line.strip():
+            flush()
+        else:
+            if block and sum(len(s) + 1 for s in block) + len(line) > max_chars:
+                flush()
+            block.append(line.rstrip())
+    flush()
+    return chunks
+
+
+class MemoryRecall:
+    """
+    Picks the memory most relevant to a message under a fixed token budget.
+
+    The corpus is MEMORY.md split into chunks plus one chunk per Second Brain
+    node. It is rebuilt only when the memory file changes (by mtime and size)
+    or the graph's write counter moves, which its triggers bump for every
+    writer, the game daemon included. Checkpoints and VACUUMs of the database
+    file leave it alone. Otherwise a turn costs a stat, one small query and
+    one BM25 query.
+    """
+
+    def __init__(
+        self,
+        memory_file: Path,
+        graph_db: Path | None = None,
+        budget_tokens: int = 1000,
+        top_k: int = 8,
+    ):
+        self.memory_file = memory_file
+        self.graph_db = graph_db
+        self.budget_tokens = budget_tokens
+        self.top_k = top_k
+        self._lock = threading.Lock()
+        self._signature: tuple | None = None
+        self._chunks: list[tuple[str, str]] = []  # (source, text)
+        self._index = BM25Index([])
+        self._memory_tokens = 0
+
+    def memory_fits(self) -> bool:
+        """
+        True if all of MEMORY.md fits the budget and can go into the prompt whole.
+
+        Answers from the last refresh, which recall() does off the event loop
+        each turn; only a call before any recall loads the corpus itself.
+        """
+        if self._signature is None:
+            self._refresh()
+        return self._memory_tokens <= self.budget_tokens
+
+    def recall(self, query: str) -> list[tuple[str, str]]:
+        """
+        (source, text) chunks for the query, best first, within the budget.
+
+        MEMORY.md chunks are left out while the whole file fits the budget,
+        since the system prompt already carries it then.
+        """
+        self._refresh()
+        with self._lock:
+            chunks, index = self._chunks, self._index
+            skip_memory = self._memory_tokens <= self.budget_tokens
+        picked: list[tuple[str, str]] = []
+        left = self.budget_tokens
+        for i, _ in index.search(query, limit=len(chunks)):
+            source, text = chunks[i]
+            if skip_memory and source == "MEMORY.md":
+                continue
+            cost = estimate_tokens(text)
+            if cost > left:
+                continue
+            picked.append(chunks[i])
+            left -= cost
+            if len(picked) >= self.top_k:
+                break
+        return picked
+
+    def format(self, query: str) -> str:
+        """The recall result as a prompt section, or '' when nothing matches."""
+        picked = self.recall(query)
+        if not picked:
+            return ""
+        lines = ["## Relevant Memory"]
+        lines += [f"- ({source}) {text}" for source, text in picked]
+        return "\n".join(lines)
+
+    def _refresh(self) -> None:
+        signature = (_stat(self.memory_file), self._graph_version())
+        if signature == self._signature:
+            return
+        with self._lock:
+            if signature == self._signature:
+                return
+            text = workspace_files.read_text(self.memory_file) or ""
+            chunks = [("MEMORY.md", c) for c in chunk_markdown(text)]
+            chunks += [("Second Brain", c) for c in self._graph_chunks()]
+            self._chunks = chunks
+            self._index = BM25Index([c for _, c in chunks])
+            self._memory_tokens = estimate_tokens(text)
+            self._signature = signature
+            logger.debug("Rebuilt memory recall index with {} chunks", len(chunks))
+
+    def _graph_version(self) -> tuple | None:
+        """
+        The graph's write counter (see nanobot.game.memory), or the node count
+        and highest rowid on databases that predate it.
+        """
+        if self.graph_db is None or not self.graph_db.exists():
+            return None
+        try:
+            with closing(self._connect_graph()) as conn:
+                try:
+                    row = conn.execute("SELECT version FROM graph_version WHERE id = 1").fetchone()
+                except sqlite3.OperationalError:
+                    row = None
+                if row is not None:
+                    return ("version", row[0])
+                return ("nodes", *conn.execute("SELECT count(*), max(rowid) FROM nodes").fetchone())
+        except sqlite3.Error as e:
+            logger.debug("Failed to read the Second Brain version for recall: {}", e)
+            return None
+
+    def _connect_graph(self) -> sqlite3.Connection:
+        return sqlite3.connect(f"file:{self.graph_db}?mode=ro", uri=True, timeout=5)
+
+    def _graph_chunks(self) -> list[str]:
+        if self.graph_db is None or not self.graph_db.exists():
+            return []
+        try:
+            with closing(self._connect_graph()) as conn:
+                rows = conn.execute("SELECT type, name, properties FROM nodes ORDER BY rowid").fetchall()
+        except sqlite3.Error as e:
+            logger.warning("Failed to read Second Brain nodes for recall: {}", e)
+            return []
+        return [f"[{type_}] {name}{_format_properties(props)}" for type_, name, props in rows]
+
+
+def _stat(path: Path) -> tuple[int, int] | None:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _format_properties(raw: Any) -> str:
+    try:
+        props = json.loads(raw) if isinstance(raw, str) else raw
+    except ValueError:
+        return f": {raw}"
+    if not props:
+        return ""
+    if isinstance(props, dict):
+        return ": " + "; ".join(f"{k}: {v}" for k, v in props.items())
+    return f": {props}"
@@ -4,11 +4,62 @@ import json
 import os
 import re
 import shutil
+import threading
+import time
 from pathlib import Path
 
+from nanobot.utils.filecache import file_signature, workspace_files
+
 # Default builtin skills directory (relative to this file)
 BUILTIN_SKILLS_DIR = Path(__file__).parent.parent / "skills"
 
+# How long a shutil.which result is trusted; a binary the agent just
+# installed shows up as available after at most this long
+WHICH_TTL_S = 30.0
+_which_cache: dict[tuple[str, str], tuple[float, bool]] = {}
+_which_lock = threading.Lock()
+
+
+def _has_binary(name: str) -> bool:
+    """shutil.which(name) is not None, memoized per PATH for WHICH_TTL_S."""
+    key = (name, os.environ.get("PATH", ""))
+    now = time.monotonic()
+    with _which_lock:
+        hit = _which_cache.get(key)
+    if hit and now - hit[0] < WHICH_TTL_S:
+        return hit[1]
+    found = shutil.which(name) is not None
+    with _which_lock:
+        _which_cache[key] = (now, found)
+    return found
+
+
+def _parse_frontmatter(content: str) -> dict | None:
+    """Key/value pairs of the YAML frontmatter (simple one-line values only)."""
+    if content.startswith("---"):
+        match = re.match(r"^---\n(.*?)\n---", content, re.DOTALL)
+        if match:
+            metadata = {}
+            for line in match.group(1).split("\n"):
+                if ":" in line:
+                    key, value = line.split(":", 1)
+                    metadata[key.strip()] = value.strip().strip('"\'')
+            return metadata
+    return None
+
+
+def _parse_nanobot_metadata(raw: str) -> dict:
+    """Parse skill metadata JSON from frontmatter (supports nanobot and openclaw keys)."""
+    try:
+        data = json.loads(raw)
+        return data.get("nanobot", data.get("openclaw", {})) if isinstance(data, dict) else {}
+    except (json.JSONDecodeError, TypeError):
+        return {}
+
+
+def _parse_skill_meta(content: str) -> dict:
+    return _parse_nanobot_metadata((_parse_frontmatter(content) or {}).get("metadata", ""))
+
 
 class SkillsLoader:
     """
@@ -16,12 +67,38 @@ class SkillsLoader:
     
     Skills are markdown files (SKILL.md) that teach the agent how to use
     specific tools or perform certain tasks.
+
+    Skill files are read through the shared workspace file cache, with
+    their parsed frontmatter cached next to the text, and directory
+    listings are reused until the directory's mtime changes. Building the
+    skills summary for an unchanged tree costs only stat calls.
     """
     
     def __init__(self, workspace: Path, builtin_skills_dir: Path | None = None):
         self.workspace = workspace
         self.workspace_skills = workspace / "skills"
         self.builtin_skills = builtin_skills_dir or BUILTIN_SKILLS_DIR
+        self._listings: dict[Path, tuple[int, list[Path]]] = {}  # root -> (mtime_ns, skill dirs)
+    
+    def _skill_dirs(self, root: Path) -> list[Path]:
+        """Subdirectories of a skills root, relisted only when the root's mtime changes."""
+        try:
+            mtime = root.stat().st_mtime_ns
+        except OSError:
+            return []
+        cached = self._listings.get(root)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        dirs = sorted(p for p in root.iterdir() if p.is_dir())
+        self._listings[root] = (mtime, dirs)
+        return dirs
+    
+    def _skill_file(self, name: str) -> Path | None:
+        """Path of a skill's SKILL.md, workspace first; None if there is none."""
+        for root in (self.workspace_skills, self.builtin_skills):
+            if root and file_signature(path := root / name / "SKILL.md"):
+                return path
+        return None
     
     def list_skills(self, filter_unavailable: bool = True) -> list[dict[str, str]]:
         """
@@ -36,20 +113,18 @@ class SkillsLoader:
         skills = []
         
         # Workspace skills (highest priority)
-        if self.workspace_skills.exists():
-            for skill_dir in self.workspace_skills.iterdir():
-                if skill_dir.is_dir():
-                    skill_file = skill_dir / "SKILL.md"
-                    if skill_file.exists():
-                        skills.append({"name": skill_dir.name, "path": str(skill_file), "source": "workspace"})
+        for skill_dir in self._skill_dirs(self.workspace_skills):
+            skill_file = skill_dir / "SKILL.md"
+            if file_signature(skill_file):
+                skills.append({"name": skill_dir.name, "path": str(skill_file), "source": "workspace"})
         
         # Built-in skills
-        if self.builtin_skills and self.builtin_skills.exists():
-            for skill_dir in self.builtin_skills.iterdir():
-                if skill_dir.is_dir():
-                    skill_file = skill_dir / "SKILL.md"
-                    if skill_file.exists() and not any(s["name"] == skill_dir.name for s in skills):
-                        skills.append({"name": skill_dir.name, "path": str(skill_file), "source": "builtin"})
+        if self.builtin_skills:
+            seen = {s["name"] for s in skills}
+            for skill_dir in self._skill_dirs(self.builtin_skills):
+                skill_file = skill_dir / "SKILL.md"
+                if skill_dir.name not in seen and file_signature(skill_file):
+                    skills.append({"name": skill_dir.name, "path": str(skill_file), "source": "builtin"})
         
         # Filter by requirements
         if filter_unavailable:
@@ -66,18 +141,8 @@ class SkillsLoader:
         Returns:
             Skill content or None if not found.
         """
-        # Check workspace first
-        workspace_skill = self.workspace_skills / name / "SKILL.md"
-        if workspace_skill.exists():
-            return workspace_skill.read_text(encoding="utf-8")
-        
-        # Check built-in
-        if self.builtin_skills:
-            builtin_skill = self.builtin_skills / name / "SKILL.md"
-            if builtin_skill.exists():
-                return builtin_skill.read_text(encoding="utf-8")
-        
-        return None
+        path = self._skill_file(name)
+        return workspace_files.read_text(path) if path else None
     
     def load_skills_for_context(self, skill_names: list[str]) -> str:
         """
@@ -144,7 +209,7 @@ class SkillsLoader:
         missing = []
         requires = skill_meta.get("requires", {})
         for b in requires.get("bins", []):
-            if not shutil.which(b):
+            if not _has_binary(b):
                 missing.append(f"CLI: {b}")
         for env in requires.get("env", []):
             if not os.environ.get(env):
@@ -168,17 +233,13 @@ class SkillsLoader:
     
     def _parse_nanobot_metadata(self, raw: str) -> dict:
         """Parse skill metadata JSON from frontmatter (supports nanobot and openclaw keys)."""
-        try:
-            data = json.loads(raw)
-            return data.get("nanobot", data.get("openclaw", {})) if isinstance(data, dict) else {}
-        except (json.JSONDecodeError, TypeError):
-            return {}
+        return _parse_nanobot_metadata(raw)
     
     def _check_requirements(self, skill_meta: dict) -> bool:
         """Check if skill requirements are met (bins, env vars)."""
         requires = skill_meta.get("requires", {})
         for b in requires.get("bins", []):
-            if not shutil.which(b):
+            if not _has_binary(b):
                 return False
         for env in requires.get("env", []):
             if not os.environ.get(env):
@@ -187,15 +248,15 @@ class SkillsLoader:
     
     def _get_skill_meta(self, name: str) -> dict:
         """Get nanobot metadata for a skill (cached in frontmatter)."""
-        meta = self.get_skill_metadata(name) or {}
-        return self._parse_nanobot_metadata(meta.get("metadata", ""))
+        path = self._skill_file(name)
+        return (workspace_files.get(path, _parse_skill_meta) if path else None) or {}
     
     def get_always_skills(self) -> list[str]:
         """Get skills marked as always=true that meet requirements."""
         result = []
         for s in self.list_skills(filter_unavailable=True):
             meta = self.get_skill_metadata(s["name"]) or {}
-            skill_meta = self._parse_nanobot_metadata(meta.get("metadata", ""))
+            skill_meta = self._get_skill_meta(s["name"])
             if skill_meta.get("always") or meta.get("always"):
                 result.append(s["name"])
         return result
@@ -210,19 +271,6 @@ class SkillsLoader:
         Returns:
             Metadata dict or None.
         """
-        content = self.load_skill(name)
-        if not content:
-            return None
-        
-        if content.startswith("---"):
-            match = re.match(r"^---\n(.*?)\n---", content, re.DOTALL)
-            if match:
-                # Simple YAML parsing
-                metadata = {}
-                for line in match.group(1).split("\n"):
-                    if ":" in line:
-                        key, value = line.split(":", 1)
-                        metadata[key.strip()] = value.strip().strip('"\'')
-                return metadata
-        
-        return None
+        path = self._skill_file(name)
+        meta = workspace_files.get(path, _parse_frontmatter) if path else None
+        return dict(meta) if meta is not None else None
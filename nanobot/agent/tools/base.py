@@ -39,6 +39,16 @@ class Tool(ABC):
         """JSON Schema for tool parameters."""
         pass
     
+    @property
+    def read_only(self) -> bool:
+        """Whether the tool only reads state and has no side effects."""
+        return False
+
+    @property
+    def concurrency_safe(self) -> bool:
+        """Whether calls may run in parallel with other concurrency-safe calls in the same turn."""
+        return self.read_only
+
     @abstractmethod
     async def execute(self, **kwargs: Any) -> str:
         """
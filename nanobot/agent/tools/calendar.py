@@ -1,3 +1,4 @@
+import asyncio
 from typing import Any
 from nanobot.agent.tools.base import Tool
 
@@ -5,6 +6,10 @@ class ListCalendarTool(Tool):
     @property
     def name(self) -> str:
         return "list_calendar"
+
+    @property
+    def read_only(self) -> bool:
+        return True
         
     @property
     def description(self) -> str:
@@ -22,7 +27,7 @@ class ListCalendarTool(Tool):
         try:
             from nanobot.game.google_api import GoogleIntegration
             google = GoogleIntegration()
-            events = google.get_upcoming_events()
+            events = await asyncio.to_thread(google.get_upcoming_events)
             if not events:
                 return "Your calendar is completely empty for the upcoming future."
                 
@@ -4,6 +4,7 @@ from pathlib import Path
 from typing import Any
 
 from nanobot.agent.tools.base import Tool
+from nanobot.utils.filecache import workspace_files
 
 
 def _resolve_path(path: str, workspace: Path | None = None, allowed_dir: Path | None = None) -> Path:
@@ -27,6 +28,10 @@ class ReadFileTool(Tool):
     @property
     def name(self) -> str:
         return "read_file"
+
+    @property
+    def read_only(self) -> bool:
+        return True
     
     @property
     def description(self) -> str:
@@ -98,6 +103,7 @@ class WriteFileTool(Tool):
             file_path = _resolve_path(path, self._workspace, self._allowed_dir)
             file_path.parent.mkdir(parents=True, exist_ok=True)
             file_path.write_text(content, encoding="utf-8")
+            workspace_files.invalidate(file_path)
             return f"Successfully wrote {len(content)} bytes to {file_path}"
         except PermissionError as e:
             return f"Error: {e}"
@@ -159,6 +165,7 @@ class EditFileTool(Tool):
 
             new_content = content.replace(old_text, new_text, 1)
             file_path.write_text(new_content, encoding="utf-8")
+            workspace_files.invalidate(file_path)
 
             return f"Successfully edited {file_path}"
         except PermissionError as e:
@@ -177,6 +184,10 @@ class ListDirTool(Tool):
     @property
     def name(self) -> str:
         return "list_dir"
+
+    @property
+    def read_only(self) -> bool:
+        return True
     
     @property
     def description(self) -> str:
@@ -1,5 +1,6 @@
 """Game interaction tools for caring for the Digimon Partner."""
 
+import asyncio
 import json
 from nanobot.agent.tools.base import Tool
 try:
@@ -143,6 +144,10 @@ class ListTasksTool(Tool):
     @property
     def name(self) -> str:
         return "list_tasks"
+
+    @property
+    def read_only(self) -> bool:
+        return True
         
     @property
     def description(self) -> str:
@@ -159,6 +164,9 @@ class ListTasksTool(Tool):
     async def execute(self, source_filter: str | None = None, **kwargs) -> str:
         if not HAS_GAME:
             return "Game module not available."
+        return await asyncio.to_thread(self._list_tasks)
+
+    def _list_tasks(self) -> str:
         db = SessionLocal()
         try:
             from nanobot.game import models
@@ -0,0 +1,71 @@
+"""History search tool: ranked full-text search over memory/HISTORY.md."""
+
+import asyncio
+from typing import Any
+
+from nanobot.agent.memory import HistoryIndex
+from nanobot.agent.tools.base import Tool
+
+
+class SearchHistoryTool(Tool):
+    """Searches the consolidated conversation log without spawning grep."""
+
+    def __init__(self, index: HistoryIndex, max_results: int = 20):
+        self._index = index
+        self.max_results = max_results
+
+    @property
+    def name(self) -> str:
+        return "search_history"
+
+    @property
+    def read_only(self) -> bool:
+        return True
+
+    @property
+    def description(self) -> str:
+        return (
+            "Search past conversation summaries in memory/HISTORY.md. "
+            "Returns the best-matching entries with their dates, optionally within a date range."
+        )
+
+    @property
+    def parameters(self) -> dict[str, Any]:
+        return {
+            "type": "object",
+            "properties": {
+                "query": {
+                    "type": "string",
+                    "description": "Words to look for, e.g. 'exam schedule physics'"
+                },
+                "since": {
+                    "type": "string",
+                    "description": "Only entries on or after this date (YYYY-MM-DD)"
+                },
+                "until": {
+                    "type": "string",
+                    "description": "Only entries on or before this date (YYYY-MM-DD)"
+                },
+                "limit": {
+                    "type": "integer",
+                    "description": f"Maximum number of entries (default 5, max {self.max_results})",
+                    "minimum": 1
+                }
+            },
+            "required": ["query"]
+        }
+
+    async def execute(
+        self, query: str, since: str | None = None, until: str | None = None, limit: int = 5, **kwargs: Any,
+    ) -> str:
+        limit = min(max(1, limit), self.max_results)
+        try:
+            hits = await asyncio.to_thread(self._index.search, query, limit, since, until)
+        except Exception as e:
+            return f"Error searching history: {e}"
+        if not hits:
+            return f"No history entries match '{query}'."
+        lines = [f"{len(hits)} matching history entries (best first):"]
+        for hit in hits:
+            lines.append(f"- [{hit['ts'] or 'undated'}] {hit['snippet']}")
+        return "\n".join(lines)
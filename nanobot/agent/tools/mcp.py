@@ -19,6 +19,8 @@ class MCPToolWrapper(Tool):
         self._name = f"mcp_{server_name}_{tool_def.name}"
         self._description = tool_def.description or tool_def.name
         self._parameters = tool_def.inputSchema or {"type": "object", "properties": {}}
+        annotations = getattr(tool_def, "annotations", None)
+        self._read_only = bool(annotations and annotations.readOnlyHint)
 
     @property
     def name(self) -> str:
@@ -32,6 +34,10 @@ class MCPToolWrapper(Tool):
     def parameters(self) -> dict[str, Any]:
         return self._parameters
 
+    @property
+    def read_only(self) -> bool:
+        return self._read_only
+
     async def execute(self, **kwargs: Any) -> str:
         from mcp import types
         result = await self._session.call_tool(self._original_name, arguments=kwargs)
@@ -75,6 +75,10 @@ class SearchMCPRegistryTool(Tool):
     def name(self) -> str:
         return "search_mcp_registry"
 
+    @property
+    def read_only(self) -> bool:
+        return True
+
     @property
     def description(self) -> str:
         return (
@@ -1,8 +1,10 @@
 """Tool registry for dynamic tool management."""
 
+import asyncio
 from typing import Any
 
 from nanobot.agent.tools.base import Tool
+from nanobot.agent.tracing import span
 
 
 class ToolRegistry:
@@ -53,13 +55,48 @@ class ToolRegistry:
         if not tool:
             return f"Error: Tool '{name}' not found"
 
-        try:
-            errors = tool.validate_params(params)
-            if errors:
-                return f"Error: Invalid parameters for tool '{name}': " + "; ".join(errors)
-            return await tool.execute(**params)
-        except Exception as e:
-            return f"Error executing {name}: {str(e)}"
+        with span("tool", tool=name) as s:
+            try:
+                errors = tool.validate_params(params)
+                if errors:
+                    result = f"Error: Invalid parameters for tool '{name}': " + "; ".join(errors)
+                else:
+                    result = await tool.execute(**params)
+            except Exception as e:
+                result = f"Error executing {name}: {str(e)}"
+            s.set(result_chars=len(result), error=result.startswith("Error"))
+            return result
+
+    async def execute_many(self, calls: list[tuple[str, dict[str, Any]]]) -> list[str]:
+        """
+        Execute several tool calls, running concurrency-safe ones in parallel.
+
+        Consecutive calls to concurrency-safe tools are gathered as one batch;
+        any other call runs on its own, after everything before it finished.
+
+        Args:
+            calls: (name, params) pairs in the order the model requested them.
+
+        Returns:
+            Results in the same order as ``calls``.
+        """
+        results: list[str] = []
+        batch: list[tuple[str, dict[str, Any]]] = []
+
+        async def flush() -> None:
+            if batch:
+                results.extend(await asyncio.gather(*(self.execute(n, p) for n, p in batch)))
+                batch.clear()
+
+        for name, params in calls:
+            tool = self._tools.get(name)
+            if tool and tool.concurrency_safe:
+                batch.append((name, params))
+                continue
+            await flush()
+            results.append(await self.execute(name, params))
+        await flush()
+        return results
     
     @property
     def tool_names(self) -> list[str]:
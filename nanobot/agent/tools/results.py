@@ -0,0 +1,97 @@
+"""Result store: keeps large tool outputs out of the prompt, readable in pages."""
+
+from contextvars import ContextVar
+from typing import Any
+
+from nanobot.agent.tools.base import Tool
+
+
+class ReadResultTool(Tool):
+    """
+    Pages through tool results that were too large to inline.
+
+    Results longer than ``threshold`` characters are stored for the rest of the
+    turn and replaced in the conversation by a preview and a handle, so later
+    LLM calls in the same turn do not re-send the full output. The preview is
+    most of the threshold, so a result just over it rarely needs a page read;
+    up to ``free_pages`` LLM calls that only read pages are not counted
+    against the agent loop's iteration cap.
+    """
+
+    def __init__(
+        self, threshold: int = 12000, preview_chars: int = 8000, max_page: int = 24000, free_pages: int = 4,
+    ):
+        self.threshold = threshold
+        self.preview_chars = preview_chars
+        self.max_page = max_page
+        self.free_pages = free_pages
+        # One store per turn; concurrent turns run in separate tasks.
+        self._store: ContextVar[dict[str, str] | None] = ContextVar("result_store", default=None)
+
+    def start_turn(self) -> None:
+        """Drop results stored by the previous turn."""
+        self._store.set({})
+
+    def spill(self, tool_name: str, result: str) -> str:
+        """Store an oversized result and return its preview; small results pass through."""
+        store = self._store.get()
+        if store is None or tool_name == self.name or len(result) <= self.threshold:
+            return result
+        handle = f"r{len(store) + 1}"
+        store[handle] = result
+        return (
+            f"{result[:self.preview_chars]}\n\n"
+            f"[Output truncated: showing {self.preview_chars} of {len(result)} chars. "
+            f"Full result stored as handle '{handle}'; call read_result(handle=\"{handle}\", "
+            f"offset={self.preview_chars}) to read more.]"
+        )
+
+    @property
+    def name(self) -> str:
+        return "read_result"
+
+    @property
+    def read_only(self) -> bool:
+        return True
+
+    @property
+    def description(self) -> str:
+        return (
+            "Read part of a large tool result that was truncated earlier in this turn. "
+            "Use the handle from the truncation notice."
+        )
+
+    @property
+    def parameters(self) -> dict[str, Any]:
+        return {
+            "type": "object",
+            "properties": {
+                "handle": {
+                    "type": "string",
+                    "description": "Result handle, e.g. 'r1'"
+                },
+                "offset": {
+                    "type": "integer",
+                    "description": "Character offset to start reading from",
+                    "minimum": 0
+                },
+                "length": {
+                    "type": "integer",
+                    "description": f"Number of characters to read (max {self.max_page})",
+                    "minimum": 1
+                }
+            },
+            "required": ["handle"]
+        }
+
+    async def execute(self, handle: str, offset: int = 0, length: int | None = None, **kwargs: Any) -> str:
+        result = (self._store.get() or {}).get(handle)
+        if result is None:
+            return f"Error: Unknown result handle '{handle}' (handles only live for the current turn)"
+        length = min(length or self.max_page, self.max_page)
+        end = min(offset + length, len(result))
+        page = result[offset:end]
+        footer = f"[{handle}: chars {offset}-{end} of {len(result)}"
+        if end < len(result):
+            footer += f"; next offset={end}"
+        return f"{page}\n\n{footer}]"
@@ -1,11 +1,12 @@
 from typing import Any
+import asyncio
 import json
 from pydantic import Field
 from sqlalchemy.orm import Session
 
 from nanobot.agent.tools.base import Tool
 from nanobot.game.database import SessionLocal
-from nanobot.game import memory
+from nanobot.game import memory, models
 
 
 class ManageMemoryGraphTool(Tool):
@@ -46,13 +47,13 @@ class ManageMemoryGraphTool(Tool):
         "required": ["entities", "relations"]
     }
 
-    async def execute(self, arguments: dict[str, Any]) -> str:
+    async def execute(self, entities: list[dict] | None = None, relations: list[dict] | None = None, **kwargs: Any) -> str:
         db = SessionLocal()
         try:
             res = memory.batch_upsert_memory(
                 db=db,
-                entities=arguments.get("entities", []),
-                relations=arguments.get("relations", [])
+                entities=entities or [],
+                relations=relations or []
             )
             return f"Successfully saved to memory: {len(res['nodes'])} nodes and {len(res['edges'])} edges."
         except Exception as e:
@@ -67,24 +68,33 @@ class SearchMemoryGraphTool(Tool):
     """Tool to search the Digimon Second Brain graph for information."""
     
     name: str = "search_memory_graph"
+    read_only: bool = True
     description: str = "Searches the Second Brain SQL Graph explicitly for a query to remember lore, enemies, etc."
     parameters: dict[str, Any] = {
         "type": "object",
         "properties": {
             "query": {
                 "type": "string",
-                "description": "The focus keyword to search for."
+                "description": "Keywords to search for; words match as prefixes and results are ranked by relevance."
+            },
+            "limit": {
+                "type": "integer",
+                "description": "Maximum number of nodes to return (default 10).",
+                "minimum": 1
             }
         },
         "required": ["query"]
     }
 
-    async def execute(self, arguments: dict[str, Any]) -> str:
+    async def execute(self, query: str, limit: int = 10, **kwargs: Any) -> str:
+        return await asyncio.to_thread(self._search, query, limit)
+
+    def _search(self, query: str, limit: int) -> str:
         db = SessionLocal()
         try:
-            nodes = memory.search_memory(db, query=arguments["query"])
+            nodes = memory.search_memory(db, query=query, limit=min(max(1, limit), 50))
             if not nodes:
-                return f"No memories found for '{arguments['query']}'."
+                return f"No memories found for '{query}'."
                 
             out = []
             for n in nodes:
@@ -95,3 +105,62 @@ class SearchMemoryGraphTool(Tool):
             return f"Error searching memory: {str(e)}"
         finally:
             db.close()
+
+
+class ExploreMemoryGraphTool(Tool):
+    """Tool to pull the connected subgraph around a Second Brain node into context."""
+
+    name: str = "explore_memory_graph"
+    read_only: bool = True
+    description: str = (
+        "Returns the nodes and relationships within a few hops of a Second Brain node, in one call. "
+        "Use it after search_memory_graph to see how a concept, enemy or person connects to everything else."
+    )
+    parameters: dict[str, Any] = {
+        "type": "object",
+        "properties": {
+            "node": {
+                "type": "string",
+                "description": "Node ID (e.g. 'enemy_devimon') or a name to look up."
+            },
+            "hops": {
+                "type": "integer",
+                "description": "How many relationship steps to follow (default 2, max 4).",
+                "minimum": 1
+            },
+            "relations": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "Only follow these relation types (e.g. ['weak_to', 'knows'])."
+            },
+            "limit": {
+                "type": "integer",
+                "description": "Maximum number of nodes to return (default 30).",
+                "minimum": 1
+            }
+        },
+        "required": ["node"]
+    }
+
+    async def execute(
+        self, node: str, hops: int = 2, relations: list[str] | None = None, limit: int = 30, **kwargs: Any,
+    ) -> str:
+        return await asyncio.to_thread(self._explore, node, hops, relations, limit)
+
+    def _explore(self, node: str, hops: int, relations: list[str] | None, limit: int) -> str:
+        db = SessionLocal()
+        try:
+            node_id = node
+            if db.get(models.SecondBrainNode, node_id) is None:
+                matches = memory.search_memory(db, query=node, limit=1)
+                if not matches:
+                    return f"No memory node matches '{node}'."
+                node_id = matches[0].id
+            result = memory.get_neighbourhood(
+                db, node_id, hops=min(max(1, hops), 4), relations=relations or None, limit=min(max(1, limit), 100),
+            )
+            return memory.format_neighbourhood(result)
+        except Exception as e:
+            return f"Error exploring memory: {str(e)}"
+        finally:
+            db.close()
@@ -0,0 +1,119 @@
+"""Turn-level tracing: lightweight spans exported as JSONL."""
+
+import json
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Iterator
+
+from loguru import logger
+
+
+@dataclass
+class Span:
+    """One timed step of a turn."""
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    start: float  # Unix time
+    duration_ms: float = 0.0
+    attrs: dict[str, Any] = field(default_factory=dict)
+
+    def set(self, **attrs: Any) -> None:
+        """Attach attributes (token usage, sizes, ...) to the span."""
+        self.attrs.update(attrs)
+
+
+# Spans finished so far in the current trace, and the innermost open span.
+# Context vars follow asyncio tasks and asyncio.to_thread, so concurrent
+# turns never mix their spans.
+_spans: ContextVar[list[Span] | None] = ContextVar("trace_spans", default=None)
+_parent: ContextVar[Span | None] = ContextVar("trace_parent", default=None)
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Span]:
+    """Time a step as a child of the current span; a no-op outside a traced turn."""
+    spans, parent = _spans.get(), _parent.get()
+    if spans is None or parent is None:
+        yield Span(name, "", "", None, 0.0, attrs=dict(attrs))
+        return
+    s = Span(name, parent.trace_id, uuid.uuid4().hex[:8], parent.span_id, time.time(), attrs=dict(attrs))
+    token = _parent.set(s)
+    t0 = time.perf_counter()
+    try:
+        yield s
+    except BaseException as e:
+        s.attrs["error"] = f"{type(e).__name__}: {e}"[:200]
+        raise
+    finally:
+        s.duration_ms = round((time.perf_counter() - t0) * 1000, 2)
+        _parent.reset(token)
+        spans.append(s)
+
+
+class Tracer:
+    """
+    Starts traces for agent turns and appends their spans to a JSONL file.
+
+    Each line is one span; spans of a turn share a trace_id and the root span
+    has parent_id null. The file rotates to ``spans.jsonl.1`` past max_bytes.
+    """
+
+    def __init__(self, trace_dir: Path | None, max_bytes: int = 10 * 1024 * 1024):
+        self.path = trace_dir / "spans.jsonl" if trace_dir else None
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def turn(self, name: str, **attrs: Any) -> Iterator[Span]:
+        """Trace one turn (or background job); spans are exported when it ends."""
+        if self.path is None:
+            yield Span(name, "", "", None, 0.0, attrs=dict(attrs))
+            return
+        spans: list[Span] = []
+        root = Span(name, uuid.uuid4().hex[:12], uuid.uuid4().hex[:8], None, time.time(), attrs=dict(attrs))
+        spans_token, parent_token = _spans.set(spans), _parent.set(root)
+        t0 = time.perf_counter()
+        try:
+            yield root
+        except BaseException as e:
+            root.attrs["error"] = f"{type(e).__name__}: {e}"[:200]
+            raise
+        finally:
+            root.duration_ms = round((time.perf_counter() - t0) * 1000, 2)
+            _parent.reset(parent_token)
+            _spans.reset(spans_token)
+            self._export([root, *sorted(spans, key=lambda s: s.start)])
+
+    def _export(self, spans: list[Span]) -> None:
+        lines = "".join(json.dumps(asdict(s), ensure_ascii=False, default=str) + "\n" for s in spans)
+        try:
+            with self._lock:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                if self.path.exists() and self.path.stat().st_size > self.max_bytes:
+                    self.path.replace(self.path.with_name(self.path.name + ".1"))
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(lines)
+        except OSError as e:
+            logger.warning("Failed to export trace: {}", e)
+
+
+def load_traces(path: Path) -> dict[str, list[dict[str, Any]]]:
+    """Read exported spans grouped by trace_id, oldest trace first."""
+    traces: dict[str, list[dict[str, Any]]] = {}
+    if not path.exists():
+        return traces
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                s = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            traces.setdefault(s["trace_id"], []).append(s)
+    return traces
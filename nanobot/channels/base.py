@@ -18,6 +18,7 @@ class BaseChannel(ABC):
     """
     
     name: str = "base"
+    supports_streaming: bool = False  # Can render "_stream" progress updates (e.g. by editing a message)
     
     def __init__(self, config: Any, bus: MessageBus):
         """
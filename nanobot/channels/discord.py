@@ -46,6 +46,7 @@ class DiscordChannel(BaseChannel):
     """Discord channel using Gateway websocket."""
 
     name = "discord"
+    supports_streaming = True
 
     def __init__(self, config: DiscordConfig, bus: MessageBus):
         super().__init__(config, bus)
@@ -55,6 +56,7 @@ class DiscordChannel(BaseChannel):
         self._heartbeat_task: asyncio.Task | None = None
         self._typing_tasks: dict[str, asyncio.Task] = {}
         self._http: httpx.AsyncClient | None = None
+        self._stream_drafts: dict[str, str] = {}  # channel_id -> message id of the reply being streamed
 
     async def start(self) -> None:
         """Start the Discord gateway connection."""
@@ -104,6 +106,15 @@ class DiscordChannel(BaseChannel):
         url = f"{DISCORD_API_BASE}/channels/{msg.chat_id}/messages"
         headers = {"Authorization": f"Bot {self.config.token}"}
 
+        if msg.metadata.get("_stream"):
+            await self._send_stream_update(url, headers, msg)
+            return
+
+        # Any other message closes the current draft; only the final reply replaces it
+        draft_id = self._stream_drafts.pop(msg.chat_id, None)
+        if msg.metadata.get("_progress"):
+            draft_id = None
+
         try:
             chunks = _split_message(msg.content or "")
             if not chunks:
@@ -112,6 +123,11 @@ class DiscordChannel(BaseChannel):
             for i, chunk in enumerate(chunks):
                 payload: dict[str, Any] = {"content": chunk}
 
+                if i == 0 and draft_id:
+                    if not await self._send_payload(f"{url}/{draft_id}", headers, payload, method="PATCH"):
+                        break
+                    continue
+
                 # Only set reply reference on the first chunk
                 if i == 0 and msg.reply_to:
                     payload["message_reference"] = {"message_id": msg.reply_to}
@@ -122,13 +138,25 @@ class DiscordChannel(BaseChannel):
         finally:
             await self._stop_typing(msg.chat_id)
 
+    async def _send_stream_update(self, url: str, headers: dict[str, str], msg: OutboundMessage) -> None:
+        """Show partial LLM output: post a draft once, then keep editing it."""
+        payload = {"content": msg.content[:MAX_MESSAGE_LEN]}
+        draft_id = self._stream_drafts.get(msg.chat_id)
+        if draft_id:
+            await self._send_payload(f"{url}/{draft_id}", headers, payload, method="PATCH")
+            return
+        response = await self._send_payload(url, headers, payload)
+        if response is not None:
+            self._stream_drafts[msg.chat_id] = response.json().get("id")
+            await self._stop_typing(msg.chat_id)
+
     async def _send_payload(
-        self, url: str, headers: dict[str, str], payload: dict[str, Any]
-    ) -> bool:
-        """Send a single Discord API payload with retry on rate-limit. Returns True on success."""
+        self, url: str, headers: dict[str, str], payload: dict[str, Any], method: str = "POST",
+    ) -> httpx.Response | None:
+        """Send a single Discord API payload with retry on rate-limit. Returns the response on success."""
         for attempt in range(3):
             try:
-                response = await self._http.post(url, headers=headers, json=payload)
+                response = await self._http.request(method, url, headers=headers, json=payload)
                 if response.status_code == 429:
                     data = response.json()
                     retry_after = float(data.get("retry_after", 1.0))
@@ -136,13 +164,13 @@ class DiscordChannel(BaseChannel):
                     await asyncio.sleep(retry_after)
                     continue
                 response.raise_for_status()
-                return True
+                return response
             except Exception as e:
                 if attempt == 2:
                     logger.error("Error sending Discord message: {}", e)
                 else:
                     await asyncio.sleep(1)
-        return False
+        return None
 
     async def _gateway_loop(self) -> None:
         """Main gateway loop: identify, heartbeat, dispatch events."""
@@ -194,6 +194,8 @@ class ChannelManager:
                 )
                 
                 channel = self.channels.get(msg.channel)
+                if channel and msg.metadata.get("_stream") and not channel.supports_streaming:
+                    continue  # Partial LLM output; the final reply follows
                 if channel:
                     try:
                         await channel.send(msg)
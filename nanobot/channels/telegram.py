@@ -106,6 +106,7 @@ class TelegramChannel(BaseChannel):
     """
     
     name = "telegram"
+    supports_streaming = True
     
     # Commands registered with Telegram's command menu
     BOT_COMMANDS = [
@@ -127,6 +128,7 @@ class TelegramChannel(BaseChannel):
         self._app: Application | None = None
         self._chat_ids: dict[str, int] = {}  # Map sender_id to chat_id for replies
         self._typing_tasks: dict[str, asyncio.Task] = {}  # chat_id -> typing loop task
+        self._stream_drafts: dict[str, int] = {}  # chat_id -> message_id of the reply being streamed
     
     async def start(self) -> None:
         """Start the Telegram bot with long polling."""
@@ -234,6 +236,15 @@ class TelegramChannel(BaseChannel):
                     allow_sending_without_reply=True
                 )
 
+        if msg.metadata.get("_stream"):
+            await self._send_stream_update(chat_id, msg, reply_params)
+            return
+
+        # Any other message closes the current draft; only the final reply replaces it
+        draft_id = self._stream_drafts.pop(msg.chat_id, None)
+        if msg.metadata.get("_progress"):
+            draft_id = None
+
         # Send media files
         for media_path in (msg.media or []):
             try:
@@ -259,27 +270,62 @@ class TelegramChannel(BaseChannel):
                     reply_parameters=reply_params
                 )
 
-        # Send text content
+        # Send text content; a reply that was streamed as a draft is edited in place
         if msg.content and msg.content != "[empty message]":
-            for chunk in _split_message(msg.content):
-                try:
-                    html = _markdown_to_telegram_html(chunk)
+            for i, chunk in enumerate(_split_message(msg.content)):
+                await self._send_text(
+                    chat_id, chunk, reply_params, edit_message_id=draft_id if i == 0 else None,
+                )
+
+    async def _send_text(
+        self,
+        chat_id: int,
+        text: str,
+        reply_params: ReplyParameters | None,
+        edit_message_id: int | None = None,
+    ) -> None:
+        """Send (or edit) one message as Telegram HTML, falling back to plain text."""
+        for html_mode in (True, False):
+            try:
+                if edit_message_id is not None:
+                    await self._app.bot.edit_message_text(
+                        chat_id=chat_id,
+                        message_id=edit_message_id,
+                        text=_markdown_to_telegram_html(text) if html_mode else text,
+                        parse_mode="HTML" if html_mode else None,
+                    )
+                else:
                     await self._app.bot.send_message(
-                        chat_id=chat_id, 
-                        text=html, 
-                        parse_mode="HTML",
+                        chat_id=chat_id,
+                        text=_markdown_to_telegram_html(text) if html_mode else text,
+                        parse_mode="HTML" if html_mode else None,
                         reply_parameters=reply_params
                     )
-                except Exception as e:
+                return
+            except Exception as e:
+                if "not modified" in str(e).lower():
+                    return
+                if html_mode:
                     logger.warning("HTML parse failed, falling back to plain text: {}", e)
-                    try:
-                        await self._app.bot.send_message(
-                            chat_id=chat_id, 
-                            text=chunk,
-                            reply_parameters=reply_params
-                        )
-                    except Exception as e2:
-                        logger.error("Error sending Telegram message: {}", e2)
+                else:
+                    logger.error("Error sending Telegram message: {}", e)
+
+    async def _send_stream_update(
+        self, chat_id: int, msg: OutboundMessage, reply_params: ReplyParameters | None,
+    ) -> None:
+        """Show partial LLM output: post a plain-text draft once, then keep editing it."""
+        text = msg.content[:4000]
+        draft_id = self._stream_drafts.get(msg.chat_id)
+        try:
+            if draft_id is None:
+                sent = await self._app.bot.send_message(
+                    chat_id=chat_id, text=text, reply_parameters=reply_params
+                )
+                self._stream_drafts[msg.chat_id] = sent.message_id
+            else:
+                await self._app.bot.edit_message_text(chat_id=chat_id, message_id=draft_id, text=text)
+        except Exception as e:
+            logger.debug("Telegram stream update failed: {}", e)
     
     async def _on_start(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handle /start command."""
@@ -279,6 +279,23 @@ This file stores important information that should persist across sessions.
     skills_dir.mkdir(exist_ok=True)
 
 
+def _make_session_manager(config: Config):
+    """Create the session manager for the configured storage backend."""
+    from nanobot.session.manager import SessionManager
+    from nanobot.session.sqlite import SQLiteSessionManager
+
+    defaults = config.agents.defaults
+    if defaults.session_backend not in ("jsonl", "sqlite"):
+        console.print(f"[red]Error: Unknown session backend '{defaults.session_backend}' (use jsonl or sqlite)[/red]")
+        raise typer.Exit(1)
+    manager_cls = SQLiteSessionManager if defaults.session_backend == "sqlite" else SessionManager
+    return manager_cls(
+        config.workspace_path,
+        max_cached=defaults.session_cache_size,
+        max_cache_bytes=defaults.session_cache_mb * 1024 * 1024,
+    )
+
+
 def _make_provider(config: Config):
     """Create the appropriate LLM provider from config."""
     from nanobot.providers.litellm_provider import LiteLLMProvider
@@ -332,7 +349,6 @@ def gateway(
     from nanobot.bus.queue import MessageBus
     from nanobot.agent.loop import AgentLoop
     from nanobot.channels.manager import ChannelManager
-    from nanobot.session.manager import SessionManager
     from nanobot.cron.service import CronService
     from nanobot.cron.types import CronJob
     from nanobot.heartbeat.service import HeartbeatService
@@ -354,7 +370,7 @@ def gateway(
         
     bus = MessageBus()
     provider = _make_provider(config)
-    session_manager = SessionManager(config.workspace_path)
+    session_manager = _make_session_manager(config)
     
     # Create cron service first (callback set after agent creation)
     cron_store_path = get_data_dir() / "cron" / "jobs.json"
@@ -370,12 +386,20 @@ def gateway(
         max_tokens=config.agents.defaults.max_tokens,
         max_iterations=config.agents.defaults.max_tool_iterations,
         memory_window=config.agents.defaults.memory_window,
+        context_window=config.agents.defaults.context_window,
+        memory_budget_tokens=config.agents.defaults.memory_budget_tokens,
         brave_api_key=config.tools.web.search.api_key or None,
         exec_config=config.tools.exec,
         cron_service=cron,
         restrict_to_workspace=config.tools.restrict_to_workspace,
         session_manager=session_manager,
         mcp_servers=config.tools.mcp_servers,
+        max_concurrency=config.agents.defaults.max_concurrency,
+        coalesce_window_ms=config.agents.defaults.coalesce_window_ms,
+        session_flush_ms=config.agents.defaults.session_flush_ms,
+        session_archive_days=config.agents.defaults.session_archive_days,
+        stream=config.agents.defaults.stream,
+        tracing=config.agents.defaults.tracing,
     )
     
     # Set cron callback (needs agent)
@@ -437,7 +461,7 @@ def gateway(
             await agent.close_mcp()
             heartbeat.stop()
             cron.stop()
-            agent.stop()
+            await agent.stop()
             await channels.stop_all()
     
     asyncio.run(run())
@@ -482,27 +506,51 @@ def agent(
         bus=bus,
         provider=provider,
         workspace=config.workspace_path,
+        session_manager=_make_session_manager(config),
         model=config.agents.defaults.model,
         temperature=config.agents.defaults.temperature,
         max_tokens=config.agents.defaults.max_tokens,
         max_iterations=config.agents.defaults.max_tool_iterations,
         memory_window=config.agents.defaults.memory_window,
+        context_window=config.agents.defaults.context_window,
+        memory_budget_tokens=config.agents.defaults.memory_budget_tokens,
         brave_api_key=config.tools.web.search.api_key or None,
         exec_config=config.tools.exec,
         cron_service=cron,
         restrict_to_workspace=config.tools.restrict_to_workspace,
         mcp_servers=config.tools.mcp_servers,
+        max_concurrency=config.agents.defaults.max_concurrency,
+        coalesce_window_ms=config.agents.defaults.coalesce_window_ms,
+        session_flush_ms=config.agents.defaults.session_flush_ms,
+        session_archive_days=config.agents.defaults.session_archive_days,
+        stream=config.agents.defaults.stream,
+        tracing=config.agents.defaults.tracing,
     )
     
+    live: dict = {"status": None}  # spinner of the turn in progress
+
     # Show spinner when logs are off (no output to miss); skip when logs are on
     def _thinking_ctx():
         if logs:
             from contextlib import nullcontext
             return nullcontext()
         # Animated spinner is safe to use with prompt_toolkit input handling
-        return console.status("[dim]nanobot is thinking...[/dim]", spinner="dots")
+        live["status"] = console.status("[dim]nanobot is thinking...[/dim]", spinner="dots")
+        return live["status"]
 
-    async def _cli_progress(content: str) -> None:
+    def _show_stream_preview(content: str) -> None:
+        """Show the tail of a reply that is still streaming in the spinner line."""
+        if live["status"] is None:
+            return
+        from rich.markup import escape
+        width = max(20, console.width - 10)
+        tail = content.rstrip().rsplit("\n", 1)[-1][-width:]
+        live["status"].update(f"[dim]{escape(tail)}[/dim]")
+
+    async def _cli_progress(content: str, *, streaming: bool = False) -> None:
+        if streaming:
+            _show_stream_preview(content)
+            return
         console.print(f"  [dim]↳ {content}[/dim]")
 
     if message:
@@ -542,7 +590,9 @@ def agent(
                 while True:
                     try:
                         msg = await asyncio.wait_for(bus.consume_outbound(), timeout=1.0)
-                        if msg.metadata.get("_progress"):
+                        if msg.metadata.get("_stream"):
+                            _show_stream_preview(msg.content)
+                        elif msg.metadata.get("_progress"):
                             console.print(f"  [dim]↳ {msg.content}[/dim]")
                         elif not turn_done.is_set():
                             if msg.content:
@@ -596,7 +646,7 @@ def agent(
                         console.print("\nGoodbye!")
                         break
             finally:
-                agent_loop.stop()
+                await agent_loop.stop()
                 outbound_task.cancel()
                 await asyncio.gather(bus_task, outbound_task, return_exceptions=True)
                 await agent_loop.close_mcp()
@@ -933,11 +983,14 @@ def cron_run(
         bus=bus,
         provider=provider,
         workspace=config.workspace_path,
+        session_manager=_make_session_manager(config),
         model=config.agents.defaults.model,
         temperature=config.agents.defaults.temperature,
         max_tokens=config.agents.defaults.max_tokens,
         max_iterations=config.agents.defaults.max_tool_iterations,
         memory_window=config.agents.defaults.memory_window,
+        context_window=config.agents.defaults.context_window,
+        memory_budget_tokens=config.agents.defaults.memory_budget_tokens,
         brave_api_key=config.tools.web.search.api_key or None,
         exec_config=config.tools.exec,
         restrict_to_workspace=config.tools.restrict_to_workspace,
@@ -972,6 +1025,95 @@ def cron_run(
         console.print(f"[red]Failed to run job {job_id}[/red]")
 
 
+# ============================================================================
+# Session Commands
+# ============================================================================
+
+
+sessions_app = typer.Typer(help="Manage conversation sessions")
+app.add_typer(sessions_app, name="sessions")
+
+
+@sessions_app.command("migrate")
+def sessions_migrate():
+    """Copy JSONL sessions into the SQLite session store."""
+    from nanobot.config.loader import load_config
+    from nanobot.session.manager import SessionManager
+    from nanobot.session.sqlite import SQLiteSessionManager
+
+    config = load_config()
+    source = SessionManager(config.workspace_path)
+    target = SQLiteSessionManager(config.workspace_path)
+    try:
+        count = target.import_sessions(source)
+    finally:
+        target.close()
+
+    console.print(f"[green]✓[/green] Migrated {count} sessions to {target.db_path}")
+    console.print("The JSONL files were left in place. Set agents.defaults.sessionBackend to \"sqlite\" to use the database.")
+
+
+@sessions_app.command("archive")
+def sessions_archive(
+    idle_days: float = typer.Option(None, "--idle-days", "-d", help="Archive sessions idle this many days (default: config)"),
+):
+    """Compress idle sessions into the archive tier and report the space reclaimed."""
+    from nanobot.config.loader import load_config
+    from nanobot.session.manager import SessionStoreBusyError
+
+    config = load_config()
+    days = idle_days if idle_days is not None else config.agents.defaults.session_archive_days
+    if config.agents.defaults.session_backend == "sqlite":
+        console.print("[yellow]Sessions are stored in SQLite; archiving only applies to the JSONL backend.[/yellow]")
+        return
+
+    manager = _make_session_manager(config)
+    try:
+        stats = manager.archive_idle(days)
+    except SessionStoreBusyError as e:
+        console.print(f"[red]{e}.[/red] Stop the gateway first; it archives idle sessions itself.")
+        raise typer.Exit(1)
+    reclaimed = stats["bytes_before"] - stats["bytes_after"]
+    console.print(
+        f"[green]✓[/green] Archived {stats['sessions']} sessions idle for {days:g}+ days: "
+        f"{stats['bytes_before'] / 1024:.1f} KB -> {stats['bytes_after'] / 1024:.1f} KB "
+        f"({reclaimed / 1024:.1f} KB reclaimed)"
+    )
+
+
+# ============================================================================
+# Memory Commands
+# ============================================================================
+
+
+memory_app = typer.Typer(help="Manage agent memory")
+app.add_typer(memory_app, name="memory")
+
+
+@memory_app.command("reindex")
+def memory_reindex():
+    """Rebuild the search indexes over memory/HISTORY.md and the Second Brain graph."""
+    from nanobot.agent.memory import MemoryStore
+    from nanobot.config.loader import load_config
+
+    config = load_config()
+    store = MemoryStore(config.workspace_path)
+    count = store.history_index.rebuild()
+    console.print(f"[green]✓[/green] Indexed {count} history entries from {store.history_file}")
+
+    try:
+        from nanobot.game.database import SessionLocal
+        from nanobot.game.memory import rebuild_memory_index
+    except ImportError:
+        return
+    db = SessionLocal()
+    try:
+        nodes = rebuild_memory_index(db)
+    finally:
+        db.close()
+    console.print(f"[green]✓[/green] Indexed {nodes} Second Brain nodes")
+
+
 # ============================================================================
 # Status Commands
 # ============================================================================
@@ -1014,6 +1156,83 @@ def status():
                 console.print(f"{spec.label}: {'[green]✓[/green]' if has_key else '[dim]not set[/dim]'}")
 
 
+@app.command()
+def trace(
+    trace_id: str = typer.Argument(None, help="Trace ID (or prefix) to show span by span"),
+    last: int = typer.Option(20, "--last", "-n", help="Number of recent turns to list"),
+    session: str = typer.Option(None, "--session", "-s", help="Only show turns of this session"),
+):
+    """Show where the time went in recent agent turns."""
+    from datetime import datetime as _dt
+
+    from nanobot.agent.tracing import load_traces
+    from nanobot.config.loader import load_config
+
+    path = load_config().workspace_path / "traces" / "spans.jsonl"
+    traces = load_traces(path)
+    if not traces:
+        console.print(f"No traces recorded yet ({path}).")
+        return
+
+    if trace_id:
+        matches = [t for t in traces if t.startswith(trace_id)]
+        if not matches:
+            console.print(f"[red]Trace {trace_id} not found[/red]")
+            raise typer.Exit(1)
+        spans = traces[matches[-1]]
+        children: dict[str | None, list[dict]] = {}
+        for s in spans:
+            children.setdefault(s["parent_id"], []).append(s)
+
+        table = Table(title=f"Trace {matches[-1]}")
+        table.add_column("Span")
+        table.add_column("ms", justify="right")
+        table.add_column("Details", style="dim")
+
+        def _add(parent_id: str | None, depth: int) -> None:
+            for s in sorted(children.get(parent_id, []), key=lambda x: x["start"]):
+                details = ", ".join(f"{k}={v}" for k, v in s["attrs"].items())
+                table.add_row("  " * depth + s["name"], f"{s['duration_ms']:.0f}", details)
+                _add(s["span_id"], depth + 1)
+
+        _add(None, 0)
+        console.print(table)
+        return
+
+    table = Table(title="Recent Turns")
+    table.add_column("Trace", style="cyan")
+    table.add_column("Started")
+    table.add_column("Kind")
+    table.add_column("Session")
+    table.add_column("Total ms", justify="right")
+    table.add_column("LLM ms (calls)", justify="right")
+    table.add_column("Tools ms", justify="right")
+    table.add_column("Tokens in/out", justify="right")
+
+    rows = []
+    for tid, spans in traces.items():
+        root = next((s for s in spans if s["parent_id"] is None), None)
+        if not root or (session and root["attrs"].get("session") != session):
+            continue
+        llm = [s for s in spans if s["name"] == "llm.chat"]
+        tools_ms = sum(s["duration_ms"] for s in spans if s["name"] == "tool")
+        tokens_in = sum(s["attrs"].get("prompt_tokens", 0) for s in llm)
+        tokens_out = sum(s["attrs"].get("completion_tokens", 0) for s in llm)
+        rows.append((
+            tid,
+            _dt.fromtimestamp(root["start"]).strftime("%Y-%m-%d %H:%M:%S"),
+            root["name"],
+            str(root["attrs"].get("session", "")),
+            f"{root['duration_ms']:.0f}",
+            f"{sum(s['duration_ms'] for s in llm):.0f} ({len(llm)})",
+            f"{tools_ms:.0f}",
+            f"{tokens_in}/{tokens_out}",
+        ))
+    for row in rows[-last:]:
+        table.add_row(*row)
+    console.print(table)
+
+
 # ============================================================================
 # OAuth Login
 # ============================================================================
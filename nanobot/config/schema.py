@@ -188,6 +188,17 @@ class AgentDefaults(Base):
     temperature: float = 0.7
     max_tool_iterations: int = 20
     memory_window: int = 50
+    context_window: int = 65536  # Prompt token budget; history fills what's left (0 = last memory_window messages)
+    memory_budget_tokens: int = 1000  # MEMORY.md goes into the prompt whole up to this size, then only the most relevant excerpts (0 = always whole)
+    max_concurrency: int = 4  # Max agent turns running at once (different sessions run in parallel)
+    session_backend: str = "jsonl"  # "jsonl" (one file per session) or "sqlite" (see `nanobot sessions migrate`)
+    session_flush_ms: int = 1000  # Batch session writes and flush them this often; a crash loses at most this much (0 = write every turn)
+    session_archive_days: float = 30  # Gzip sessions idle this long into sessions/archive (0 = never)
+    session_cache_size: int = 256  # Sessions kept in memory; least recently used ones are saved and dropped
+    session_cache_mb: int = 64  # Approximate memory budget for cached session messages
+    coalesce_window_ms: int = 200  # Merge a chat's burst of messages arriving this close together into one turn; each turn waits this long first (0 = off)
+    stream: bool = True  # Stream partial replies to channels that can edit messages (Telegram, Discord, CLI)
+    tracing: bool = True  # Record per-turn timing spans to <workspace>/traces/spans.jsonl (see `nanobot trace`)
 
 
 class AgentsConfig(Base):
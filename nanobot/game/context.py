@@ -1,15 +1,38 @@
+import os
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from sqlalchemy import event
 from sqlalchemy.orm import Session
-from . import state, memory, tiering
+from . import models, state, memory, tiering
+
+# Tables the Digimon prompt is built from; commits touching them invalidate snapshots
+_PROMPT_MODELS = (models.DigimonState, models.Inventory)
+_CHANGED = "_game_prompt_changed"
+_generation = 0  # Bumped after every commit that changed a prompt table in this process
 
 def build_system_prompt(db: Session, user_input: str) -> str:
     """
     Constructs the absolute state of the Agent for the LLM turn.
     """
+    persona, status = build_prompt_parts(db)
+    return f"{persona}\n\n{status}" if status else persona
+
+
+def build_prompt_parts(db: Session) -> tuple[str, str]:
+    """
+    Split the Digimon prompt into (persona, status).
+
+    The persona only changes on evolution, so it can live in the cached system
+    prompt prefix; the status (vitals, inventory) changes every few minutes.
+    """
     active_digimon = state.get_active_digimon(db)
     inventory = state.get_or_create_inventory(db)
     
     if not active_digimon:
-        return "You are a standalone Nanobot without a Digimon Partner. Ask the user to run 'digimon init'."
+        return "You are a standalone Nanobot without a Digimon Partner. Ask the user to run 'digimon init'.", ""
         
     base_persona = tiering.get_system_prompt_for_stage(active_digimon.stage)
     
@@ -47,4 +70,90 @@ def build_system_prompt(db: Session, user_input: str) -> str:
         "10. CRITICAL: Regardless of how unintelligent or childish your Digimon stage is, you MUST ALWAYS successfully execute tools (like `list_tasks`) perfectly. Being a baby does NOT mean you fail to use tools; it just means you talk like a baby *while* retrieving the real data."
     )
     
-    return f"{base_persona}\n\n{vitals}\n{inv}\n\n{directives}"
+    return f"{base_persona}\n\n{directives}", f"{vitals}\n{inv}"
+
+
+@event.listens_for(Session, "after_flush")
+def _note_flushed_changes(session, flush_context) -> None:
+    if any(isinstance(obj, _PROMPT_MODELS) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info[_CHANGED] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _note_bulk_changes(orm_execute_state) -> None:
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) and any(
+        m.class_ in _PROMPT_MODELS for m in orm_execute_state.all_mappers
+    ):
+        orm_execute_state.session.info[_CHANGED] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_generation(session) -> None:
+    # Only once the change is visible to other sessions, so a reload can't cache old rows
+    global _generation
+    if session.info.pop(_CHANGED, False):
+        _generation += 1
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session) -> None:
+    session.info.pop(_CHANGED, None)
+
+
+class PromptSnapshot:
+    """
+    The (persona, status) prompt parts, rebuilt only when game state changes.
+
+    Commits in this process that touch the Digimon or the inventory (feeding,
+    healing, combat, evolution, Web App actions) invalidate the snapshot
+    through ORM events. Writes by the separate daemon process are noticed by
+    the database and WAL files changing size or mtime, and no snapshot is
+    served for longer than max_age_s in any case.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session], max_age_s: float = 60.0):
+        self._session_factory = session_factory
+        self.max_age_s = max_age_s
+        bind = getattr(session_factory, "kw", {}).get("bind")
+        database = bind.url.database if bind is not None else None
+        self._files = [Path(database), Path(f"{database}-wal")] if database else []
+        self._lock = threading.Lock()
+        self._parts: tuple[str, str] | None = None
+        self._key: tuple | None = None
+        self._at = 0.0
+
+    def _state_key(self) -> tuple:
+        stats = []
+        for path in self._files:
+            try:
+                st = os.stat(path)
+                stats.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                stats.append(None)
+        return (_generation, *stats)
+
+    def cached(self) -> tuple[str, str] | None:
+        """The snapshot if it is still current, without touching the database."""
+        with self._lock:
+            if self._parts is None or time.monotonic() - self._at > self.max_age_s:
+                return None
+            return self._parts if self._key == self._state_key() else None
+
+    def get(self) -> tuple[str, str]:
+        """The current prompt parts, rebuilt from the database if stale."""
+        parts = self.cached()
+        if parts is not None:
+            return parts
+        key = self._state_key()  # Taken first: a write during the rebuild marks the result stale
+        db = self._session_factory()
+        try:
+            parts = build_prompt_parts(db)
+        finally:
+            db.close()
+        with self._lock:
+            self._parts, self._key, self._at = parts, key, time.monotonic()
+        return parts
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._parts = None
@@ -1,3 +1,4 @@
+import json
 import os
 import sqlite3
 from sqlalchemy import create_engine
@@ -13,6 +14,8 @@ DATABASE_URL = f"sqlite:///{db_dir}/brain.sqlite"
 engine = create_engine(
     DATABASE_URL,
     connect_args={"check_same_thread": False, "timeout": 15},
+    # Store non-ASCII text as-is so the memory search index can match it
+    json_serializer=lambda obj: json.dumps(obj, ensure_ascii=False),
     poolclass=QueuePool,
     pool_size=10,
     max_overflow=20
@@ -35,6 +38,14 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 def init_db():
     Base.metadata.create_all(bind=engine)
+    from .memory import ensure_edge_indexes, ensure_graph_version, ensure_memory_index
+    db = SessionLocal()
+    try:
+        ensure_memory_index(db)
+        ensure_edge_indexes(db)
+        ensure_graph_version(db)
+    finally:
+        db.close()
 
 def get_db():
     db = SessionLocal()
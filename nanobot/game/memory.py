@@ -1,8 +1,107 @@
+import json
+import re
+import threading
+import weakref
+from collections import OrderedDict
+
+from loguru import logger
+from sqlalchemy import bindparam, text
+from sqlalchemy.exc import DatabaseError, OperationalError
 from sqlalchemy.orm import Session
 from . import models
 
+# FTS5 index over node names and properties. It is an external-content table
+# over `nodes` (joined on rowid) kept in sync by triggers, so every write path,
+# ORM or raw SQL, updates it. A VACUUM may renumber those rowids behind the
+# triggers' back, so the index is integrity-checked once per process and
+# rebuilt if it no longer matches (see ensure_memory_index).
+_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS nodes_fts USING fts5(name, properties, content='nodes', content_rowid='rowid')",
+    """CREATE TRIGGER IF NOT EXISTS nodes_fts_ai AFTER INSERT ON nodes BEGIN
+        INSERT INTO nodes_fts(rowid, name, properties) VALUES (new.rowid, new.name, new.properties);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS nodes_fts_ad AFTER DELETE ON nodes BEGIN
+        INSERT INTO nodes_fts(nodes_fts, rowid, name, properties) VALUES ('delete', old.rowid, old.name, old.properties);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS nodes_fts_au AFTER UPDATE ON nodes BEGIN
+        INSERT INTO nodes_fts(nodes_fts, rowid, name, properties) VALUES ('delete', old.rowid, old.name, old.properties);
+        INSERT INTO nodes_fts(rowid, name, properties) VALUES (new.rowid, new.name, new.properties);
+    END""",
+]
+# A counter bumped by triggers on every write to nodes or edges, whoever
+# makes it (ORM, raw SQL, the daemon in another process). Caches of graph
+# reads key on it instead of listening for writes.
+_VERSION_DDL = [
+    "CREATE TABLE IF NOT EXISTS graph_version (id INTEGER PRIMARY KEY CHECK (id = 1), version INTEGER NOT NULL)",
+    "INSERT OR IGNORE INTO graph_version (id, version) VALUES (1, 0)",
+    *(
+        f"""CREATE TRIGGER IF NOT EXISTS {table}_version_{suffix} AFTER {op} ON {table} BEGIN
+            UPDATE graph_version SET version = version + 1 WHERE id = 1;
+        END"""
+        for table in ("nodes", "edges")
+        for suffix, op in (("ai", "INSERT"), ("au", "UPDATE"), ("ad", "DELETE"))
+    ),
+]
+_NAME_WEIGHT = 10.0  # A hit in the node name outranks one buried in its properties
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+_fts_engines: "weakref.WeakSet" = weakref.WeakSet()  # Engines whose index is known to exist
+_edge_index_engines: "weakref.WeakSet" = weakref.WeakSet()  # Engines whose edges table is indexed
+_version_engines: "weakref.WeakSet" = weakref.WeakSet()  # Engines with the graph_version triggers
+
+# Neighbourhood results by (engine, graph version, node, hops, relations, limit)
+_NEIGHBOURHOOD_CACHE_SIZE = 128
+_neighbourhood_cache: "OrderedDict[tuple, dict]" = OrderedDict()
+_neighbourhood_lock = threading.Lock()  # Read-only tools query the graph from worker threads
+
+
+def ensure_memory_index(db: Session) -> bool:
+    """Create the FTS index and its triggers if missing; False when FTS5 is unavailable."""
+    engine = db.get_bind()
+    if engine in _fts_engines:
+        return True
+    if engine.dialect.name != "sqlite":
+        return False
+    try:
+        exists = db.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'nodes_fts'")).first()
+        for stmt in _FTS_DDL:
+            db.execute(text(stmt))
+        if not exists:
+            db.execute(text("INSERT INTO nodes_fts(nodes_fts) VALUES ('rebuild')"))  # Index existing nodes
+        db.commit()
+        if exists and not _memory_index_intact(db):
+            logger.warning("Memory search index does not match the nodes table, rebuilding it")
+            db.execute(text("INSERT INTO nodes_fts(nodes_fts) VALUES ('rebuild')"))
+            db.commit()
+    except OperationalError as e:
+        db.rollback()
+        logger.warning("SQLite FTS5 unavailable, memory search falls back to LIKE scans: {}", e)
+        return False
+    _fts_engines.add(engine)
+    return True
+
+
+def _memory_index_intact(db: Session) -> bool:
+    """FTS5 integrity check of the index against the nodes table (rank=1 compares the content)."""
+    try:
+        db.execute(text("INSERT INTO nodes_fts(nodes_fts, rank) VALUES ('integrity-check', 1)"))
+        return True
+    except DatabaseError:
+        db.rollback()
+        return False
+
+
+def rebuild_memory_index(db: Session) -> int:
+    """Reindex every node, e.g. after a VACUUM renumbered the table's rowids; returns the node count."""
+    if ensure_memory_index(db):
+        db.execute(text("INSERT INTO nodes_fts(nodes_fts) VALUES ('rebuild')"))
+        db.commit()
+    return db.query(models.SecondBrainNode).count()
+
+def _node_id(type: str, name: str) -> str:
+    return f"{type}_{name.lower().replace(' ', '_')}"
+
 def add_memory_node(db: Session, type: str, name: str, properties: dict) -> models.SecondBrainNode:
-    node_id = f"{type}_{name.lower().replace(' ', '_')}"
+    node_id = _node_id(type, name)
     node = db.query(models.SecondBrainNode).filter(models.SecondBrainNode.id == node_id).first()
     if not node:
         node = models.SecondBrainNode(id=node_id, type=type, name=name, properties=properties)
@@ -29,33 +128,95 @@ def link_memory_nodes(db: Session, source_id: str, target_id: str, relation: str
     return edge
 
 def batch_upsert_memory(db: Session, entities: list[dict], relations: list[dict]) -> dict:
-    """Atomically upserts multiple nodes and links them explicitly in the SecondBrain."""
+    """
+    Upserts multiple nodes and links them in the SecondBrain in one transaction.
+
+    Existing nodes have their properties merged (as add_memory_node does) and
+    existing edges are kept. Two lookups and a single commit per call, no
+    matter how many items; on any error nothing is written.
+    """
     results = {"nodes": [], "edges": []}
-    for ent in entities:
-        n = add_memory_node(db, type=ent["type"], name=ent["name"], properties=ent.get("properties", {}))
-        results["nodes"].append(n.id)
-    
-    for rel in relations:
-        e = link_memory_nodes(db, source_id=rel["source_id"], target_id=rel["target_id"], relation=rel["relation"], properties=rel.get("properties", {}))
-        results["edges"].append(e.id)
-        
+    node_ids = [_node_id(ent["type"], ent["name"]) for ent in entities]
+    edge_ids = [f"{rel['source_id']}_{rel['relation']}_{rel['target_id']}" for rel in relations]
+    try:
+        nodes = {}
+        if node_ids:
+            nodes = {n.id: n for n in db.query(models.SecondBrainNode).filter(models.SecondBrainNode.id.in_(set(node_ids)))}
+        merged: dict[str, dict] = {}
+        for node_id, ent in zip(node_ids, entities):
+            node = nodes.get(node_id)
+            if node is None:
+                node = nodes[node_id] = models.SecondBrainNode(id=node_id, type=ent["type"], name=ent["name"], properties={})
+                db.add(node)
+            if node_id not in merged:
+                merged[node_id] = dict(node.properties) if node.properties else {}
+            merged[node_id].update(ent.get("properties") or {})
+            results["nodes"].append(node_id)
+        for node_id, properties in merged.items():
+            nodes[node_id].properties = properties  # New dict so the JSON column is marked dirty
+
+        existing_edges = set()
+        if edge_ids:
+            existing_edges = {
+                e.id for e in db.query(models.SecondBrainEdge.id).filter(models.SecondBrainEdge.id.in_(set(edge_ids)))
+            }
+        for edge_id, rel in zip(edge_ids, relations):
+            if edge_id not in existing_edges:
+                existing_edges.add(edge_id)
+                db.add(models.SecondBrainEdge(
+                    id=edge_id, source_id=rel["source_id"], target_id=rel["target_id"],
+                    relation=rel["relation"], properties=rel.get("properties") or {},
+                ))
+            results["edges"].append(edge_id)
+
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
     return results
 
-def search_memory(db: Session, query: str):
-    nodes = db.query(models.SecondBrainNode).filter(models.SecondBrainNode.name.ilike(f"%{query}%")).all()
-    # also search in properties (dirty hack for sqlite without FTS)
-    properties_nodes = db.query(models.SecondBrainNode).filter(models.SecondBrainNode.properties.ilike(f"%{query}%")).all()
+def search_memory(db: Session, query: str, limit: int = 10) -> list[models.SecondBrainNode]:
+    """
+    Nodes matching the query, best first (BM25, name hits weighted up).
+
+    Every word must match, as a prefix ("digi" finds "Digimon"); if no node
+    has them all, nodes matching any word are returned.
+    """
+    terms = _TERM_RE.findall(query.lower())
+    if not terms:
+        return []
+    if not ensure_memory_index(db):
+        return _scan_memory(db, query, limit)
+
+    sql = text(
+        "SELECT nodes.id FROM nodes_fts JOIN nodes ON nodes.rowid = nodes_fts.rowid "
+        f"WHERE nodes_fts MATCH :match ORDER BY bm25(nodes_fts, {_NAME_WEIGHT}, 1.0) LIMIT :limit"
+    )
+    ids: list[str] = []
+    for joiner in (" ", " OR "):
+        match = joiner.join(f'"{t}"*' for t in terms)
+        ids = [row[0] for row in db.execute(sql, {"match": match, "limit": limit})]
+        if ids or len(terms) == 1:
+            break
+    if not ids:
+        return []
+    by_id = {n.id: n for n in db.query(models.SecondBrainNode).filter(models.SecondBrainNode.id.in_(ids))}
+    return [by_id[i] for i in ids if i in by_id]
+
+def _scan_memory(db: Session, query: str, limit: int) -> list[models.SecondBrainNode]:
+    nodes = db.query(models.SecondBrainNode).filter(models.SecondBrainNode.name.ilike(f"%{query}%")).limit(limit).all()
+    properties_nodes = db.query(models.SecondBrainNode).filter(models.SecondBrainNode.properties.ilike(f"%{query}%")).limit(limit).all()
     
     results = {n.id: n for n in nodes + properties_nodes}
-    return list(results.values())
+    return list(results.values())[:limit]
 
-def get_memory_context_string(db: Session, query: str = None) -> str:
+def get_memory_context_string(db: Session, query: str = None, limit: int = 10) -> str:
     """Returns a stringified version of recent or relevant memories for prompt injection."""
     nodes = []
     if query:
-        nodes = search_memory(db, query)
+        nodes = search_memory(db, query, limit=limit)
     else:
-        nodes = db.query(models.SecondBrainNode).limit(10).all()
+        nodes = db.query(models.SecondBrainNode).limit(limit).all()
         
     if not nodes:
         return "No relevant memories found."
@@ -64,3 +225,113 @@ def get_memory_context_string(db: Session, query: str = None) -> str:
     for n in nodes:
         lines.append(f"- [{n.type}] {n.name}: {n.properties}")
     return "\n".join(lines)
+
+def ensure_edge_indexes(db: Session) -> None:
+    """Create the edges indexes on databases created before they were declared."""
+    engine = db.get_bind()
+    if engine in _edge_index_engines:
+        return
+    for index in models.SecondBrainEdge.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
+    _edge_index_engines.add(engine)
+
+def ensure_graph_version(db: Session) -> bool:
+    """Create the graph_version counter and its triggers if missing; False off SQLite."""
+    engine = db.get_bind()
+    if engine in _version_engines:
+        return True
+    if engine.dialect.name != "sqlite":
+        return False
+    for stmt in _VERSION_DDL:
+        db.execute(text(stmt))
+    db.commit()
+    _version_engines.add(engine)
+    return True
+
+def graph_version(db: Session) -> int | None:
+    """Current value of the write counter over nodes and edges, None if there is none."""
+    if not ensure_graph_version(db):
+        return None
+    row = db.execute(text("SELECT version FROM graph_version WHERE id = 1")).first()
+    return row[0] if row else None
+
+def get_neighbourhood(
+    db: Session, node_id: str, hops: int = 2, relations: list[str] | None = None, limit: int = 50,
+) -> dict:
+    """
+    The k-hop neighbourhood of a node, following edges in both directions.
+
+    Returns {"root", "nodes", "edges"}: nodes (closest first, with their hop
+    distance) and the edges between them, optionally only the given relation
+    types. One recursive CTE over the indexed edges table; results are cached
+    until the next write to the graph, from this process or any other.
+    """
+    version = graph_version(db)
+    key = (id(db.get_bind()), version, node_id, hops, tuple(sorted(relations or ())), limit)
+    if version is not None:
+        with _neighbourhood_lock:
+            if key in _neighbourhood_cache:
+                _neighbourhood_cache.move_to_end(key)
+                return _neighbourhood_cache[key]
+
+    ensure_edge_indexes(db)
+    relation_filter = "AND e.relation IN :relations" if relations else ""
+    walk = text(f"""
+        WITH RECURSIVE walk(node_id, depth) AS (
+            SELECT :root, 0
+            UNION
+            SELECT e.target_id, w.depth + 1 FROM walk w JOIN edges e ON e.source_id = w.node_id
+            WHERE w.depth < :hops {relation_filter}
+            UNION
+            SELECT e.source_id, w.depth + 1 FROM walk w JOIN edges e ON e.target_id = w.node_id
+            WHERE w.depth < :hops {relation_filter}
+        )
+        SELECT node_id, MIN(depth) AS depth FROM walk GROUP BY node_id ORDER BY depth, node_id LIMIT :limit
+    """)
+    params: dict = {"root": node_id, "hops": hops, "limit": limit}
+    if relations:
+        walk = walk.bindparams(bindparam("relations", expanding=True))
+        params["relations"] = list(relations)
+    depths = {row[0]: row[1] for row in db.execute(walk, params)}
+
+    nodes = db.query(models.SecondBrainNode).filter(models.SecondBrainNode.id.in_(depths)).all()
+    if not any(n.id == node_id for n in nodes):
+        result = {"root": node_id, "nodes": [], "edges": []}
+    else:
+        edges = db.query(models.SecondBrainEdge).filter(
+            models.SecondBrainEdge.source_id.in_(depths), models.SecondBrainEdge.target_id.in_(depths),
+        )
+        if relations:
+            edges = edges.filter(models.SecondBrainEdge.relation.in_(relations))
+        result = {
+            "root": node_id,
+            "nodes": sorted(
+                ({"id": n.id, "type": n.type, "name": n.name, "properties": n.properties or {}, "depth": depths[n.id]}
+                 for n in nodes),
+                key=lambda n: (n["depth"], n["id"]),
+            ),
+            "edges": sorted(
+                ({"source_id": e.source_id, "target_id": e.target_id, "relation": e.relation} for e in edges),
+                key=lambda e: (e["source_id"], e["relation"], e["target_id"]),
+            ),
+        }
+
+    if version is not None:
+        with _neighbourhood_lock:
+            _neighbourhood_cache[key] = result
+            if len(_neighbourhood_cache) > _NEIGHBOURHOOD_CACHE_SIZE:
+                _neighbourhood_cache.popitem(last=False)
+    return result
+
+def format_neighbourhood(result: dict) -> str:
+    """Compact text rendering of get_neighbourhood() for the prompt."""
+    if not result["nodes"]:
+        return f"No node with ID '{result['root']}'."
+    lines = [f"Subgraph around {result['root']} ({len(result['nodes'])} nodes, {len(result['edges'])} edges):", "Nodes:"]
+    for n in result["nodes"]:
+        props = f" {json.dumps(n['properties'], ensure_ascii=False)}" if n["properties"] else ""
+        lines.append(f"- [hop {n['depth']}] {n['id']} ({n['type']}: {n['name']}){props}")
+    if result["edges"]:
+        lines.append("Edges:")
+        lines.extend(f"- {e['source_id']} -[{e['relation']}]-> {e['target_id']}" for e in result["edges"])
+    return "\n".join(lines)
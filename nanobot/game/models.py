@@ -87,9 +87,9 @@ class SecondBrainEdge(Base):
     __tablename__ = "edges"
     
     id = Column(String, primary_key=True)
-    source_id = Column(String, ForeignKey("nodes.id"))
-    target_id = Column(String, ForeignKey("nodes.id"))
-    relation = Column(String, nullable=False)
+    source_id = Column(String, ForeignKey("nodes.id"), index=True)
+    target_id = Column(String, ForeignKey("nodes.id"), index=True)
+    relation = Column(String, nullable=False, index=True)
     properties = Column(JSON, default=dict)
     
 class SecondBrainDimension(Base):
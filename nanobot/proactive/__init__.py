@@ -0,0 +1,6 @@
+"""Proactive alerts: one scheduler for all unprompted agent messages."""
+
+from nanobot.proactive.alerts import ProactiveAlerts
+from nanobot.proactive.service import CachedSource, ProactiveScheduler
+
+__all__ = ["CachedSource", "ProactiveAlerts", "ProactiveScheduler"]
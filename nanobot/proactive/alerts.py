@@ -0,0 +1,219 @@
+"""Proactive alert rules: MAS deadlines, calendar time blocks and the daily plan."""
+
+import asyncio
+import functools
+from datetime import datetime, timezone
+from typing import Any
+
+from loguru import logger
+
+from nanobot.bus.events import InboundMessage
+from nanobot.bus.queue import MessageBus
+from nanobot.proactive.service import CachedSource, ProactiveScheduler
+from nanobot.session.manager import SessionManager
+
+CALENDAR_ALERT_LEAD_S = 300  # Alert when a time block starts within 5 minutes
+
+
+def _fetch_calendar() -> list[dict[str, Any]]:
+    from nanobot.game.google_api import GoogleIntegration
+    return GoogleIntegration().get_upcoming_events()
+
+
+def _fetch_deadlines() -> list[dict[str, Any]] | None:
+    """Upcoming MAS deadlines, or None when Notion is not configured."""
+    from nanobot.game.notion_api import NotionIntegration
+    notion = NotionIntegration()
+    if not notion.is_authenticated():
+        return None
+    return notion.fetch_mas_deadlines()
+
+
+def _check_and_mark_mas_alert(tid: str, title: str, task_type: str) -> bool:
+    """Record a deadline alert; False if this task was already alerted in the last day."""
+    from nanobot.game import models
+    from nanobot.game.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        state = db.query(models.TaskSyncState).filter_by(id=tid).first()
+        if not state:
+            state = models.TaskSyncState(id=tid, source="notion", title=title, status="pending", task_type=task_type)
+            db.add(state)
+
+        if state.last_notified_at:
+            try:
+                last = datetime.fromisoformat(state.last_notified_at)
+                if (datetime.utcnow() - last).total_seconds() < 86400:  # 1 msg per day
+                    return False
+            except Exception:
+                pass
+
+        state.last_notified_at = datetime.utcnow().isoformat()
+        db.commit()
+        return True
+    finally:
+        db.close()
+
+
+def _check_and_mark_calendar_alert(eid: str, summary: str) -> bool:
+    """Record a calendar alert; False if this event was already alerted."""
+    from nanobot.game import models
+    from nanobot.game.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        state_id = f"cal_alert_{eid}"
+        if db.query(models.TaskSyncState).filter_by(id=state_id).first():
+            return False
+        db.add(models.TaskSyncState(id=state_id, source="calendar", title=summary, status="alerted", task_type="event"))
+        db.commit()
+        return True
+    finally:
+        db.close()
+
+
+def _event_start(event: dict[str, Any]) -> datetime | None:
+    start_str = event.get("start", {}).get("dateTime")
+    if not start_str:
+        return None  # Ignore all-day events
+    if start_str.endswith("Z"):
+        start_str = start_str[:-1] + "+00:00"
+    return datetime.fromisoformat(start_str).astimezone(timezone.utc)
+
+
+class ProactiveAlerts:
+    """
+    The proactive alert rules, registered as jobs on a ProactiveScheduler.
+
+    All rules share cached sources: the latest Telegram session from the
+    session index (the chat to alert), the Google Calendar window and the Notion deadlines. The
+    calendar rule sleeps until the next event's alert window opens instead
+    of polling every minute.
+    """
+
+    def __init__(
+        self,
+        bus: MessageBus,
+        sessions: SessionManager,
+        session_ttl_s: float = 600,
+        calendar_ttl_s: float = 600,
+        deadlines_ttl_s: float = 3600,
+    ):
+        self.bus = bus
+        self.session_index = CachedSource(
+            "sessions", functools.partial(sessions.list_sessions, channel="telegram", limit=1), session_ttl_s,
+        )
+        self.calendar = CachedSource("calendar", _fetch_calendar, calendar_ttl_s)
+        self.deadlines = CachedSource("deadlines", _fetch_deadlines, deadlines_ttl_s)
+
+    def register(self, scheduler: ProactiveScheduler) -> None:
+        """Add the alert rules to the scheduler."""
+        scheduler.add_job("mas_deadlines", self.check_deadlines, interval_s=3600, first_delay_s=10)
+        scheduler.add_job("calendar_alerts", self.check_calendar, interval_s=60, first_delay_s=60)
+        scheduler.add_job("daily_plan", self.daily_plan, interval_s=86400, first_delay_s=600)
+
+    async def _target(self) -> tuple[str, str] | None:
+        """The most recently active Telegram chat, if any."""
+        sessions = await self.session_index.get()
+        if not sessions:
+            return None
+        channel, chat_id = sessions[0]["key"].split(":", 1)
+        return channel, chat_id
+
+    async def _alert(self, target: tuple[str, str], content: str) -> None:
+        channel, chat_id = target
+        await self.bus.publish_inbound(InboundMessage(
+            channel=channel, sender_id="system", chat_id=chat_id, content=content,
+        ))
+
+    async def check_deadlines(self) -> float | None:
+        """Nudge the Tamer about MAS exams (7 days out) and assignments (3 days out)."""
+        target = await self._target()
+        if not target:
+            return 300
+        tasks = await self.deadlines.get()
+        if tasks is None:
+            return 3600  # Notion not configured
+
+        now = datetime.now(timezone.utc)
+        for t in tasks:
+            if not t["due_date"]:
+                continue
+            try:
+                due_str = t["due_date"]
+                if len(due_str) == 10:  # YYYY-MM-DD
+                    due = datetime.strptime(due_str, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+                else:
+                    due = datetime.fromisoformat(due_str.replace("Z", "+00:00"))
+            except Exception:
+                continue
+
+            days_left = (due - now).days
+            task_type = t["type"].lower()
+            is_urgent = (
+                (task_type == "exam" and 0 <= days_left <= 7)
+                or (task_type in ["assignment", "task"] and 0 <= days_left <= 3)
+            )
+            if not is_urgent:
+                continue
+            if not await asyncio.to_thread(_check_and_mark_mas_alert, t["id"], t["title"], t["type"]):
+                continue
+
+            clean_title = str(t["title"]).replace("{", "{{").replace("}", "}}")
+            logger.info("Triggering proactive MAS alert for {}", clean_title)
+            await self._alert(target, (
+                f"PROACTIVE SYSTEM ALERT: Look at my schedule, I have an upcoming {t['type']} called "
+                f"'{clean_title}' due on {t['due_date']} (in {days_left} days). Stop whatever you are doing "
+                f"and proactively act as my Study Guide! Break down what I need to do, ask me what topics I am "
+                f"weak at, and suggest we schedule focus blocks on the Calendar to prepare. Act like my smart "
+                f"Digimon partner urging me to success!"
+            ))
+            break  # Process one alert per run to avoid spam
+        return 3600
+
+    async def check_calendar(self) -> float | None:
+        """Alert when a time block starts within 5 minutes; sleep until the next one otherwise."""
+        target = await self._target()
+        if not target:
+            return 300
+        events = await self.calendar.get()
+
+        now = datetime.now(timezone.utc)
+        next_wake = self.calendar.expires_in or self.calendar.ttl_s
+        for e in events or []:
+            start = _event_start(e)
+            if start is None:
+                continue
+            seconds_until = (start - now).total_seconds()
+            if seconds_until < 0:
+                continue
+            if seconds_until > CALENDAR_ALERT_LEAD_S:
+                next_wake = min(next_wake, seconds_until - CALENDAR_ALERT_LEAD_S)
+                continue
+            if not await asyncio.to_thread(_check_and_mark_calendar_alert, e["id"], e.get("summary", "")):
+                continue
+
+            clean_summary = str(e.get("summary", "Unknown")).replace("{", "{{").replace("}", "}}")
+            logger.info("Triggering proactive Calendar alert for {}", clean_summary)
+            await self._alert(target, (
+                f"PROACTIVE SYSTEM ALERT: TAMER! A time block called '{clean_summary}' is starting in "
+                f"{int(seconds_until // 60)} minutes! This is your Combat Zone! Tell the Tamer to drop "
+                f"everything and FOCUS!"
+            ))
+            return 60  # One alert per run; look again shortly for overlapping blocks
+        return max(5.0, next_wake)
+
+    async def daily_plan(self) -> float | None:
+        """Once a day, ask the agent to propose a time-blocked schedule."""
+        target = await self._target()
+        if not target:
+            return 3600
+        logger.info("Triggering Daily Proactive Scheduler Routine")
+        await self._alert(target, (
+            "DAILY PROACTIVE ROUTINE: It is time to plan the day! Use your ListTasksTool and list_calendar "
+            "tools. Analyze my unscheduled tasks and upcoming Notion deadlines against my calendar free time. "
+            "Suggest a highly optimized time-blocking schedule for the next 24-48 hours. Ask me if you should "
+            "go ahead and use BlockTimeTool to lock these into my calendar!"
+        ))
+        return 86400
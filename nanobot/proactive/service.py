@@ -0,0 +1,132 @@
+"""Timer-heap scheduler and TTL-cached data sources for proactive jobs."""
+
+import asyncio
+import heapq
+import itertools
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Generic, TypeVar
+
+from loguru import logger
+
+T = TypeVar("T")
+
+
+class CachedSource(Generic[T]):
+    """
+    A blocking data source fetched at most once per TTL and shared by all jobs.
+
+    Concurrent callers wait for a single in-flight fetch instead of each
+    hitting the disk or API themselves.
+    """
+
+    def __init__(self, name: str, fetch: Callable[[], T], ttl_s: float):
+        self.name = name
+        self.ttl_s = ttl_s
+        self._fetch = fetch
+        self._value: T | None = None
+        self._fetched_at: float | None = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def expires_in(self) -> float:
+        """Seconds until the cached value goes stale (0 if it already is)."""
+        if self._fetched_at is None:
+            return 0.0
+        return max(0.0, self._fetched_at + self.ttl_s - time.monotonic())
+
+    async def get(self) -> T:
+        """Return the cached value, refetching it in a worker thread when stale."""
+        async with self._lock:
+            if self.expires_in <= 0:
+                self._value = await asyncio.to_thread(self._fetch)
+                self._fetched_at = time.monotonic()
+                logger.debug("Proactive source '{}' refreshed", self.name)
+            return self._value
+
+    def invalidate(self) -> None:
+        """Force the next get() to refetch."""
+        self._fetched_at = None
+
+
+@dataclass
+class ProactiveJob:
+    """A registered rule. run() returns seconds until its next run, or None for interval_s."""
+    name: str
+    run: Callable[[], Awaitable[float | None]]
+    interval_s: float
+
+
+class ProactiveScheduler:
+    """
+    Runs proactive jobs from a single timer heap.
+
+    The scheduler task sleeps until the earliest job is due, so nothing is
+    polled while no job needs to run. Each job decides its own next wake-up.
+    """
+
+    def __init__(self):
+        self._jobs: dict[str, ProactiveJob] = {}
+        self._heap: list[tuple[float, int, str]] = []
+        self._seq = itertools.count()
+        self._wake = asyncio.Event()
+        self._running = False
+        self._task: asyncio.Task | None = None
+
+    def add_job(
+        self,
+        name: str,
+        run: Callable[[], Awaitable[float | None]],
+        interval_s: float,
+        first_delay_s: float | None = None,
+    ) -> None:
+        """Register a job; it first runs after first_delay_s (default: interval_s)."""
+        self._jobs[name] = ProactiveJob(name=name, run=run, interval_s=interval_s)
+        self._schedule(name, interval_s if first_delay_s is None else first_delay_s)
+
+    def next_run_in(self, name: str) -> float | None:
+        """Seconds until a job's next run (None if unknown)."""
+        due = next((d for d, _, n in self._heap if n == name), None)
+        return None if due is None else max(0.0, due - time.monotonic())
+
+    def _schedule(self, name: str, delay_s: float) -> None:
+        heapq.heappush(self._heap, (time.monotonic() + max(0.0, delay_s), next(self._seq), name))
+        self._wake.set()
+
+    async def start(self) -> None:
+        """Start the scheduler task."""
+        self._running = True
+        self._task = asyncio.create_task(self._run_loop())
+        logger.info("Proactive scheduler started with {} jobs", len(self._jobs))
+
+    def stop(self) -> None:
+        """Stop the scheduler task."""
+        self._running = False
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _run_loop(self) -> None:
+        while self._running:
+            self._wake.clear()
+            if not self._heap:
+                await self._wake.wait()
+                continue
+            due, _, name = self._heap[0]
+            delay = due - time.monotonic()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            heapq.heappop(self._heap)
+            await self._run_job(self._jobs[name])
+
+    async def _run_job(self, job: ProactiveJob) -> None:
+        try:
+            next_delay = await job.run()
+        except Exception as e:
+            logger.error("Proactive job '{}' failed: {}", job.name, e)
+            next_delay = None
+        self._schedule(job.name, job.interval_s if next_delay is None else next_delay)
@@ -2,7 +2,9 @@
 
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
-from typing import Any
+from typing import Any, AsyncIterator
+
+import json_repair
 
 
 @dataclass
@@ -28,6 +30,91 @@ class LLMResponse:
         return len(self.tool_calls) > 0
 
 
+def parse_usage(u: Any) -> dict[str, int]:
+    """
+    Normalize an OpenAI-style usage object into a plain dict.
+
+    Prompt-cache counters are reported as cache_read_tokens (OpenAI
+    prompt_tokens_details.cached_tokens, Anthropic cache_read_input_tokens) and
+    cache_write_tokens (Anthropic cache_creation_input_tokens) when present.
+    """
+    usage = {
+        "prompt_tokens": getattr(u, "prompt_tokens", None) or 0,
+        "completion_tokens": getattr(u, "completion_tokens", None) or 0,
+        "total_tokens": getattr(u, "total_tokens", None) or 0,
+    }
+    details = getattr(u, "prompt_tokens_details", None)
+    cache_read = getattr(u, "cache_read_input_tokens", None) or getattr(details, "cached_tokens", None)
+    cache_write = getattr(u, "cache_creation_input_tokens", None)
+    if isinstance(cache_read, int) and cache_read:
+        usage["cache_read_tokens"] = cache_read
+    if isinstance(cache_write, int) and cache_write:
+        usage["cache_write_tokens"] = cache_write
+    return usage
+
+
+@dataclass
+class LLMStreamChunk:
+    """One event of a streamed completion: a text delta, or the final assembled response."""
+    delta: str = ""
+    response: LLMResponse | None = None  # Set only on the last chunk
+
+
+class StreamAccumulator:
+    """Assembles OpenAI-style chat completion stream chunks into an LLMResponse."""
+
+    def __init__(self):
+        self.content = ""
+        self.reasoning_content = ""
+        self.finish_reason = "stop"
+        self.usage: dict[str, int] = {}
+        self._tool_calls: dict[int, dict[str, str]] = {}
+
+    def add(self, chunk: Any) -> str:
+        """Fold one chunk into the response; return its text delta."""
+        if getattr(chunk, "usage", None):
+            self.usage = parse_usage(chunk.usage)
+        if not getattr(chunk, "choices", None):
+            return ""
+        choice = chunk.choices[0]
+        if choice.finish_reason:
+            self.finish_reason = choice.finish_reason
+        delta = choice.delta
+        if delta is None:
+            return ""
+        if reasoning := getattr(delta, "reasoning_content", None):
+            self.reasoning_content += reasoning
+        for tc in getattr(delta, "tool_calls", None) or []:
+            buf = self._tool_calls.setdefault(tc.index or 0, {"id": "", "name": "", "arguments": ""})
+            if tc.id:
+                buf["id"] = tc.id
+            if tc.function and tc.function.name:
+                buf["name"] += tc.function.name
+            if tc.function and tc.function.arguments:
+                buf["arguments"] += tc.function.arguments
+        text = delta.content or ""
+        self.content += text
+        return text
+
+    def build(self) -> LLMResponse:
+        """Return the assembled response."""
+        tool_calls = [
+            ToolCallRequest(
+                id=buf["id"],
+                name=buf["name"],
+                arguments=json_repair.loads(buf["arguments"]) if buf["arguments"] else {},
+            )
+            for _, buf in sorted(self._tool_calls.items())
+        ]
+        return LLMResponse(
+            content=self.content or None,
+            tool_calls=tool_calls,
+            finish_reason=self.finish_reason,
+            usage=self.usage,
+            reasoning_content=self.reasoning_content or None,
+        )
+
+
 class LLMProvider(ABC):
     """
     Abstract base class for LLM providers.
@@ -63,6 +150,26 @@ class LLMProvider(ABC):
             LLMResponse with content and/or tool calls.
         """
         pass
+
+    async def chat_stream(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> AsyncIterator[LLMStreamChunk]:
+        """
+        Stream a chat completion request.
+
+        Yields text deltas as they arrive, then one final chunk carrying the
+        assembled LLMResponse (including tool calls). Providers without native
+        streaming fall back to a single ``chat`` call.
+        """
+        response = await self.chat(messages, tools, model, max_tokens, temperature)
+        if response.content:
+            yield LLMStreamChunk(delta=response.content)
+        yield LLMStreamChunk(response=response)
     
     @abstractmethod
     def get_default_model(self) -> str:
@@ -1,5 +1,7 @@
 """Session management module."""
 
+from nanobot.session.index import SessionIndex
 from nanobot.session.manager import SessionManager, Session
+from nanobot.session.sqlite import SQLiteSessionManager
 
-__all__ = ["SessionManager", "Session"]
+__all__ = ["SessionManager", "Session", "SessionIndex", "SQLiteSessionManager"]
@@ -0,0 +1,121 @@
+"""Persistent index of session files, kept in SQLite next to them."""
+
+import sqlite3
+import threading
+from collections.abc import Callable, Iterable
+from pathlib import Path
+from typing import Any
+
+from loguru import logger
+
+_COLUMNS = ("key", "channel", "created_at", "updated_at", "message_count", "bytes", "path")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    key TEXT PRIMARY KEY,
+    channel TEXT NOT NULL,
+    created_at TEXT,
+    updated_at TEXT,
+    message_count INTEGER,
+    bytes INTEGER,
+    path TEXT
+);
+CREATE INDEX IF NOT EXISTS sessions_recency ON sessions (channel, updated_at);
+CREATE INDEX IF NOT EXISTS sessions_updated ON sessions (updated_at);
+"""
+
+
+class SessionIndex:
+    """
+    One row per session: key, channel, timestamps, message count and file size.
+
+    Rows are upserted on every save, so listing sessions is a single query
+    instead of opening every session file. The index keeps one connection
+    open in WAL mode with synchronous=NORMAL, so an upsert does not cost a
+    journal fsync per turn; it is only derived data and can be rebuilt. If
+    the database file is missing it is recreated from ``scan``, which
+    yields the rows for the files on disk.
+    """
+
+    def __init__(self, path: Path, scan: Callable[[], Iterable[dict[str, Any]]]):
+        self.path = path
+        self._scan = scan
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """The shared connection, reopened (and the index rebuilt) if the file went away."""
+        if self._conn is not None and self.path.exists():
+            return self._conn
+        self.close()
+        missing = not self.path.exists()
+        if missing:
+            for suffix in ("-wal", "-shm"):  # Leftovers of a deleted index must not be replayed
+                self.path.with_name(self.path.name + suffix).unlink(missing_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        if missing:
+            conn.executescript(_SCHEMA)
+            rows = list(self._scan())
+            with conn:
+                conn.executemany(self._upsert_sql(), [self._row(r) for r in rows])
+            logger.info("Rebuilt session index with {} sessions", len(rows))
+        self._conn = conn
+        return conn
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    @staticmethod
+    def _upsert_sql() -> str:
+        return f"INSERT OR REPLACE INTO sessions ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})"
+
+    @staticmethod
+    def _row(entry: dict[str, Any]) -> tuple:
+        channel = entry.get("channel") or entry["key"].split(":", 1)[0]
+        return (entry["key"], channel, *(entry.get(c) for c in _COLUMNS[2:]))
+
+    def upsert(self, entry: dict[str, Any]) -> None:
+        """Insert or update the row for one session."""
+        self.upsert_many([entry])
+
+    def upsert_many(self, entries: Iterable[dict[str, Any]]) -> None:
+        """Insert or update several rows in one transaction."""
+        rows = [self._row(e) for e in entries]
+        if not rows:
+            return
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany(self._upsert_sql(), rows)
+
+    def remove(self, key: str) -> None:
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("DELETE FROM sessions WHERE key = ?", (key,))
+
+    def query(self, channel: str | None = None, limit: int | None = None) -> list[dict[str, Any]]:
+        """Sessions, most recently updated first, optionally for one channel."""
+        sql = f"SELECT {', '.join(_COLUMNS)} FROM sessions"
+        params: list[Any] = []
+        if channel is not None:
+            sql += " WHERE channel = ?"
+            params.append(channel)
+        sql += " ORDER BY updated_at DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            return [dict(row) for row in self._connect().execute(sql, params)]
+
+    def rebuild(self) -> int:
+        """Drop the index and recreate it from the session files; returns the row count."""
+        with self._lock:
+            self.close()
+            self.path.unlink(missing_ok=True)
+            return self._connect().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
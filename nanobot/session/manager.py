@@ -1,14 +1,133 @@
 """Session management for conversation history."""
 
+import gzip
 import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Iterator, MutableSequence
 from pathlib import Path
 from dataclasses import dataclass, field
-from datetime import datetime
-from typing import Any
+from datetime import datetime, timedelta
+from typing import IO, Any
 
 from loguru import logger
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from nanobot.session.index import SessionIndex
 from nanobot.utils.helpers import ensure_dir, safe_filename
+from nanobot.utils.tokens import estimate_message_tokens
+
+
+class SessionStoreBusyError(RuntimeError):
+    """The session store is held by another process (see SessionManager.hold)."""
+
+
+def _try_lock(f: IO) -> bool:
+    """Take a non-blocking exclusive lock on an open file; False if someone else has it."""
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+
+# Metadata records are written by json.dumps with "_type" as the first key, so
+# they can be told apart from messages without parsing the line.
+_METADATA_PREFIX = '{"_type": "metadata"'
+
+
+class MessageLog(MutableSequence):
+    """
+    Session messages whose older part stays on disk until it is accessed.
+
+    Holds messages [base, len) in memory; indexing or slicing below base loads
+    the missing range through ``load_range(start, stop)`` first. Appends and
+    tail slices (what get_history uses) never touch the file.
+    """
+
+    def __init__(
+        self,
+        tail: list[dict[str, Any]],
+        base: int = 0,
+        load_range: Callable[[int, int], list[dict[str, Any]]] | None = None,
+    ):
+        self._tail = tail
+        self._base = base
+        self._load_range = load_range
+
+    @property
+    def loaded_from(self) -> int:
+        """Index of the oldest message held in memory."""
+        return self._base
+
+    def _ensure(self, start: int) -> None:
+        if start >= self._base:
+            return
+        older = self._load_range(start, self._base) if self._load_range else []
+        if len(older) != self._base - start:
+            raise RuntimeError(f"Session file changed on disk: expected {self._base - start} messages, read {len(older)}")
+        self._tail[:0] = older
+        self._base = start
+
+    def __len__(self) -> int:
+        return self._base + len(self._tail)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                self._ensure(0)
+                return self._tail[index]
+            if start >= stop:
+                return []
+            self._ensure(start)
+            return self._tail[start - self._base:stop - self._base]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("message index out of range")
+        self._ensure(index)
+        return self._tail[index - self._base]
+
+    def __setitem__(self, index, value) -> None:
+        self._ensure(0)
+        self._tail[index] = value
+
+    def __delitem__(self, index) -> None:
+        self._ensure(0)
+        del self._tail[index]
+
+    def insert(self, index: int, value: dict[str, Any]) -> None:
+        self._ensure(0)
+        self._tail.insert(index, value)
+
+    def append(self, value: dict[str, Any]) -> None:
+        self._tail.append(value)
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        self._ensure(0)
+        return iter(self._tail)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (list, MessageLog)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def copy(self) -> list[dict[str, Any]]:
+        return list(self)
+
+    def __repr__(self) -> str:
+        return f"MessageLog(len={len(self)}, loaded_from={self._base})"
 
 
 @dataclass
@@ -29,6 +148,19 @@ class Session:
     updated_at: datetime = field(default_factory=datetime.now)
     metadata: dict[str, Any] = field(default_factory=dict)
     last_consolidated: int = 0  # Number of messages already consolidated to files
+    # Persistence bookkeeping (see SessionManager.save)
+    _persisted: int = field(default=0, init=False, repr=False, compare=False)  # Messages already on disk
+    _trailers: int = field(default=0, init=False, repr=False, compare=False)  # Metadata records since last rewrite
+    _rewrite: bool = field(default=False, init=False, repr=False, compare=False)  # History changed, append won't do
+    _saved_consolidated: int = field(default=0, init=False, repr=False, compare=False)  # last_consolidated on disk
+    # Cache size accounting (see _approx_session_bytes): messages [start, count) of list `mark` are counted
+    _size_mark: tuple[int, int] = field(default=(0, 0), init=False, repr=False, compare=False)
+    _size_count: int = field(default=0, init=False, repr=False, compare=False)
+    _size: int = field(default=0, init=False, repr=False, compare=False)
+    # Token estimates by id(message), kept off the message dicts so they are never persisted
+    _token_counts: dict[int, tuple[dict[str, Any], int]] = field(
+        default_factory=dict, init=False, repr=False, compare=False,
+    )
     
     def add_message(self, role: str, content: str, **kwargs: Any) -> None:
         """Add a message to the session."""
@@ -41,42 +173,125 @@ class Session:
         self.messages.append(msg)
         self.updated_at = datetime.now()
     
-    def get_history(self, max_messages: int = 500) -> list[dict[str, Any]]:
-        """Get recent messages in LLM format, preserving tool metadata."""
+    def get_history(self, max_messages: int = 500, max_tokens: int | None = None) -> list[dict[str, Any]]:
+        """
+        Get recent messages in LLM format, preserving tool metadata.
+
+        With max_tokens, messages are taken newest first until the estimated
+        token budget is spent. An assistant tool_calls message and its tool
+        results are kept or dropped together, and the history never starts
+        with an orphaned tool result.
+        """
+        recent = self.messages[-max_messages:]
+        groups: list[list[dict[str, Any]]] = []
+        group: list[dict[str, Any]] = []
+        for m in reversed(recent):
+            group.insert(0, m)
+            if m["role"] != "tool":
+                groups.append(group)
+                group = []
+        # Leftover tool results whose assistant call fell outside the window are dropped.
+
+        selected: list[dict[str, Any]] = []
+        used = 0
+        for group in groups:
+            if max_tokens is not None:
+                cost = sum(self._message_tokens(m) for m in group)
+                if used + cost > max_tokens:
+                    break
+                used += cost
+            selected[:0] = group
+
         out: list[dict[str, Any]] = []
-        for m in self.messages[-max_messages:]:
+        for m in selected:
             entry: dict[str, Any] = {"role": m["role"], "content": m.get("content", "")}
             for k in ("tool_calls", "tool_call_id", "name"):
                 if k in m:
                     entry[k] = m[k]
             out.append(entry)
+        if len(self._token_counts) > 2 * len(recent):
+            live = {id(m) for m in recent}
+            self._token_counts = {k: v for k, v in self._token_counts.items() if k in live}
         return out
+
+    def _message_tokens(self, msg: dict[str, Any]) -> int:
+        """Token estimate of a message, computed once per message."""
+        cached = self._token_counts.get(id(msg))
+        if cached is not None and cached[0] is msg:  # The message is held, so its id cannot be reused
+            return cached[1]
+        tokens = estimate_message_tokens(msg)
+        self._token_counts[id(msg)] = (msg, tokens)
+        return tokens
     
     def clear(self) -> None:
         """Clear all messages and reset session to initial state."""
         self.messages = []
         self.last_consolidated = 0
         self.updated_at = datetime.now()
+        self._rewrite = True
 
 
 class SessionManager:
     """
     Manages conversation sessions.
 
-    Sessions are stored as JSONL files in the sessions directory.
+    Sessions are stored as JSONL files in the sessions directory. Files are
+    append-only: a save writes only the messages added since the last save,
+    followed by a metadata record, and the latest metadata record wins on
+    load. Once a file has accumulated COMPACT_AFTER metadata records it is
+    compacted, i.e. rewritten as one metadata line plus the messages.
+
+    Loading reads the file backwards and keeps only the last TAIL_MESSAGES
+    messages in memory, so opening a long-lived chat costs the same as a
+    new one; older messages are read from disk when something indexes them.
+
+    Loaded sessions are kept in an LRU cache bounded by max_cached sessions
+    and max_cache_bytes (an estimate of the in-memory messages). Evicted
+    sessions with unsaved changes are saved before they are dropped.
+
+    Besides save(), which writes immediately, sessions can be queued with
+    mark_dirty() and written in one batch by flush() (write-behind).
+
+    Sessions idle for a while can be moved to a gzip archive tier with
+    archive_idle(); get_or_create decompresses them back on first access.
+    A process that keeps sessions in memory (the agent loop) hold()s the
+    store, and archive_idle() refuses to run in any other process meanwhile.
     """
 
-    def __init__(self, workspace: Path):
+    COMPACT_AFTER = 64
+    TAIL_MESSAGES = 500  # Messages loaded up front; older ones are read on demand
+
+    def __init__(self, workspace: Path, max_cached: int = 256, max_cache_bytes: int = 64 * 1024 * 1024):
         self.workspace = workspace
         self.sessions_dir = ensure_dir(self.workspace / "sessions")
         self.legacy_sessions_dir = Path.home() / ".nanobot" / "sessions"
-        self._cache: dict[str, Session] = {}
+        self.archive_dir = self.sessions_dir / "archive"
+        self.max_cached = max_cached
+        self.max_cache_bytes = max_cache_bytes
+        self._cache: OrderedDict[str, Session] = OrderedDict()
+        self._cache_sizes: dict[str, int] = {}
+        self._cache_bytes = 0
+        self.cache_stats = {"hits": 0, "misses": 0, "evictions": 0}
+        self._lock = threading.RLock()  # Guards the cache; sessions are loaded and saved from worker threads
+        self._write_lock = threading.RLock()  # Serializes writes of session files
+        # Marked for the next flush. Its lock is only held for dict updates, so
+        # mark_dirty() is safe to call from the event loop.
+        self._dirty: dict[str, Session] = {}
+        self._dirty_lock = threading.Lock()
+        self._loading: set[str] = set()  # Keys being loaded; archive_idle leaves them alone
+        self._store_lock: IO | None = None  # Lock file while this manager holds the store
+        self.index = SessionIndex(self.sessions_dir / "index.sqlite3", self._scan_sessions)
     
     def _get_session_path(self, key: str) -> Path:
         """Get the file path for a session."""
         safe_key = safe_filename(key.replace(":", "_"))
         return self.sessions_dir / f"{safe_key}.jsonl"
 
+    def _get_archive_path(self, key: str) -> Path:
+        """Compressed path of an archived (cold) session."""
+        safe_key = safe_filename(key.replace(":", "_"))
+        return self.archive_dir / f"{safe_key}.jsonl.gz"
+
     def _get_legacy_session_path(self, key: str) -> Path:
         """Legacy global session path (~/.nanobot/sessions/)."""
         safe_key = safe_filename(key.replace(":", "_"))
@@ -92,109 +307,562 @@ class SessionManager:
         Returns:
             The session.
         """
-        if key in self._cache:
-            return self._cache[key]
-        
-        session = self._load(key)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.cache_stats["hits"] += 1
+                return self._cache[key]
+            self.cache_stats["misses"] += 1
+            self._loading.add(key)
+
+        try:
+            session = self._load(key)
+        finally:
+            with self._lock:
+                self._loading.discard(key)
         if session is None:
             session = Session(key=key)
-        
-        self._cache[key] = session
+
+        with self._lock:
+            if key in self._cache:  # Loaded concurrently by another thread
+                return self._cache[key]
+            self._cache_put(session)
         return session
+
+    def _cache_put(self, session: Session) -> None:
+        """Insert or refresh a session in the LRU cache, evicting the least recently used."""
+        key = session.key
+        self._cache[key] = session
+        self._cache.move_to_end(key)
+        size = _approx_session_bytes(session)
+        self._cache_bytes += size - self._cache_sizes.get(key, 0)
+        self._cache_sizes[key] = size
+
+        while len(self._cache) > 1 and (
+            len(self._cache) > self.max_cached or self._cache_bytes > self.max_cache_bytes
+        ):
+            old_key, old = next(iter(self._cache.items()))
+            if self.is_dirty(old):
+                self._write(old)
+            with self._dirty_lock:
+                self._dirty.pop(old_key, None)
+            self._drop(old_key)
+            self.cache_stats["evictions"] += 1
+            logger.debug("Evicted session {} from cache", old_key)
+
+    def _drop(self, key: str) -> None:
+        self._cache.pop(key, None)
+        self._cache_bytes -= self._cache_sizes.pop(key, 0)
+
+    @staticmethod
+    def is_dirty(session: Session) -> bool:
+        """Whether the session has changes that are not on disk yet."""
+        return (session._rewrite or session._persisted != len(session.messages)
+                or session._saved_consolidated != session.last_consolidated)
+
+    @property
+    def cache_info(self) -> dict[str, int]:
+        """Cache counters plus the current number of sessions and estimated bytes."""
+        return {**self.cache_stats, "sessions": len(self._cache), "bytes": self._cache_bytes}
     
     def _load(self, key: str) -> Session | None:
         """Load a session from disk."""
         path = self._get_session_path(key)
+        moved = False
         if not path.exists():
-            legacy_path = self._get_legacy_session_path(key)
-            if legacy_path.exists():
-                import shutil
-                shutil.move(str(legacy_path), str(path))
-                logger.info("Migrated session {} from legacy path", key)
+            # Under the lock, so this cannot overlap archive_idle moving the same file
+            with self._lock:
+                moved = not path.exists() and self._bring_back(key, path)
 
         if not path.exists():
             return None
 
         try:
-            messages = []
-            metadata = {}
-            created_at = None
-            last_consolidated = 0
+            session = self._load_tail(key, path) or self._load_full(key, path)
+        except Exception as e:
+            logger.warning("Failed to load session {}: {}", key, e)
+            return None
+        if moved:
+            self._update_index(session)  # The row still points at the old location
+        return session
 
-            with open(path, encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
+    def _bring_back(self, key: str, path: Path) -> bool:
+        """Move a session from the legacy directory or the archive to path; False if neither has it."""
+        legacy_path = self._get_legacy_session_path(key)
+        archive_path = self._get_archive_path(key)
+        if legacy_path.exists():
+            shutil.move(str(legacy_path), str(path))
+            logger.info("Migrated session {} from legacy path", key)
+            return True
+        if archive_path.exists():
+            self._restore(archive_path, path)
+            logger.info("Restored session {} from archive", key)
+            return True
+        return False
 
-                    data = json.loads(line)
+    def _load_tail(self, key: str, path: Path) -> Session | None:
+        """
+        Load the latest metadata record and the last TAIL_MESSAGES messages,
+        reading the file backwards from the end. Older messages are read on
+        demand through iter_messages. Returns None for files whose metadata
+        does not carry a message count (written before append-only saves).
+        """
+        meta: dict[str, Any] | None = None
+        unsealed: list[dict[str, Any]] = []  # Appended after the latest metadata record, newest first
+        tail: list[dict[str, Any]] = []  # Covered by the latest metadata record, newest first
+        trailers = 0
+        corrupt = False
+        complete = True
 
-                    if data.get("_type") == "metadata":
-                        metadata = data.get("metadata", {})
-                        created_at = datetime.fromisoformat(data["created_at"]) if data.get("created_at") else None
-                        last_consolidated = data.get("last_consolidated", 0)
-                    else:
-                        messages.append(data)
-
-            return Session(
-                key=key,
-                messages=messages,
-                created_at=created_at or datetime.now(),
-                metadata=metadata,
-                last_consolidated=last_consolidated
-            )
-        except Exception as e:
-            logger.warning("Failed to load session {}: {}", key, e)
+        for line in _reverse_lines(path):
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith(_METADATA_PREFIX):
+                trailers += 1
+                if meta is None:
+                    meta = json.loads(line)
+                    if "message_count" not in meta:
+                        return None
+                continue
+            msg = _parse_message_line(line)
+            if msg is None:
+                # A torn line from a crash mid-append; compact it away on the next save
+                logger.warning("Skipping corrupt line in session {}", key)
+                corrupt = True
+                continue
+            (unsealed if meta is None else tail).append(msg)
+            if meta is not None and len(tail) + len(unsealed) >= self.TAIL_MESSAGES:
+                complete = False
+                break
+
+        if meta is None:
+            return None
+        base = 0 if complete else meta["message_count"] - len(tail)
+        if base < 0:
             return None
+        tail.reverse()
+        unsealed.reverse()
+        messages = MessageLog(
+            tail + unsealed, base,
+            lambda start, stop: list(self.iter_messages(key, start, stop)),
+        )
+
+        session = self._session_from_metadata(key, meta, messages)
+        session._saved_consolidated = session.last_consolidated
+        session._persisted = len(messages)
+        session._trailers = trailers
+        session._rewrite = corrupt
+        return session
+
+    def _load_full(self, key: str, path: Path) -> Session:
+        """Parse every line of a session file (plain or archived)."""
+        messages = []
+        meta: dict[str, Any] = {}
+        trailers = 0
+        corrupt = False
+
+        opener = gzip.open if path.suffix == ".gz" else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                if line.startswith(_METADATA_PREFIX):
+                    meta = json.loads(line)
+                    trailers += 1
+                    continue
+                try:
+                    data = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn final line from a crash mid-append; everything before it is intact
+                    logger.warning("Skipping corrupt line in session {}", key)
+                    corrupt = True
+                    continue
+                if data.get("_type") == "metadata":
+                    meta = data
+                    trailers += 1
+                else:
+                    messages.append(data)
+
+        session = self._session_from_metadata(key, meta, messages)
+        session._saved_consolidated = session.last_consolidated
+        session._persisted = len(messages)
+        session._trailers = trailers
+        session._rewrite = corrupt
+        return session
+
+    @staticmethod
+    def _session_from_metadata(key: str, meta: dict[str, Any], messages: list[dict[str, Any]] | MessageLog) -> Session:
+        return Session(
+            key=key,
+            messages=messages,
+            created_at=datetime.fromisoformat(meta["created_at"]) if meta.get("created_at") else datetime.now(),
+            metadata=meta.get("metadata", {}),
+            last_consolidated=meta.get("last_consolidated", 0),
+        )
+
+    def iter_messages(self, key: str, start: int = 0, stop: int | None = None) -> Iterator[dict[str, Any]]:
+        """
+        Cursor over the persisted messages [start, stop) of a session.
+
+        Lines before start are counted but not parsed.
+        """
+        for line in self._message_lines(self._get_session_path(key), start, stop):
+            yield json.loads(line)
+
+    @staticmethod
+    def _message_lines(path: Path, start: int = 0, stop: int | None = None) -> Iterator[str]:
+        if not path.exists():
+            return
+        index = 0
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith(_METADATA_PREFIX) or not line.endswith("}"):
+                    continue
+                if stop is not None and index >= stop:
+                    return
+                if index >= start:
+                    yield line
+                index += 1
     
     def save(self, session: Session) -> None:
-        """Save a session to disk."""
+        """
+        Save a session to disk.
+
+        Appends the messages added since the last save plus a metadata record,
+        so the cost does not depend on the length of the conversation. Falls
+        back to a full rewrite when the history was cleared or the file is due
+        for compaction.
+        """
+        with self._dirty_lock:
+            self._dirty.pop(session.key, None)
+        with self._lock:
+            self._write(session)
+            self._cache_put(session)
+
+    def mark_dirty(self, session: Session) -> None:
+        """
+        Queue a session to be written by the next flush() instead of now.
+
+        Only records the session, without disk I/O or waiting on a flush in
+        progress, so it can be called from the event loop.
+        """
+        with self._dirty_lock:
+            self._dirty[session.key] = session
+
+    def flush(self) -> int:
+        """Write every session queued by mark_dirty(); returns how many were written."""
+        with self._dirty_lock:
+            pending, self._dirty = self._dirty, {}
+        if not pending:
+            return 0
+        written = []
+        for session in pending.values():
+            try:
+                self._write(session, index=False)
+                written.append(session)
+            except Exception as e:
+                logger.error("Failed to save session {}: {}", session.key, e)
+                self._requeue(session)
+        self._update_index(*written)  # One index transaction for the whole batch
+        self._refresh_cached(written)
+        return len(written)
+
+    def _requeue(self, session: Session) -> None:
+        with self._dirty_lock:
+            self._dirty.setdefault(session.key, session)
+
+    def _refresh_cached(self, sessions: list[Session]) -> None:
+        """Update the cache size of flushed sessions (which may evict others)."""
+        with self._lock:
+            for session in sessions:
+                if self._cache.get(session.key) is session:
+                    self._cache_put(session)
+
+    def _write(self, session: Session, index: bool = True) -> None:
+        with self._write_lock:
+            self._write_file(session, index)
+
+    def _write_file(self, session: Session, index: bool) -> None:
         path = self._get_session_path(session.key)
+        # Snapshot first: with write-behind, the turn may keep appending while this runs in a thread
+        count, consolidated = len(session.messages), session.last_consolidated
+        if (session._rewrite or session._persisted > count
+                or session._trailers >= self.COMPACT_AFTER or not path.exists()):
+            self._rewrite(path, session, count)
+        else:
+            with open(path, "a", encoding="utf-8") as f:
+                for msg in session.messages[session._persisted:count]:
+                    f.write(json.dumps(msg, ensure_ascii=False) + "\n")
+                f.write(json.dumps(self._metadata_record(session, count), ensure_ascii=False) + "\n")
+            session._trailers += 1
+        session._persisted = count
+        session._saved_consolidated = consolidated
+        if index:
+            self._update_index(session)
+
+    def compact(self, session: Session) -> None:
+        """Rewrite a session file as one metadata line followed by its messages."""
+        with self._lock, self._write_lock:
+            count = len(session.messages)
+            self._rewrite(self._get_session_path(session.key), session, count)
+            session._persisted = count
+            session._saved_consolidated = session.last_consolidated
 
-        with open(path, "w", encoding="utf-8") as f:
-            metadata_line = {
-                "_type": "metadata",
-                "key": session.key,
-                "created_at": session.created_at.isoformat(),
-                "updated_at": session.updated_at.isoformat(),
-                "metadata": session.metadata,
-                "last_consolidated": session.last_consolidated
-            }
-            f.write(json.dumps(metadata_line, ensure_ascii=False) + "\n")
-            for msg in session.messages:
+    def _rewrite(self, path: Path, session: Session, count: int) -> None:
+        tmp = path.with_suffix(".jsonl.tmp")
+        messages = session.messages
+        on_disk = 0
+        if isinstance(messages, MessageLog) and path.exists():
+            on_disk = messages.loaded_from  # Copied line by line instead of loaded
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(json.dumps(self._metadata_record(session, count), ensure_ascii=False) + "\n")
+            for line in self._message_lines(path, 0, on_disk) if on_disk else ():
+                f.write(line + "\n")
+            for msg in messages[on_disk:count]:
                 f.write(json.dumps(msg, ensure_ascii=False) + "\n")
+        os.replace(tmp, path)
+        session._trailers = 1
+        session._rewrite = False
 
-        self._cache[session.key] = session
+    @staticmethod
+    def _metadata_record(session: Session, count: int) -> dict[str, Any]:
+        return {
+            "_type": "metadata",
+            "key": session.key,
+            "created_at": session.created_at.isoformat(),
+            "updated_at": session.updated_at.isoformat(),
+            "metadata": session.metadata,
+            "last_consolidated": session.last_consolidated,
+            "message_count": count,
+        }
     
     def invalidate(self, key: str) -> None:
-        """Remove a session from the in-memory cache."""
-        self._cache.pop(key, None)
+        """Remove a session from the in-memory cache, writing it first if a flush is pending."""
+        with self._dirty_lock:
+            session = self._dirty.pop(key, None)
+        with self._lock:
+            if session is not None:
+                self._write(session)
+            self._drop(key)
     
-    def list_sessions(self) -> list[dict[str, Any]]:
+    def hold(self) -> bool:
         """
-        List all sessions.
-        
+        Claim the session store for this process until release() or exit.
+
+        Sessions cached here are only known to this process, so while it
+        holds the store other processes (`nanobot sessions archive`) must not
+        archive them. Returns False if another process holds it already.
+        """
+        if self._store_lock is not None:
+            return True
+        f = open(self.sessions_dir / ".lock", "a+")
+        if not _try_lock(f):
+            f.close()
+            return False
+        self._store_lock = f
+        return True
+
+    def release(self) -> None:
+        """Give up the store claimed by hold()."""
+        if self._store_lock is not None:
+            self._store_lock.close()
+            self._store_lock = None
+
+    def archive_idle(self, idle_days: float) -> dict[str, int]:
+        """
+        Gzip sessions not updated for idle_days into the archive tier, along
+        with every session still in the legacy ~/.nanobot/sessions directory.
+
+        Returns the number of sessions archived and their size before and after.
+        Raises SessionStoreBusyError if another process holds the store.
+        """
+        held = self._store_lock is not None
+        if not self.hold():
+            raise SessionStoreBusyError(f"Sessions in {self.sessions_dir} are in use by another nanobot process")
+        try:
+            return self._archive_idle(idle_days)
+        finally:
+            if not held:
+                self.release()
+
+    def _archive_idle(self, idle_days: float) -> dict[str, int]:
+        cutoff = (datetime.now() - timedelta(days=idle_days)).isoformat()
+        stats = {"sessions": 0, "bytes_before": 0, "bytes_after": 0}
+
+        def archive(src: Path, dest: Path) -> None:
+            before = src.stat().st_size
+            self._compress(src, dest)
+            stats["sessions"] += 1
+            stats["bytes_before"] += before
+            stats["bytes_after"] += dest.stat().st_size
+
+        for row in self.index.query():
+            path = Path(row["path"])
+            if row["updated_at"] >= cutoff or path.suffix != ".jsonl" or not path.exists():
+                continue
+            with self._lock:
+                if row["key"] in self._cache or row["key"] in self._loading:
+                    continue  # In use
+                dest = self._get_archive_path(row["key"])
+                archive(path, dest)
+                self.index.upsert({**row, "bytes": dest.stat().st_size, "path": str(dest)})
+
+        legacy_moved = 0
+        if self.legacy_sessions_dir.exists():
+            for legacy in self.legacy_sessions_dir.glob("*.jsonl"):
+                dest = self.archive_dir / f"{legacy.name}.gz"
+                if (self.sessions_dir / legacy.name).exists() or dest.exists():
+                    continue
+                archive(legacy, dest)
+                legacy_moved += 1
+        if legacy_moved:
+            self.index.rebuild()  # Legacy files were never indexed
+
+        if stats["sessions"]:
+            logger.info("Archived {} sessions ({} -> {} bytes)", stats["sessions"], stats["bytes_before"], stats["bytes_after"])
+        return stats
+
+    def _compress(self, src: Path, dest: Path) -> None:
+        ensure_dir(dest.parent)
+        tmp = dest.with_suffix(".gz.tmp")
+        with open(src, "rb") as f_in, gzip.open(tmp, "wb") as f_out:
+            shutil.copyfileobj(f_in, f_out)
+        os.replace(tmp, dest)
+        src.unlink()
+
+    @staticmethod
+    def _restore(archive_path: Path, path: Path) -> None:
+        tmp = path.with_suffix(".jsonl.tmp")
+        with gzip.open(archive_path, "rb") as f_in, open(tmp, "wb") as f_out:
+            shutil.copyfileobj(f_in, f_out)
+        os.replace(tmp, path)
+        archive_path.unlink()
+
+    def _update_index(self, *sessions: Session) -> None:
+        """Upsert the index rows of sessions just written, in one transaction."""
+        if not sessions:
+            return
+        try:
+            entries = []
+            for session in sessions:
+                path = self._get_session_path(session.key)
+                entries.append({
+                    "key": session.key,
+                    "created_at": session.created_at.isoformat(),
+                    "updated_at": session.updated_at.isoformat(),
+                    "message_count": len(session.messages),
+                    "bytes": path.stat().st_size,
+                    "path": str(path),
+                })
+            self.index.upsert_many(entries)
+        except Exception as e:
+            logger.warning("Failed to update session index for {}: {}", ", ".join(s.key for s in sessions), e)
+
+    def list_sessions(self, channel: str | None = None, limit: int | None = None) -> list[dict[str, Any]]:
+        """
+        List sessions from the index, most recently updated first.
+
+        Args:
+            channel: Only sessions of this channel (e.g. "telegram").
+            limit: Return at most this many sessions.
+
         Returns:
             List of session info dicts.
         """
+        return self.index.query(channel=channel, limit=limit)
+
+    def _scan_sessions(self) -> list[dict[str, Any]]:
+        """Read index rows from the session files themselves (used to rebuild the index)."""
         sessions = []
         
-        for path in self.sessions_dir.glob("*.jsonl"):
+        for path in [*self.sessions_dir.glob("*.jsonl"), *self.archive_dir.glob("*.jsonl.gz")]:
             try:
-                # Read just the metadata line
-                with open(path, encoding="utf-8") as f:
-                    first_line = f.readline().strip()
-                    if first_line:
-                        data = json.loads(first_line)
-                        if data.get("_type") == "metadata":
-                            key = data.get("key") or path.stem.replace("_", ":", 1)
-                            sessions.append({
-                                "key": key,
-                                "created_at": data.get("created_at"),
-                                "updated_at": data.get("updated_at"),
-                                "path": str(path)
-                            })
+                if path.suffix == ".gz":
+                    # Archived files can only be read front to back; keep the last metadata line
+                    with gzip.open(path, "rt", encoding="utf-8") as f:
+                        line = ""
+                        for raw in f:
+                            if raw.startswith(_METADATA_PREFIX):
+                                line = raw
+                else:
+                    # The latest metadata record is the last line; legacy files only have the first
+                    line = _read_last_line(path)
+                    if not line.startswith(_METADATA_PREFIX):
+                        with open(path, encoding="utf-8") as f:
+                            line = f.readline()
+                data = json.loads(line)
+                if data.get("_type") == "metadata":
+                    key = data.get("key") or path.name.split(".jsonl")[0].replace("_", ":", 1)
+                    sessions.append({
+                        "key": key,
+                        "created_at": data.get("created_at"),
+                        "updated_at": data.get("updated_at"),
+                        "message_count": data.get("message_count"),
+                        "bytes": path.stat().st_size,
+                        "path": str(path)
+                    })
             except Exception:
                 continue
         
-        return sorted(sessions, key=lambda x: x.get("updated_at", ""), reverse=True)
+        return sessions
+
+
+def _approx_session_bytes(session: Session) -> int:
+    """
+    Rough size of the messages a session holds in memory.
+
+    Kept incrementally: only messages appended since the last call are
+    measured. A new message list (clear) or older messages loaded from disk
+    start the count over.
+    """
+    messages = session.messages
+    start = messages.loaded_from if isinstance(messages, MessageLog) else 0
+    count = len(messages)
+    mark = (id(messages), start)
+    if session._size_mark != mark or session._size_count > count:
+        session._size_mark, session._size_count, session._size = mark, start, 0
+    if count > session._size_count:
+        session._size += sum(_approx_message_bytes(m) for m in messages[session._size_count:count])
+        session._size_count = count
+    return session._size
+
+
+def _approx_message_bytes(msg: dict[str, Any]) -> int:
+    size = 240  # dict and per-key overhead
+    for value in msg.values():
+        size += len(value) if isinstance(value, str) else len(str(value))
+    return size
+
+
+def _parse_message_line(line: str) -> dict[str, Any] | None:
+    if not line.endswith("}"):
+        return None
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError:
+        return None
+
+
+def _reverse_lines(path: Path, block: int = 65536) -> Iterator[str]:
+    """Yield the lines of a file last to first, reading backwards from the end."""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        rest = b""
+        while pos > 0:
+            step = min(block, pos)
+            pos -= step
+            f.seek(pos)
+            lines = (f.read(step) + rest).split(b"\n")
+            rest = lines.pop(0)
+            for line in reversed(lines):
+                yield line.decode("utf-8")
+        yield rest.decode("utf-8")
+
+
+def _read_last_line(path: Path) -> str:
+    """Return the last non-empty line of a file, reading backwards from the end."""
+    return next((line.strip() for line in _reverse_lines(path) if line.strip()), "")
@@ -0,0 +1,215 @@
+"""SQLite storage backend for sessions."""
+
+import json
+import sqlite3
+import threading
+from collections.abc import Iterator
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from loguru import logger
+
+from nanobot.session.manager import MessageLog, Session, SessionManager
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    key TEXT PRIMARY KEY,
+    channel TEXT NOT NULL,
+    created_at TEXT,
+    updated_at TEXT,
+    metadata TEXT NOT NULL DEFAULT '{}',
+    last_consolidated INTEGER NOT NULL DEFAULT 0,
+    message_count INTEGER NOT NULL DEFAULT 0,
+    bytes INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS sessions_recency ON sessions (channel, updated_at);
+CREATE INDEX IF NOT EXISTS sessions_updated ON sessions (updated_at);
+CREATE TABLE IF NOT EXISTS messages (
+    session_key TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (session_key, seq)
+) WITHOUT ROWID;
+"""
+
+_UPSERT_SESSION = """
+INSERT INTO sessions (key, channel, created_at, updated_at, metadata, last_consolidated, message_count, bytes)
+VALUES (:key, :channel, :created_at, :updated_at, :metadata, :last_consolidated, :message_count, :bytes)
+ON CONFLICT (key) DO UPDATE SET
+    updated_at = excluded.updated_at,
+    metadata = excluded.metadata,
+    last_consolidated = excluded.last_consolidated,
+    message_count = excluded.message_count,
+    bytes = CASE WHEN :rewrite THEN excluded.bytes ELSE sessions.bytes + excluded.bytes END
+"""
+
+
+class SQLiteSessionManager(SessionManager):
+    """
+    SessionManager that stores every session in one SQLite database.
+
+    Messages live in a ``messages`` table keyed by (session_key, seq) and
+    session metadata in ``sessions``, which doubles as the session index.
+    The database runs in WAL mode; a save inserts the turn's new messages
+    and updates the metadata row in a single transaction. Caching and the
+    Session API are inherited unchanged.
+    """
+
+    def __init__(self, workspace: Path, max_cached: int = 256, max_cache_bytes: int = 64 * 1024 * 1024):
+        super().__init__(workspace, max_cached=max_cached, max_cache_bytes=max_cache_bytes)
+        self.db_path = self.sessions_dir / "sessions.sqlite3"
+        self._db_lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._db_lock:
+            self._conn.close()
+
+    def _load(self, key: str) -> Session | None:
+        try:
+            with self._db_lock:
+                row = self._conn.execute("SELECT * FROM sessions WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                base = max(0, row["message_count"] - self.TAIL_MESSAGES)
+                tail = [json.loads(data) for (data,) in self._conn.execute(
+                    "SELECT data FROM messages WHERE session_key = ? AND seq >= ? ORDER BY seq", (key, base),
+                )]
+        except Exception as e:
+            logger.warning("Failed to load session {}: {}", key, e)
+            return None
+
+        messages = MessageLog(tail, base, lambda start, stop: list(self.iter_messages(key, start, stop)))
+        session = self._session_from_metadata(key, {
+            "created_at": row["created_at"],
+            "metadata": json.loads(row["metadata"]),
+            "last_consolidated": row["last_consolidated"],
+        }, messages)
+        session._saved_consolidated = session.last_consolidated
+        session._persisted = len(messages)
+        return session
+
+    def _write(self, session: Session, index: bool = True) -> None:
+        with self._write_lock:
+            batch = self._prepare(session)
+            with self._db_lock, self._conn:
+                self._stage(session, *batch)
+            self._mark_saved(session, *batch)
+
+    def flush(self) -> int:
+        """Write every queued session in a single transaction (group commit)."""
+        with self._dirty_lock:
+            pending, self._dirty = self._dirty, {}
+        if not pending:
+            return 0
+        with self._write_lock:
+            try:
+                batches = [(session, *self._prepare(session)) for session in pending.values()]
+                with self._db_lock, self._conn:
+                    for batch in batches:
+                        self._stage(*batch)
+            except Exception as e:
+                logger.error("Failed to save {} sessions: {}", len(pending), e)
+                for session in pending.values():
+                    self._requeue(session)
+                return 0
+            for batch in batches:
+                self._mark_saved(*batch)
+        self._refresh_cached(list(pending.values()))
+        return len(batches)
+
+    @staticmethod
+    def _prepare(session: Session) -> tuple[int, int, bool, list[tuple[str, int, str]]]:
+        """
+        Snapshot what a save has to write: message count, last_consolidated,
+        whether the rows replace the stored ones, and the new message rows.
+        """
+        messages = session.messages
+        count = len(messages)
+        rewrite = session._rewrite or session._persisted > count
+        start = 0 if rewrite else session._persisted
+        rows = [
+            (session.key, seq, json.dumps(msg, ensure_ascii=False))
+            for seq, msg in enumerate(messages[start:count], start)
+        ]
+        return count, session.last_consolidated, rewrite, rows
+
+    def _stage(
+        self, session: Session, count: int, consolidated: int, rewrite: bool, rows: list[tuple[str, int, str]],
+    ) -> None:
+        """Execute a session's writes inside the caller's transaction."""
+        if rewrite:
+            self._conn.execute("DELETE FROM messages WHERE session_key = ?", (session.key,))
+        self._conn.executemany("INSERT OR REPLACE INTO messages (session_key, seq, data) VALUES (?, ?, ?)", rows)
+        self._conn.execute(_UPSERT_SESSION, {
+            "key": session.key,
+            "channel": session.key.split(":", 1)[0],
+            "created_at": session.created_at.isoformat(),
+            "updated_at": session.updated_at.isoformat(),
+            "metadata": json.dumps(session.metadata, ensure_ascii=False),
+            "last_consolidated": consolidated,
+            "message_count": count,
+            "bytes": sum(len(r[2]) for r in rows),
+            "rewrite": rewrite,
+        })
+
+    @staticmethod
+    def _mark_saved(session: Session, count: int, consolidated: int, *_: Any) -> None:
+        session._persisted = count
+        session._saved_consolidated = consolidated
+        session._rewrite = False
+
+    def compact(self, session: Session) -> None:
+        """Nothing to compact in the database; just save pending changes."""
+        with self._lock, self._write_lock:
+            self._write(session)
+
+    def iter_messages(self, key: str, start: int = 0, stop: int | None = None) -> Iterator[dict[str, Any]]:
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT data FROM messages WHERE session_key = ? AND seq >= ? AND seq < ? ORDER BY seq",
+                (key, start, stop if stop is not None else 2**62),
+            ).fetchall()
+        for (data,) in rows:
+            yield json.loads(data)
+
+    def list_sessions(self, channel: str | None = None, limit: int | None = None) -> list[dict[str, Any]]:
+        sql = "SELECT key, channel, created_at, updated_at, message_count, bytes FROM sessions"
+        params: list[Any] = []
+        if channel is not None:
+            sql += " WHERE channel = ?"
+            params.append(channel)
+        sql += " ORDER BY updated_at DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._db_lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [{**dict(row), "path": str(self.db_path)} for row in rows]
+
+    def archive_idle(self, idle_days: float) -> dict[str, int]:
+        """Sessions in the database are not archived; see SessionManager.archive_idle."""
+        return {"sessions": 0, "bytes_before": 0, "bytes_after": 0}
+
+    def import_sessions(self, source: SessionManager) -> int:
+        """Copy every session of a JSONL SessionManager into the database; returns the count."""
+        count = 0
+        for entry in source._scan_sessions():
+            try:
+                session = source._load_full(entry["key"], Path(entry["path"]))
+            except Exception as e:
+                logger.warning("Skipping session {}: {}", entry["key"], e)
+                continue
+            if entry.get("updated_at"):
+                session.updated_at = datetime.fromisoformat(entry["updated_at"])
+            session._rewrite = True
+            with self._lock:
+                self._write(session)
+                self._drop(session.key)  # Reload from the database on next access
+            count += 1
+        return count
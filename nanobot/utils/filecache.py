@@ -0,0 +1,92 @@
+"""Cache of small workspace files, revalidated by stat instead of reread."""
+
+import os
+import stat
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+Signature = tuple[int, int, int]  # (mtime_ns, size, inode)
+
+
+def file_signature(path: Path) -> Signature | None:
+    """The (mtime_ns, size, inode) of a file, or None if it is missing or not a file."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    if not stat.S_ISREG(st.st_mode):
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+class FileCache:
+    """
+    Text of prompt files (bootstrap files, MEMORY.md, SKILL.md), keyed by path.
+
+    Each read costs one stat; the file is only reread when its mtime, size
+    or inode changed. Values derived from the text (parsed frontmatter,
+    say) can be cached alongside it with get() and are dropped together
+    with it. Writers that know they changed a file can invalidate() it so
+    that a rewrite within the filesystem's timestamp granularity is seen.
+    """
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Path, tuple[Signature, str, dict[Any, Any]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def read_text(self, path: Path) -> str | None:
+        """The file's text, or None if it does not exist."""
+        entry = self._entry(Path(path))
+        return entry[1] if entry else None
+
+    def get(self, path: Path, parse: Callable[[str], T]) -> T | None:
+        """parse(text) for the file, computed once per version of it; None if missing."""
+        entry = self._entry(Path(path))
+        if entry is None:
+            return None
+        derived = entry[2]
+        if parse not in derived:
+            derived[parse] = parse(entry[1])
+        return derived[parse]
+
+    def invalidate(self, path: Path | None = None) -> None:
+        """Forget one file, or everything when no path is given."""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                target = Path(path).resolve()
+                for cached in [p for p in self._entries if p == path or p.resolve() == target]:
+                    del self._entries[cached]
+
+    def _entry(self, path: Path) -> tuple[Signature, str, dict[Any, Any]] | None:
+        sig = file_signature(path)
+        with self._lock:
+            if sig is None:
+                self._entries.pop(path, None)
+                return None
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == sig:
+                self._entries.move_to_end(path)
+                self.stats["hits"] += 1
+                return entry
+        text = path.read_text(encoding="utf-8")
+        entry = (sig, text, {})
+        with self._lock:
+            self.stats["misses"] += 1
+            self._entries[path] = entry
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+
+# Shared by the context builder, memory store and skills loader of every agent
+workspace_files = FileCache()
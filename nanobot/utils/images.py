@@ -0,0 +1,136 @@
+"""Downscaled, content-addressed copies of images sent to the model."""
+
+import base64
+import hashlib
+import io
+import mimetypes
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from loguru import logger
+
+from nanobot.utils.filecache import Signature, file_signature
+from nanobot.utils.helpers import get_data_path
+
+# Long edge the major vision APIs work at; larger images are downscaled
+# server-side anyway, so sending more pixels only costs upload time.
+MAX_EDGE = 1568
+# Images already this small and within MAX_EDGE are sent as they are
+PASSTHROUGH_BYTES = 512 * 1024
+
+
+class ImageCache:
+    """
+    Turns image files into base64 payloads fit for a vision model.
+
+    Images are EXIF-rotated, shrunk to max_edge on the long side and
+    re-encoded (JPEG, or PNG when they have transparency). Results are keyed
+    by the SHA-256 of the original bytes, kept in memory for repeated turns,
+    retries and subagents, and written to cache_dir so they survive a
+    restart. A file is only rehashed when its mtime or size changes.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path | None = None,
+        max_edge: int = MAX_EDGE,
+        quality: int = 85,
+        max_entries: int = 32,
+    ):
+        self._cache_dir = cache_dir
+        self.max_edge = max_edge
+        self.quality = quality
+        self.max_entries = max_entries
+        self._payloads: OrderedDict[str, tuple[str, str]] = OrderedDict()  # "<digest>-<max_edge>" -> (mime, base64)
+        self._digests: dict[Path, tuple[Signature, str]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def cache_dir(self) -> Path:
+        if self._cache_dir is None:
+            self._cache_dir = get_data_path() / "cache" / "images"
+        return self._cache_dir
+
+    def encode(self, path: str | Path) -> tuple[str, str] | None:
+        """(mime type, base64 data) for an image file; None if it is not an image."""
+        p = Path(path)
+        mime, _ = mimetypes.guess_type(p.name)
+        sig = file_signature(p)
+        if sig is None or not mime or not mime.startswith("image/"):
+            return None
+
+        with self._lock:
+            known = self._digests.get(p)
+        if known and known[0] == sig:
+            digest, data = known[1], None
+        else:
+            data = p.read_bytes()
+            digest = hashlib.sha256(data).hexdigest()
+            with self._lock:
+                self._digests[p] = (sig, digest)
+        key = f"{digest}-{self.max_edge}"
+
+        with self._lock:
+            hit = self._payloads.get(key)
+            if hit:
+                self._payloads.move_to_end(key)
+                return hit
+
+        payload = self._load_cached(key) or self._process(data if data is not None else p.read_bytes(), mime, key)
+        with self._lock:
+            self._payloads[key] = payload
+            while len(self._payloads) > self.max_entries:
+                self._payloads.popitem(last=False)
+        return payload
+
+    def _load_cached(self, key: str) -> tuple[str, str] | None:
+        for ext, mime in ((".jpg", "image/jpeg"), (".png", "image/png")):
+            path = self.cache_dir / f"{key}{ext}"
+            if path.exists():
+                return mime, base64.b64encode(path.read_bytes()).decode()
+        return None
+
+    def _process(self, data: bytes, mime: str, key: str) -> tuple[str, str]:
+        try:
+            out, out_mime = self._downscale(data)
+        except Exception as e:
+            logger.debug("Sending image {} unprocessed: {}", key, e)
+            return mime, base64.b64encode(data).decode()
+        if out is None:
+            return mime, base64.b64encode(data).decode()
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp = self.cache_dir / f".{key}.tmp"
+            tmp.write_bytes(out)
+            tmp.replace(self.cache_dir / f"{key}{'.png' if out_mime == 'image/png' else '.jpg'}")
+        except OSError as e:
+            logger.warning("Failed to cache processed image {}: {}", key, e)
+        return out_mime, base64.b64encode(out).decode()
+
+    def _downscale(self, data: bytes) -> tuple[bytes | None, str]:
+        """Re-encoded image bytes, or None when the original is already small enough."""
+        from PIL import Image, ImageOps
+
+        with Image.open(io.BytesIO(data)) as img:
+            if getattr(img, "is_animated", False):
+                return None, ""  # Keep animations intact
+            fits = max(img.size) <= self.max_edge
+            if fits and len(data) <= PASSTHROUGH_BYTES:
+                return None, ""
+            img = ImageOps.exif_transpose(img)
+            img.thumbnail((self.max_edge, self.max_edge), Image.Resampling.LANCZOS)
+            buf = io.BytesIO()
+            if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
+                img.save(buf, format="PNG")
+                out_mime = "image/png"
+            else:
+                img.convert("RGB").save(buf, format="JPEG", quality=self.quality, optimize=True)
+                out_mime = "image/jpeg"
+        if fits and buf.tell() >= len(data):
+            return None, ""  # Re-encoding did not help
+        return buf.getvalue(), out_mime
+
+
+# Shared by every agent and subagent in the process
+image_cache = ImageCache()
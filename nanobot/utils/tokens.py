@@ -0,0 +1,40 @@
+"""Fast token estimation for context budgeting."""
+
+import json
+from typing import Any
+
+# Per-message framing overhead (role, separators) in chat formats.
+MESSAGE_OVERHEAD = 4
+
+
+def estimate_tokens(text: str | None) -> int:
+    """
+    Estimate the token count of text without a tokenizer.
+
+    ASCII text averages about four characters per token; CJK and other
+    non-ASCII scripts are closer to one token per character.
+    """
+    if not text:
+        return 0
+    if text.isascii():
+        return (len(text) + 3) // 4
+    non_ascii = sum(1 for c in text if ord(c) > 127)
+    return (len(text) - non_ascii + 3) // 4 + non_ascii
+
+
+def estimate_message_tokens(msg: dict[str, Any]) -> int:
+    """Estimate the tokens a chat message costs, including tool calls and images."""
+    content = msg.get("content")
+    if isinstance(content, list):
+        tokens = 0
+        for part in content:
+            if part.get("type") == "text":
+                tokens += estimate_tokens(part.get("text"))
+            else:
+                tokens += 800  # Typical cost of a downscaled image
+    else:
+        tokens = estimate_tokens(content if isinstance(content, str) else None)
+    if msg.get("tool_calls"):
+        tokens += estimate_tokens(json.dumps(msg["tool_calls"], ensure_ascii=False))
+    return tokens + MESSAGE_OVERHEAD
+
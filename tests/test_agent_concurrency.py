@@ -0,0 +1,211 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+from nanobot.agent.loop import AgentLoop
+from nanobot.bus.events import InboundMessage
+from nanobot.bus.queue import MessageBus
+
+
+def _make_loop(tmp_path, max_concurrency: int = 4, coalesce_window_ms: int = 0) -> AgentLoop:
+    provider = MagicMock()
+    provider.get_default_model.return_value = "test-model"
+    return AgentLoop(
+        bus=MessageBus(), provider=provider, workspace=tmp_path, max_concurrency=max_concurrency,
+        coalesce_window_ms=coalesce_window_ms,
+    )
+
+
+def _msg(chat_id: str, content: str) -> InboundMessage:
+    return InboundMessage(channel="telegram", sender_id="u", chat_id=chat_id, content=content)
+
+
+async def _drain(loop: AgentLoop) -> None:
+    while loop._session_workers:
+        await asyncio.gather(*list(loop._session_workers.values()))
+
+
+async def test_different_sessions_run_in_parallel(tmp_path) -> None:
+    loop = _make_loop(tmp_path)
+    active, peak = 0, 0
+
+    async def fake_process(msg, **kwargs):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.05)
+        active -= 1
+        return None
+
+    loop._process_message = fake_process
+    for chat in ("a", "b", "c"):
+        loop._dispatch(_msg(chat, "hi"))
+    await _drain(loop)
+
+    assert peak == 3
+    assert loop.bus.outbound_size == 3
+
+
+async def test_same_session_is_strictly_ordered(tmp_path) -> None:
+    loop = _make_loop(tmp_path)
+    seen: list[str] = []
+    active = 0
+
+    async def fake_process(msg, **kwargs):
+        nonlocal active
+        active += 1
+        assert active == 1
+        await asyncio.sleep(0.01)
+        seen.append(msg.content)
+        active -= 1
+        return None
+
+    loop._process_message = fake_process
+    for i in range(5):
+        loop._dispatch(_msg("a", str(i)))
+    await _drain(loop)
+
+    assert seen == ["0", "1", "2", "3", "4"]
+    assert not loop._session_queues
+
+
+async def test_global_concurrency_cap(tmp_path) -> None:
+    loop = _make_loop(tmp_path, max_concurrency=2)
+    active, peak = 0, 0
+
+    async def fake_process(msg, **kwargs):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.02)
+        active -= 1
+        return None
+
+    loop._process_message = fake_process
+    for chat in ("a", "b", "c", "d", "e"):
+        loop._dispatch(_msg(chat, "hi"))
+    await _drain(loop)
+
+    assert peak == 2
+
+
+async def test_message_tool_context_is_per_task(tmp_path) -> None:
+    loop = _make_loop(tmp_path)
+    tool = loop.tools.get("message")
+    sent = []
+
+    async def capture(out):
+        sent.append((out.chat_id, out.content))
+
+    tool.set_send_callback(capture)
+
+    async def turn(chat_id: str) -> bool:
+        loop._set_tool_context("telegram", chat_id)
+        tool.start_turn()
+        await asyncio.sleep(0.01)
+        await tool.execute(content=f"to {chat_id}")
+        return tool.sent_in_turn
+
+    results = await asyncio.gather(turn("a"), turn("b"))
+
+    assert results == [True, True]
+    assert sorted(sent) == [("a", "to a"), ("b", "to b")]
+
+
+async def test_burst_is_coalesced_into_one_turn(tmp_path) -> None:
+    loop = _make_loop(tmp_path, coalesce_window_ms=30)
+    turns: list[InboundMessage] = []
+
+    async def fake_process(msg, **kwargs):
+        turns.append(msg)
+        return None
+
+    loop._process_message = fake_process
+    loop._dispatch(_msg("a", "hey"))
+    await asyncio.sleep(0.01)
+    second = _msg("a", "are you there?")
+    second.media = ["/tmp/pic.jpg"]
+    second.metadata = {"message_id": 7}
+    loop._dispatch(second)
+    await _drain(loop)
+
+    assert len(turns) == 1
+    assert turns[0].content == "hey\nare you there?"
+    assert turns[0].media == ["/tmp/pic.jpg"]
+    assert turns[0].metadata == {"message_id": 7, "buffered_count": 2}
+
+
+async def test_messages_during_a_turn_join_the_next_turn(tmp_path) -> None:
+    loop = _make_loop(tmp_path, coalesce_window_ms=1)
+    seen: list[str] = []
+
+    async def fake_process(msg, **kwargs):
+        seen.append(msg.content)
+        if len(seen) == 1:
+            for text in ("b", "c", "/new", "d"):
+                loop._dispatch(_msg("a", text))
+            await asyncio.sleep(0.02)
+        return None
+
+    loop._process_message = fake_process
+    loop._dispatch(_msg("a", "a"))
+    await _drain(loop)
+
+    assert seen == ["a", "b\nc", "/new", "d"]
+
+
+async def test_running_loop_defers_session_saves_to_the_flusher(tmp_path) -> None:
+    loop = _make_loop(tmp_path)
+    session = loop.sessions.get_or_create("telegram:a")
+    session.add_message("user", "hi")
+
+    loop._running = True
+    await loop._save_session(session)
+    assert loop.sessions.is_dirty(session)
+
+    await loop.stop()  # Shutdown flushes whatever is pending
+    assert not loop.sessions.is_dirty(session)
+
+
+async def test_flush_timer_runs_beside_the_scheduler(tmp_path) -> None:
+    loop = _make_loop(tmp_path)
+    loop.session_flush_ms = 20
+    loop._connect_mcp = AsyncMock()
+    loop.proactive.start = AsyncMock()  # A scheduler busy with a slow job would never get to flush
+    runner = asyncio.create_task(loop.run())
+    await asyncio.sleep(0)
+
+    session = loop.sessions.get_or_create("telegram:a")
+    session.add_message("user", "hi")
+    await loop._save_session(session)
+    for _ in range(100):
+        if not loop.sessions.is_dirty(session):
+            break
+        await asyncio.sleep(0.01)
+    assert not loop.sessions.is_dirty(session)
+
+    await loop.stop()
+    await runner
+    assert loop._flush_task is None
+
+
+
+async def test_stop_waits_for_turns_in_flight_before_the_final_flush(tmp_path) -> None:
+    loop = _make_loop(tmp_path)
+    loop.session_flush_ms = 1000
+
+    async def fake_process(msg, **kwargs):
+        await asyncio.sleep(0.05)
+        session = loop.sessions.get_or_create(msg.session_key)
+        session.add_message("user", msg.content)
+        await loop._save_session(session)
+        return None
+
+    loop._process_message = fake_process
+    loop._running = True
+    loop._dispatch(_msg("a", "late"))
+    await asyncio.sleep(0)
+    await loop.stop()
+
+    assert not loop._session_workers
+    loop.sessions.invalidate("telegram:a")
+    assert [m["content"] for m in loop.sessions.get_or_create("telegram:a").messages] == ["late"]
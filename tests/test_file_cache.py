@@ -0,0 +1,75 @@
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+from nanobot.agent.skills import SkillsLoader
+from nanobot.utils.filecache import FileCache
+
+_SKILL = """---
+name: {name}
+description: {desc}
+metadata: {{"nanobot": {{"requires": {{"bins": ["{bin}"]}}, "always": {always}}}}}
+---
+
+# {name}
+"""
+
+
+def _write_skill(root: Path, name: str, desc: str, bin: str = "sh", always: str = "false") -> Path:
+    path = root / name / "SKILL.md"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(_SKILL.format(name=name, desc=desc, bin=bin, always=always), encoding="utf-8")
+    return path
+
+
+def test_file_cache_rereads_only_changed_files(tmp_path) -> None:
+    cache = FileCache()
+    path = tmp_path / "USER.md"
+    assert cache.read_text(path) is None
+
+    path.write_text("hello", encoding="utf-8")
+    parse = lambda text: text.upper()  # noqa: E731
+    assert cache.get(path, parse) == "HELLO"
+    assert cache.read_text(path) == "hello"
+    assert cache.stats == {"hits": 1, "misses": 1}
+
+    path.write_text("hello, world", encoding="utf-8")
+    assert cache.get(path, parse) == "HELLO, WORLD"
+    path.write_text("hello, WORLD", encoding="utf-8")  # Same size, maybe the same mtime tick
+    cache.invalidate(path)
+    assert cache.read_text(path) == "hello, WORLD"
+    path.unlink()
+    assert cache.read_text(path) is None
+
+
+def test_skills_summary_is_built_from_cache(tmp_path) -> None:
+    builtin = tmp_path / "builtin"
+    _write_skill(builtin, "weather", "Forecasts", always="true")
+    _write_skill(builtin, "tmux", "Terminal mux", bin="surely-not-installed-bin")
+    loader = SkillsLoader(tmp_path / "ws", builtin_skills_dir=builtin)
+
+    first = loader.build_skills_summary()
+    assert loader.get_always_skills() == ["weather"]
+    assert '<skill available="false">' in first and "CLI: surely-not-installed-bin" in first
+
+    with patch.object(Path, "read_text") as read_text, patch("shutil.which") as which:
+        assert loader.build_skills_summary() == first
+        assert loader.get_always_skills() == ["weather"]
+    read_text.assert_not_called()
+    which.assert_not_called()
+
+
+def test_skill_edits_and_workspace_overrides_are_seen(tmp_path) -> None:
+    builtin = tmp_path / "builtin"
+    skill = _write_skill(builtin, "weather", "Forecasts")
+    loader = SkillsLoader(tmp_path / "ws", builtin_skills_dir=builtin)
+    assert "<description>Forecasts</description>" in loader.build_skills_summary()
+
+    skill.write_text(skill.read_text().replace("Forecasts", "Forecasts and radar"), encoding="utf-8")
+    assert "<description>Forecasts and radar</description>" in loader.build_skills_summary()
+
+    _write_skill(tmp_path / "ws" / "skills", "weather", "My own forecasts")
+    os.utime(tmp_path / "ws" / "skills", ns=(1, 1))
+    summary = loader.build_skills_summary()
+    assert "<description>My own forecasts</description>" in summary
+    assert summary.count("<skill ") == 1
@@ -0,0 +1,66 @@
+import os
+import sqlite3
+from unittest.mock import patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from nanobot.game import context, models
+
+
+def _factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/brain.sqlite")
+    models.Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+    db = factory()
+    db.add(models.DigimonState(name="Agumon", species="Agumon", stage="Rookie", attribute="Vaccine", is_active=True))
+    db.add(models.Inventory(bits=0, items={}, crests=[], digimentals=[]))
+    db.commit()
+    db.close()
+    return factory
+
+
+def _set_hp(factory, hp: int, commit: bool = True) -> None:
+    db = factory()
+    db.query(models.DigimonState).first().current_hp = hp
+    db.commit() if commit else (db.flush(), db.rollback())
+    db.close()
+
+
+def test_snapshot_is_served_until_game_state_changes(tmp_path) -> None:
+    factory = _factory(tmp_path)
+    snapshot = context.PromptSnapshot(factory)
+    persona, status = snapshot.get()
+    assert "Agumon" in persona and "HP: 100/100" in status
+
+    with patch.object(context, "build_prompt_parts") as build:
+        assert snapshot.cached() == (persona, status)
+        assert snapshot.get() == (persona, status)
+        _set_hp(factory, 90, commit=False)  # Rolled back: nothing changed
+        assert snapshot.cached() == (persona, status)
+    build.assert_not_called()
+
+    _set_hp(factory, 40)
+    assert snapshot.cached() is None
+    assert "HP: 40/100" in snapshot.get()[1]
+
+    db = factory()
+    db.query(models.Inventory).update({"bits": 250})  # Bulk updates count too
+    db.commit()
+    db.close()
+    assert "Bits: 250" in snapshot.get()[1]
+
+
+def test_snapshot_sees_other_processes_and_expires(tmp_path) -> None:
+    factory = _factory(tmp_path)
+    snapshot = context.PromptSnapshot(factory)
+    snapshot.get()
+
+    with sqlite3.connect(tmp_path / "brain.sqlite") as conn:  # Like the daemon: no ORM events here
+        conn.execute("UPDATE digimon_roster SET hunger = 12")
+    os.utime(tmp_path / "brain.sqlite", ns=(1, 1))
+    assert "Hunger: 12/100" in snapshot.get()[1]
+
+    snapshot.max_age_s = 0
+    with patch.object(context, "build_prompt_parts", return_value=("p", "s")):
+        assert snapshot.get() == ("p", "s")
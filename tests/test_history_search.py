@@ -0,0 +1,72 @@
+from unittest.mock import patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from typer.testing import CliRunner
+
+from nanobot.agent.memory import MemoryStore
+from nanobot.agent.tools.history import SearchHistoryTool
+from nanobot.cli.commands import app
+from nanobot.config.schema import Config
+from nanobot.game import models
+
+
+def _store(tmp_path) -> MemoryStore:
+    store = MemoryStore(tmp_path)
+    store.append_history("[2026-01-10 09:00] User planned the physics exam revision and asked for flashcards.")
+    store.append_history("[2026-02-03 18:30] User and Agumon talked about the chemistry lab deadline.")
+    store.append_history("[2026-03-01 12:00] User reported finishing the physics exam with a good grade.")
+    return store
+
+
+def test_search_ranks_and_filters_by_date(tmp_path) -> None:
+    store = _store(tmp_path)
+
+    hits = store.history_index.search("physics exam")
+    assert {h["ts"] for h in hits} == {"2026-01-10 09:00", "2026-03-01 12:00"}
+    assert "**physics**" in hits[0]["snippet"]
+
+    assert [h["ts"] for h in store.history_index.search("physics", since="2026-02-01")] == ["2026-03-01 12:00"]
+    assert [h["ts"] for h in store.history_index.search("physics", until="2026-01-10")] == ["2026-01-10 09:00"]
+    assert [h["ts"] for h in store.history_index.search("deadl")] == ["2026-02-03 18:30"]  # Prefix match
+    # No entry has every word, so any-word matches are returned
+    assert len(store.history_index.search("chemistry flashcards")) == 2
+
+
+def test_index_picks_up_external_edits_and_rebuilds(tmp_path) -> None:
+    store = _store(tmp_path)
+    with open(store.history_file, "a", encoding="utf-8") as f:
+        f.write("[2026-03-05 08:00] Written by hand about the robotics club.\n\n")
+    assert store.history_index.search("robotics")[0]["ts"] == "2026-03-05 08:00"
+
+    # Edited in place to the same length: the old text must not stay searchable
+    text = store.history_file.read_text(encoding="utf-8")
+    store.history_file.write_text(text.replace("robotics", "knitting"), encoding="utf-8")
+    assert store.history_index.search("robotics") == []
+    assert [h["ts"] for h in store.history_index.search("knitting")] == ["2026-03-05 08:00"]
+    assert len(store.history_index.search("physics")) == 2  # Reindexed once, not duplicated
+
+    store.history_file.write_text("[2026-04-01 10:00] Only entry left.\n\n", encoding="utf-8")
+    assert store.history_index.search("physics") == []
+    assert store.history_index.rebuild() == 1
+
+
+async def test_search_history_tool_formats_results(tmp_path) -> None:
+    tool = SearchHistoryTool(_store(tmp_path).history_index)
+    result = await tool.execute(query="chemistry lab")
+    assert result.startswith("1 matching history entries")
+    assert "[2026-02-03 18:30]" in result
+    assert "No history entries" in await tool.execute(query="volcano")
+
+
+def test_reindex_command(tmp_path) -> None:
+    _store(tmp_path)
+    config = Config()
+    config.agents.defaults.workspace = str(tmp_path)
+    engine = create_engine(f"sqlite:///{tmp_path}/brain.sqlite")
+    models.Base.metadata.create_all(bind=engine)
+    with patch("nanobot.config.loader.load_config", return_value=config), \
+            patch("nanobot.game.database.SessionLocal", sessionmaker(bind=engine)):
+        result = CliRunner().invoke(app, ["memory", "reindex"], env={"COLUMNS": "200"})
+    assert result.exit_code == 0 and "Indexed 3 history entries" in result.output
+    assert "Indexed 0 Second Brain nodes" in result.output
@@ -0,0 +1,92 @@
+from nanobot.agent.context import ContextBuilder
+from nanobot.session.manager import Session, SessionManager
+from nanobot.utils.tokens import estimate_message_tokens, estimate_tokens
+
+
+def _tool_turn(session: Session, call_id: str, result: str) -> None:
+    session.add_message("assistant", None, tool_calls=[
+        {"id": call_id, "type": "function", "function": {"name": "web_fetch", "arguments": "{}"}},
+    ])
+    session.add_message("tool", result, tool_call_id=call_id, name="web_fetch")
+
+
+def test_estimate_tokens() -> None:
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcd" * 10) == 10
+    assert estimate_tokens("你好世界") == 4
+    assert estimate_message_tokens({"role": "user", "content": "abcd"}) == 5
+
+
+def test_history_fills_budget_newest_first() -> None:
+    session = Session(key="t:1")
+    for i in range(10):
+        session.add_message("user", "x" * 40)  # 10 tokens + overhead = 14
+
+    history = session.get_history(max_tokens=14 * 3)
+
+    assert len(history) == 3
+    assert len(session._token_counts) == 4  # The three that fit and the one that ended the window
+    assert all(set(m) == {"role", "content", "timestamp"} for m in session.messages)
+
+
+def test_token_estimates_are_not_persisted(tmp_path) -> None:
+    manager = SessionManager(tmp_path)
+    session = manager.get_or_create("t:1")
+    session.add_message("user", "hello")
+    session.get_history(max_tokens=100)
+    manager.save(session)
+    session.clear()
+    session.add_message("user", "again")
+    session.get_history(max_tokens=100)
+    manager.save(session)  # A full rewrite
+
+    assert "_tokens" not in manager._get_session_path("t:1").read_text(encoding="utf-8")
+
+
+def test_oversized_message_ends_the_window() -> None:
+    session = Session(key="t:1")
+    session.add_message("user", "old")
+    session.add_message("assistant", "y" * 40_000)
+    session.add_message("user", "latest")
+
+    history = session.get_history(max_tokens=100)
+
+    assert [m["content"] for m in history] == ["latest"]
+
+
+def test_tool_call_and_results_stay_together() -> None:
+    session = Session(key="t:1")
+    session.add_message("user", "fetch it")
+    _tool_turn(session, "c1", "r" * 400)
+    session.add_message("assistant", "done")
+
+    fits_all = session.get_history(max_tokens=10_000)
+    too_small = session.get_history(max_tokens=20)
+
+    assert [m["role"] for m in fits_all] == ["user", "assistant", "tool", "assistant"]
+    assert [m["role"] for m in too_small] == ["assistant"]
+
+
+def test_orphaned_tool_results_are_dropped() -> None:
+    session = Session(key="t:1")
+    _tool_turn(session, "c1", "result")
+    session.add_message("assistant", "done")
+
+    history = session.get_history(max_messages=2)
+
+    assert [m["role"] for m in history] == ["assistant"]
+
+
+async def test_prefix_estimate_is_kept_per_session(tmp_path) -> None:
+    builder = ContextBuilder(tmp_path, memory_budget_tokens=0)
+
+    async def no_digimon():
+        return "", ""
+
+    builder._get_digimon_prompt = no_digimon
+    await builder.build_messages([], "hi", channel="telegram", chat_id="a", extra_context="x" * 4000)
+    await builder.build_messages([], "hi", channel="telegram", chat_id="b")
+
+    big, small = builder.estimate_prefix_tokens("telegram:a"), builder.estimate_prefix_tokens("telegram:b")
+    assert big >= small + 1000
+    assert builder.estimate_prefix_tokens("telegram:new") <= small
@@ -0,0 +1,65 @@
+import base64
+import io
+from pathlib import Path
+from unittest.mock import patch
+
+from PIL import Image
+
+from nanobot.agent.context import ContextBuilder
+from nanobot.utils.images import ImageCache
+
+
+def _photo(path: Path, size: tuple[int, int], mode: str = "RGB") -> Path:
+    img = Image.effect_noise(size, 64).convert(mode)  # Noise compresses badly, like a real photo
+    img.save(path)
+    return path
+
+
+def _decode(payload: tuple[str, str]) -> Image.Image:
+    return Image.open(io.BytesIO(base64.b64decode(payload[1])))
+
+
+def test_large_images_are_downscaled_and_cached_by_content(tmp_path) -> None:
+    photo = _photo(tmp_path / "photo.png", (1500, 1000))
+    cache = ImageCache(tmp_path / "cache", max_edge=1000)
+
+    mime, b64 = first = cache.encode(photo)
+    assert mime == "image/jpeg"
+    assert _decode(first).size == (1000, 667)
+    assert len(b64) * 3 / 4 < photo.stat().st_size / 4
+
+    with patch.object(Path, "read_bytes") as read_bytes:
+        assert cache.encode(photo) == first  # Unchanged file: no rehash, no re-encode
+    read_bytes.assert_not_called()
+
+    copy = tmp_path / "copy.png"
+    copy.write_bytes(photo.read_bytes())
+    with patch.object(ImageCache, "_downscale") as downscale:
+        assert ImageCache(tmp_path / "cache", max_edge=1000).encode(copy) == first  # Same content, from disk
+    downscale.assert_not_called()
+
+
+def test_small_transparent_and_non_images(tmp_path) -> None:
+    cache = ImageCache(tmp_path / "cache", max_edge=1000)
+    icon = _photo(tmp_path / "icon.png", (64, 64))
+    assert cache.encode(icon) == ("image/png", base64.b64encode(icon.read_bytes()).decode())
+
+    sticker = _photo(tmp_path / "sticker.png", (1200, 1200), mode="RGBA")
+    mime, _ = payload = cache.encode(sticker)
+    assert mime == "image/png" and _decode(payload).mode == "RGBA"
+
+    (tmp_path / "notes.txt").write_text("hi")
+    assert cache.encode(tmp_path / "notes.txt") is None
+    assert cache.encode(tmp_path / "missing.jpg") is None
+
+
+async def test_user_content_uses_processed_images(tmp_path) -> None:
+    builder = ContextBuilder(tmp_path)
+    photo = _photo(tmp_path / "photo.jpg", (2000, 1500))
+
+    with patch("nanobot.agent.context.image_cache", ImageCache(tmp_path / "cache")):
+        content = await builder._build_user_content("what is this?", [str(photo), str(tmp_path / "gone.jpg")])
+    assert len(content) == 2 and content[-1] == {"type": "text", "text": "what is this?"}
+    url = content[0]["image_url"]["url"]
+    assert url.startswith("data:image/jpeg;base64,")
+    assert max(Image.open(io.BytesIO(base64.b64decode(url.split(",", 1)[1]))).size) == 1568
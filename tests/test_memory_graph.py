@@ -0,0 +1,194 @@
+import sqlite3
+import threading
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from nanobot.game import memory, models
+
+
+def _db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/brain.sqlite")
+    models.Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)()
+
+
+def test_search_ranks_name_hits_and_matches_prefixes(tmp_path) -> None:
+    db = _db(tmp_path)
+    memory.add_memory_node(db, "enemy", "Devimon", {"weakness": "holy attacks"})
+    memory.add_memory_node(db, "concept", "Holy Arrow", {"user": "Angemon"})
+    memory.add_memory_node(db, "person", "Tai", {"partner": "Agumon"})
+
+    assert [n.name for n in memory.search_memory(db, "holy")] == ["Holy Arrow", "Devimon"]
+    assert [n.name for n in memory.search_memory(db, "devi")] == ["Devimon"]
+    assert [n.name for n in memory.search_memory(db, "holy", limit=1)] == ["Holy Arrow"]
+    assert memory.search_memory(db, "   ") == []
+
+
+def test_index_is_rebuilt_when_rowids_drift(tmp_path) -> None:
+    db = _db(tmp_path)
+    assert memory.ensure_memory_index(db)
+    memory.add_memory_node(db, "person", "Tai", {"crest": "courage"})
+    memory.add_memory_node(db, "person", "Matt", {"crest": "friendship"})
+    # What a VACUUM can do: renumber rowids without the triggers seeing it
+    db.execute(text("DROP TRIGGER nodes_fts_au"))
+    db.execute(text("UPDATE nodes SET rowid = rowid + 100"))
+    db.commit()
+    assert not memory._memory_index_intact(db)
+
+    memory._fts_engines.discard(db.get_bind())  # A new process starting up
+    assert memory.ensure_memory_index(db)
+    assert memory._memory_index_intact(db)
+    assert [n.name for n in memory.search_memory(db, "courage")] == ["Tai"]
+
+
+def test_index_follows_updates_and_deletes(tmp_path) -> None:
+    db = _db(tmp_path)
+    assert memory.ensure_memory_index(db)
+    memory.add_memory_node(db, "person", "Tai", {"partner": "Agumon"})
+    assert memory.search_memory(db, "courage") == []
+    memory.add_memory_node(db, "person", "Tai", {"crest": "courage"})
+    assert [n.name for n in memory.search_memory(db, "courage")] == ["Tai"]
+
+    db.execute(text("DELETE FROM nodes WHERE id = 'person_tai'"))
+    db.commit()
+    assert memory.search_memory(db, "courage") == []
+
+
+def test_existing_nodes_are_indexed_and_used_for_context(tmp_path) -> None:
+    db = _db(tmp_path)
+    db.add(models.SecondBrainNode(id="concept_exam", type="concept", name="Physics Exam", properties={}))
+    db.commit()  # Written before the index existed
+
+    assert "[concept] Physics Exam" in memory.get_memory_context_string(db, "physics")
+    assert memory.get_memory_context_string(db, "chemistry") == "No relevant memories found."
+
+
+def _count_commits(db) -> list[int]:
+    from sqlalchemy import event
+
+    commits = [0]
+
+    @event.listens_for(db, "after_commit")
+    def _after_commit(session):
+        commits[0] += 1
+
+    return commits
+
+
+def test_batch_upsert_commits_once_and_merges(tmp_path) -> None:
+    db = _db(tmp_path)
+    memory.add_memory_node(db, "person", "Tai", {"partner": "Agumon"})
+    commits = _count_commits(db)
+
+    entities = [{"type": "person", "name": "Tai", "properties": {"crest": "courage"}}]
+    entities += [{"type": "enemy", "name": f"Enemy {i}", "properties": {"level": i}} for i in range(50)]
+    relations = [{"source_id": "person_tai", "target_id": f"enemy_enemy_{i}", "relation": "fought"} for i in range(50)]
+    result = memory.batch_upsert_memory(db, entities, relations)
+
+    assert commits[0] == 1
+    assert len(result["nodes"]) == 51 and len(result["edges"]) == 50
+    tai = db.get(models.SecondBrainNode, "person_tai")
+    assert tai.properties == {"partner": "Agumon", "crest": "courage"}
+    assert db.query(models.SecondBrainEdge).count() == 50
+
+    memory.batch_upsert_memory(db, [], relations[:1])  # Existing edges are kept, not duplicated
+    assert db.query(models.SecondBrainEdge).count() == 50
+
+
+def test_batch_upsert_is_all_or_nothing(tmp_path) -> None:
+    db = _db(tmp_path)
+    # The second node cannot be serialized, so the flush fails after the first was added
+    entities = [{"type": "person", "name": "Tai"}, {"type": "person", "name": "Bad", "properties": {"x": object()}}]
+    try:
+        memory.batch_upsert_memory(db, entities, [])
+    except Exception:
+        pass
+    else:
+        raise AssertionError("expected the batch to fail")
+    assert db.query(models.SecondBrainNode).count() == 0
+
+
+def _graph(db) -> None:
+    memory.batch_upsert_memory(
+        db,
+        [{"type": "person", "name": n} for n in ("Tai", "Matt", "Sora", "Joe")]
+        + [{"type": "enemy", "name": "Devimon"}],
+        [
+            {"source_id": "person_tai", "target_id": "person_matt", "relation": "knows"},
+            {"source_id": "person_matt", "target_id": "person_sora", "relation": "knows"},
+            {"source_id": "person_sora", "target_id": "person_joe", "relation": "knows"},
+            {"source_id": "enemy_devimon", "target_id": "person_tai", "relation": "fought"},
+        ],
+    )
+
+
+def test_neighbourhood_follows_hops_both_ways_and_relations(tmp_path) -> None:
+    db = _db(tmp_path)
+    _graph(db)
+
+    two = memory.get_neighbourhood(db, "person_matt", hops=2)
+    assert [(n["id"], n["depth"]) for n in two["nodes"]] == [
+        ("person_matt", 0), ("person_sora", 1), ("person_tai", 1),
+        ("enemy_devimon", 2), ("person_joe", 2),
+    ]
+    assert len(two["edges"]) == 4
+
+    knows = memory.get_neighbourhood(db, "person_tai", hops=3, relations=["knows"])
+    assert [n["id"] for n in knows["nodes"]] == ["person_tai", "person_matt", "person_sora", "person_joe"]
+    assert {e["relation"] for e in knows["edges"]} == {"knows"}
+    assert memory.get_neighbourhood(db, "person_nobody")["nodes"] == []
+
+
+def test_neighbourhood_cache_is_invalidated_by_writes(tmp_path) -> None:
+    db = _db(tmp_path)
+    _graph(db)
+    first = memory.get_neighbourhood(db, "person_joe", hops=1)
+    assert memory.get_neighbourhood(db, "person_joe", hops=1) is first
+
+    memory.link_memory_nodes(db, "person_joe", "enemy_devimon", "fears")
+    again = memory.get_neighbourhood(db, "person_joe", hops=1)
+    assert again is not first
+    assert "enemy_devimon" in [n["id"] for n in again["nodes"]]
+
+
+def test_neighbourhood_cache_sees_writes_from_outside_the_orm(tmp_path) -> None:
+    db = _db(tmp_path)
+    _graph(db)
+    first = memory.get_neighbourhood(db, "person_joe", hops=1)
+    with sqlite3.connect(tmp_path / "brain.sqlite") as conn:  # Another process, say the game daemon
+        conn.execute(
+            "INSERT INTO edges (id, source_id, target_id, relation, properties) "
+            "VALUES ('joe_fears_devimon', 'person_joe', 'enemy_devimon', 'fears', '{}')"
+        )
+    again = memory.get_neighbourhood(db, "person_joe", hops=1)
+    assert again is not first
+    assert "enemy_devimon" in [n["id"] for n in again["nodes"]]
+
+
+async def test_explore_tool_resolves_names(tmp_path, monkeypatch) -> None:
+    from nanobot.agent.tools import second_brain
+
+    db = _db(tmp_path)
+    _graph(db)
+    monkeypatch.setattr(second_brain, "SessionLocal", sessionmaker(bind=db.get_bind()))
+
+    out = await second_brain.ExploreMemoryGraphTool().execute(node="Devimon", hops=1)
+    assert out.startswith("Subgraph around enemy_devimon (2 nodes, 1 edges)")
+    assert "- enemy_devimon -[fought]-> person_tai" in out
+    assert "No memory node" in await second_brain.ExploreMemoryGraphTool().execute(node="Gennai")
+
+
+async def test_read_only_graph_tools_query_off_the_event_loop(tmp_path, monkeypatch) -> None:
+    from nanobot.agent.tools import second_brain
+
+    db = _db(tmp_path)
+    _graph(db)
+    monkeypatch.setattr(second_brain, "SessionLocal", sessionmaker(bind=db.get_bind()))
+    threads = []
+    search = memory.search_memory
+    monkeypatch.setattr(memory, "search_memory", lambda *a, **kw: threads.append(threading.current_thread()) or search(*a, **kw))
+
+    await second_brain.SearchMemoryGraphTool().execute(query="Devimon")
+    await second_brain.ExploreMemoryGraphTool().execute(node="Devimon")
+    assert len(threads) == 2 and threading.main_thread() not in threads
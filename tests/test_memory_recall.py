@@ -0,0 +1,114 @@
+import json
+import os
+import sqlite3
+from unittest.mock import patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from nanobot.agent.context import ContextBuilder
+from nanobot.agent.recall import BM25Index, MemoryRecall, chunk_markdown
+from nanobot.game import memory as brain
+from nanobot.game import models
+from nanobot.utils.tokens import estimate_tokens
+
+
+def _big_memory(facts: int) -> str:
+    lines = ["# Facts", ""]
+    for i in range(facts):
+        lines += [f"- Filler fact number {i} about routine item{i} and nothing in particular.", ""]
+    lines += ["# Pets", "", "- The user's cat is called Biscuit and hates the vacuum.", ""]
+    return "\n".join(lines)
+
+
+def test_bm25_prefers_rarer_and_denser_matches() -> None:
+    index = BM25Index([
+        "the cat sat on the mat",
+        "the dog chased the cat around the cat tree",
+        "quarterly tax report due in march",
+    ])
+    assert [i for i, _ in index.search("cat")] == [1, 0]
+    assert index.search("tax march")[0][0] == 2
+    assert index.search("unicorn") == []
+
+
+def test_chunks_carry_their_heading() -> None:
+    text = "# Work\n\nShips the release on Fridays.\n\n## Tools\nUses vim.\nAnd tmux.\n"
+    assert chunk_markdown(text) == ["Work: Ships the release on Fridays.", "Tools: Uses vim.\nAnd tmux."]
+    assert all(len(c) < 120 for c in chunk_markdown("x" * 50 + "\n" + "y" * 50 + "\n" + "z" * 50, max_chars=110))
+
+
+def test_recall_stays_within_budget_as_memory_grows(tmp_path) -> None:
+    memory = tmp_path / "MEMORY.md"
+    recall = MemoryRecall(memory, budget_tokens=60, top_k=4)
+    for facts in (50, 2000):
+        memory.write_text(_big_memory(facts), encoding="utf-8")
+        os.utime(memory, ns=(facts, facts))  # Make sure the change is visible to the mtime check
+        picked = recall.recall("what is my cat called?")
+        assert picked[0] == ("MEMORY.md", "Pets: - The user's cat is called Biscuit and hates the vacuum.")
+        assert sum(estimate_tokens(text) for _, text in picked) <= 60
+        assert len(picked) <= 4
+
+
+def test_recall_includes_second_brain_nodes_and_sees_new_ones(tmp_path) -> None:
+    db = tmp_path / "brain.sqlite"
+    with sqlite3.connect(db) as conn:
+        conn.execute("CREATE TABLE nodes (id TEXT PRIMARY KEY, type TEXT, name TEXT, properties JSON)")
+        conn.execute("INSERT INTO nodes VALUES ('p', 'person', 'Sora', ?)", (json.dumps({"role": "captain"}),))
+    recall = MemoryRecall(tmp_path / "MEMORY.md", graph_db=db, budget_tokens=200)
+
+    assert recall.recall("who is sora") == [("Second Brain", "[person] Sora: role: captain")]
+    with sqlite3.connect(db) as conn:
+        conn.execute("INSERT INTO nodes VALUES ('e', 'enemy', 'Devimon', '{}')")
+    assert recall.recall("devimon") == [("Second Brain", "[enemy] Devimon")]
+
+
+def test_recall_keys_on_the_graph_version_not_the_file(tmp_path) -> None:
+    db_path = tmp_path / "brain.sqlite"
+    engine = create_engine(f"sqlite:///{db_path}")
+    models.Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    brain.ensure_graph_version(db)  # As init_db() does
+    brain.add_memory_node(db, "person", "Sora", {"role": "captain"})
+    recall = MemoryRecall(tmp_path / "MEMORY.md", graph_db=db_path, budget_tokens=200)
+    assert recall.recall("sora") == [("Second Brain", "[person] Sora: role: captain")]
+
+    with patch.object(recall, "_graph_chunks") as chunks:
+        os.utime(db_path, ns=(1, 1))  # A checkpoint or VACUUM touching the file
+        recall.recall("sora")
+    chunks.assert_not_called()
+
+    brain.add_memory_node(db, "person", "Sora", {"role": "pilot"})  # Same count, same rowids
+    assert recall.recall("sora") == [("Second Brain", "[person] Sora: role: pilot")]
+    db.close()
+    engine.dispose()
+
+
+def test_memory_fits_answers_from_the_last_refresh(tmp_path) -> None:
+    memory = tmp_path / "MEMORY.md"
+    memory.write_text("# Pets\n\n- The cat is called Biscuit.\n", encoding="utf-8")
+    recall = MemoryRecall(memory, budget_tokens=200)
+    assert recall.memory_fits()
+    with patch.object(recall, "_refresh") as refresh:
+        assert recall.memory_fits()
+    refresh.assert_not_called()
+
+
+async def test_large_memory_moves_from_system_prompt_to_runtime_block(tmp_path) -> None:
+    builder = ContextBuilder(tmp_path, memory_budget_tokens=200)
+    builder.recall.graph_db = None
+
+    async def no_digimon():
+        return "", ""
+
+    builder._get_digimon_prompt = no_digimon
+    builder.memory.write_long_term("# Pets\n\n- The cat is called Biscuit.\n")
+    small = await builder.build_messages(history=[], current_message="cat name?")
+    assert "Biscuit" in small[0]["content"]
+    assert "Relevant Memory" not in small[-1]["content"]
+
+    builder.memory.write_long_term(_big_memory(500))
+    big = await builder.build_messages(history=[], current_message="cat name?")
+    assert "Biscuit" not in big[0]["content"]
+    assert "Relevant Memory" in big[-1]["content"] and "Biscuit" in big[-1]["content"]
+    assert estimate_tokens(big[0]["content"]) < estimate_tokens(small[0]["content"]) + 100
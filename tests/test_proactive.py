@@ -0,0 +1,89 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from nanobot.bus.queue import MessageBus
+from nanobot.proactive import CachedSource, ProactiveAlerts, ProactiveScheduler
+from nanobot.proactive import alerts as alerts_mod
+
+
+class FakeSessions:
+    def __init__(self, keys: list[str]):
+        self.keys = keys
+        self.calls = 0
+
+    def list_sessions(self, channel=None, limit=None):
+        self.calls += 1
+        return [{"key": k} for k in self.keys if channel is None or k.startswith(f"{channel}:")][:limit]
+
+
+async def test_cached_source_fetches_once_per_ttl() -> None:
+    calls = 0
+
+    def fetch():
+        nonlocal calls
+        calls += 1
+        return calls
+
+    source = CachedSource("n", fetch, ttl_s=60)
+    assert await asyncio.gather(source.get(), source.get(), source.get()) == [1, 1, 1]
+    source.invalidate()
+    assert await source.get() == 2
+
+
+async def test_scheduler_runs_jobs_in_due_order_and_reschedules() -> None:
+    scheduler = ProactiveScheduler()
+    ran: list[str] = []
+
+    async def fast():
+        ran.append("fast")
+        return 0.02
+
+    async def slow():
+        ran.append("slow")
+        return 100
+
+    scheduler.add_job("slow", slow, interval_s=100, first_delay_s=0.03)
+    scheduler.add_job("fast", fast, interval_s=100, first_delay_s=0.0)
+    await scheduler.start()
+    await asyncio.sleep(0.07)
+    scheduler.stop()
+
+    assert ran[0] == "fast" and ran.count("slow") == 1 and ran.count("fast") >= 3
+    assert scheduler.next_run_in("slow") > 90
+
+
+async def test_calendar_rule_alerts_once_and_sleeps_until_next_window(monkeypatch) -> None:
+    now = datetime.now(timezone.utc)
+
+    def event(eid: str, minutes: int) -> dict:
+        return {"id": eid, "summary": eid, "start": {"dateTime": (now + timedelta(minutes=minutes)).isoformat()}}
+
+    marked: set[str] = set()
+
+    def mark(eid: str, summary: str) -> bool:
+        if eid in marked:
+            return False
+        marked.add(eid)
+        return True
+
+    monkeypatch.setattr(alerts_mod, "_check_and_mark_calendar_alert", mark)
+    sessions = FakeSessions(["cli:direct", "telegram:42"])
+    bus = MessageBus()
+    rules = ProactiveAlerts(bus, sessions)
+    rules.calendar = CachedSource("calendar", lambda: [event("soon", 3), event("later", 30)], ttl_s=3600)
+
+    first = await rules.check_calendar()
+    second = await rules.check_calendar()
+
+    assert first == 60
+    assert 1490 <= second <= 1500  # Wakes when "later" enters its alert window
+    assert bus.inbound_size == 1
+    msg = await bus.consume_inbound()
+    assert (msg.channel, msg.chat_id) == ("telegram", "42") and "'soon'" in msg.content
+    assert sessions.calls == 1
+
+
+async def test_rules_back_off_without_a_telegram_chat() -> None:
+    rules = ProactiveAlerts(MessageBus(), FakeSessions(["cli:direct"]))
+    assert await rules.check_calendar() == 300
+    assert await rules.daily_plan() == 3600
@@ -0,0 +1,72 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from nanobot.agent.context import ContextBuilder
+from nanobot.agent.loop import AgentLoop
+from nanobot.bus.queue import MessageBus
+from nanobot.providers.base import parse_usage
+from nanobot.providers.openai_codex_provider import _parse_usage, _prompt_cache_key
+
+
+def _builder(tmp_path, status: str) -> ContextBuilder:
+    builder = ContextBuilder(tmp_path)
+
+    async def digimon_prompt():
+        return "You are Agumon.", status
+
+    builder._get_digimon_prompt = digimon_prompt
+    return builder
+
+
+async def test_system_prompt_is_stable_across_turns(tmp_path) -> None:
+    first = await _builder(tmp_path, "HP: 10/10").build_messages(
+        history=[], current_message="hi", channel="telegram", chat_id="1",
+    )
+    second = await _builder(tmp_path, "HP: 3/10").build_messages(
+        history=[{"role": "user", "content": "hi"}], current_message="tasks?",
+        channel="discord", chat_id="2", extra_context="TASK DATA",
+    )
+
+    assert first[0] == second[0]
+    assert "You are Agumon." in first[0]["content"]
+    assert "Current Time" not in first[0]["content"]
+    user = second[-1]["content"]
+    assert user.startswith(ContextBuilder.RUNTIME_CONTEXT_TAG)
+    assert "Channel: discord" in user and "HP: 3/10" in user and "TASK DATA" in user
+    assert user.endswith("\n\ntasks?")
+
+
+def test_parse_usage_reports_cache_tokens() -> None:
+    openai_style = SimpleNamespace(
+        prompt_tokens=100, completion_tokens=5, total_tokens=105,
+        prompt_tokens_details=SimpleNamespace(cached_tokens=80),
+    )
+    anthropic_style = SimpleNamespace(
+        prompt_tokens=100, completion_tokens=5, total_tokens=105,
+        cache_read_input_tokens=0, cache_creation_input_tokens=90,
+    )
+
+    assert parse_usage(openai_style)["cache_read_tokens"] == 80
+    assert parse_usage(anthropic_style) == {
+        "prompt_tokens": 100, "completion_tokens": 5, "total_tokens": 105, "cache_write_tokens": 90,
+    }
+    assert _parse_usage({"input_tokens": 50, "input_tokens_details": {"cached_tokens": 40}})["cache_read_tokens"] == 40
+
+
+def test_codex_cache_key_ignores_conversation() -> None:
+    tools = [{"type": "function", "function": {"name": "t"}}]
+    assert _prompt_cache_key("sys", tools) == _prompt_cache_key("sys", tools)
+    assert _prompt_cache_key("sys", tools) != _prompt_cache_key("sys2", tools)
+
+
+def test_agent_loop_tracks_cache_hit_rate(tmp_path) -> None:
+    provider = MagicMock()
+    provider.get_default_model.return_value = "test-model"
+    loop = AgentLoop(bus=MessageBus(), provider=provider, workspace=tmp_path)
+
+    loop._record_usage({"prompt_tokens": 100, "completion_tokens": 5, "cache_write_tokens": 90})
+    loop._record_usage({"prompt_tokens": 100, "completion_tokens": 5, "cache_read_tokens": 90})
+
+    assert loop.usage_totals["calls"] == 2
+    assert loop.usage_totals["cache_write_tokens"] == 90
+    assert loop.cache_hit_rate == 0.45
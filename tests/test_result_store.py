@@ -0,0 +1,102 @@
+import asyncio
+from typing import Any
+
+from nanobot.agent.loop import AgentLoop
+from nanobot.agent.tools.base import Tool
+from nanobot.agent.tools.registry import ToolRegistry
+from nanobot.agent.tools.results import ReadResultTool
+from nanobot.bus.queue import MessageBus
+from nanobot.providers.base import LLMProvider, LLMResponse, ToolCallRequest
+
+
+def test_small_results_pass_through() -> None:
+    tool = ReadResultTool(threshold=100)
+    tool.start_turn()
+    assert tool.spill("exec", "ok") == "ok"
+
+
+def test_spill_without_turn_is_noop() -> None:
+    tool = ReadResultTool(threshold=10)
+    assert tool.spill("exec", "x" * 50) == "x" * 50
+
+
+async def test_large_result_is_replaced_by_preview_and_paged() -> None:
+    tool = ReadResultTool(threshold=100, preview_chars=20, max_page=50)
+    tool.start_turn()
+    body = "".join(str(i % 10) for i in range(300))
+
+    preview = tool.spill("web_fetch", body)
+
+    assert preview.startswith(body[:20])
+    assert "handle 'r1'" in preview
+    assert len(preview) < 300
+
+    registry = ToolRegistry()
+    registry.register(tool)
+    page = await registry.execute("read_result", {"handle": "r1", "offset": 20, "length": 500})
+    assert page.startswith(body[20:70])
+    assert "next offset=70" in page
+
+    last = await tool.execute(handle="r1", offset=280)
+    assert last.startswith(body[280:]) and "next offset" not in last
+
+
+async def test_handles_are_isolated_per_turn() -> None:
+    tool = ReadResultTool(threshold=10)
+
+    async def turn(text: str) -> str:
+        tool.start_turn()
+        tool.spill("exec", text)
+        await asyncio.sleep(0.01)
+        return await tool.execute(handle="r1")
+
+    a, b = await asyncio.gather(turn("a" * 20), turn("b" * 20))
+
+    assert a.startswith("a" * 20) and b.startswith("b" * 20)
+    tool.start_turn()
+    assert (await tool.execute(handle="r1")).startswith("Error")
+
+
+class _BigOutputTool(Tool):
+    name = "big"
+    description = "Returns a lot of text"
+    parameters = {"type": "object", "properties": {}}
+
+    async def execute(self, **kwargs: Any) -> str:
+        return "z" * 200_000
+
+
+class _ScriptedProvider(LLMProvider):
+    def __init__(self, responses: list[LLMResponse]):
+        super().__init__()
+        self.responses = responses
+
+    async def chat(self, *args: Any, **kwargs: Any) -> LLMResponse:
+        return self.responses.pop(0)
+
+    def get_default_model(self) -> str:
+        return "scripted"
+
+
+def test_results_just_over_the_threshold_are_mostly_previewed() -> None:
+    tool = ReadResultTool()
+    tool.start_turn()
+    body = "y" * (tool.threshold + 1000)
+    assert tool.spill("exec", body).startswith(body[:tool.preview_chars])
+    assert tool.preview_chars >= tool.threshold // 2
+
+
+async def test_reading_pages_does_not_use_up_the_iteration_cap(tmp_path) -> None:
+    def call(i: int, name: str, **args: Any) -> LLMResponse:
+        return LLMResponse(content="", tool_calls=[ToolCallRequest(id=f"c{i}", name=name, arguments=args)])
+
+    responses = [call(0, "big")]
+    responses += [call(i, "read_result", handle="r1", offset=i * 24000) for i in range(1, 5)]
+    responses += [call(5, "big"), LLMResponse(content="Read it all.")]
+    loop = AgentLoop(bus=MessageBus(), provider=_ScriptedProvider(responses), workspace=tmp_path)
+    loop.tools.register(_BigOutputTool())
+
+    content, tools = await loop._run_agent_loop([{"role": "user", "content": "read it"}])
+
+    assert content == "Read it all."
+    assert tools.count("read_result") == 4
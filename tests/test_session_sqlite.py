@@ -0,0 +1,74 @@
+from unittest.mock import patch
+
+from typer.testing import CliRunner
+
+from nanobot.cli.commands import app
+from nanobot.config.schema import Config
+from nanobot.session.manager import SessionManager
+from nanobot.session.sqlite import SQLiteSessionManager
+
+
+def test_sqlite_sessions_round_trip(tmp_path) -> None:
+    manager = SQLiteSessionManager(tmp_path)
+    manager.TAIL_MESSAGES = 3
+    session = manager.get_or_create("telegram:1")
+    for i in range(4):
+        session.add_message("user", f"m{i}")
+    manager.save(session)
+    session.add_message("assistant", "reply")
+    session.last_consolidated = 2
+    session.metadata["lang"] = "en"
+    manager.save(session)
+    manager.close()
+
+    reopened = SQLiteSessionManager(tmp_path)
+    reopened.TAIL_MESSAGES = 3
+    loaded = reopened.get_or_create("telegram:1")
+    assert len(loaded.messages) == 5 and loaded.messages.loaded_from == 2
+    assert [m["content"] for m in loaded.messages] == ["m0", "m1", "m2", "m3", "reply"]
+    assert loaded.last_consolidated == 2 and loaded.metadata == {"lang": "en"}
+    assert reopened.list_sessions(channel="telegram")[0]["message_count"] == 5
+
+
+def test_sqlite_clear_replaces_messages(tmp_path) -> None:
+    manager = SQLiteSessionManager(tmp_path)
+    session = manager.get_or_create("cli:direct")
+    session.add_message("user", "old")
+    manager.save(session)
+    session.clear()
+    session.add_message("user", "new")
+    manager.save(session)
+
+    manager.invalidate("cli:direct")
+    assert [m["content"] for m in manager.get_or_create("cli:direct").messages] == ["new"]
+
+
+def test_migrate_command_copies_jsonl_sessions(tmp_path) -> None:
+    jsonl = SessionManager(tmp_path)
+    for key in ("telegram:1", "discord:2"):
+        session = jsonl.get_or_create(key)
+        session.add_message("user", f"hello from {key}")
+        jsonl.save(session)
+
+    config = Config()
+    config.agents.defaults.workspace = str(tmp_path)
+    with patch("nanobot.config.loader.load_config", return_value=config):
+        result = CliRunner().invoke(app, ["sessions", "migrate"])
+    assert result.exit_code == 0 and "Migrated 2 sessions" in result.output
+
+    manager = SQLiteSessionManager(tmp_path)
+    assert sorted(s["key"] for s in manager.list_sessions()) == ["discord:2", "telegram:1"]
+    assert manager.get_or_create("discord:2").messages[0]["content"] == "hello from discord:2"
+
+
+def test_sqlite_flush_writes_all_dirty_sessions(tmp_path) -> None:
+    manager = SQLiteSessionManager(tmp_path)
+    for i in range(3):
+        session = manager.get_or_create(f"telegram:{i}")
+        session.add_message("user", f"m{i}")
+        manager.mark_dirty(session)
+    assert manager.list_sessions() == []
+
+    assert manager.flush() == 3
+    assert sorted(s["key"] for s in manager.list_sessions()) == ["telegram:0", "telegram:1", "telegram:2"]
+    assert not any(manager.is_dirty(manager.get_or_create(f"telegram:{i}")) for i in range(3))
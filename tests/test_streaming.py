@@ -0,0 +1,120 @@
+import json
+from types import SimpleNamespace
+from typing import Any
+from unittest.mock import MagicMock
+
+from nanobot.agent.loop import AgentLoop
+from nanobot.bus.queue import MessageBus
+from nanobot.providers.base import LLMProvider, LLMResponse, LLMStreamChunk, StreamAccumulator
+from nanobot.providers.openai_codex_provider import _consume_sse
+
+
+def _chunk(content=None, tool_calls=None, finish_reason=None, usage=None):
+    delta = SimpleNamespace(content=content, tool_calls=tool_calls, reasoning_content=None)
+    return SimpleNamespace(
+        choices=[SimpleNamespace(delta=delta, finish_reason=finish_reason)], usage=usage,
+    )
+
+
+def _tc_delta(index, id=None, name=None, arguments=None):
+    return SimpleNamespace(index=index, id=id, function=SimpleNamespace(name=name, arguments=arguments))
+
+
+class FakeProvider(LLMProvider):
+    def __init__(self, deltas: list[str], response: LLMResponse):
+        super().__init__()
+        self.deltas = deltas
+        self.response = response
+
+    async def chat(self, *args: Any, **kwargs: Any) -> LLMResponse:
+        return self.response
+
+    async def chat_stream(self, *args: Any, **kwargs: Any):
+        for d in self.deltas:
+            yield LLMStreamChunk(delta=d)
+        yield LLMStreamChunk(response=self.response)
+
+    def get_default_model(self) -> str:
+        return "fake"
+
+
+def test_accumulator_assembles_text_and_tool_calls() -> None:
+    acc = StreamAccumulator()
+    deltas = [
+        acc.add(_chunk(content="Hel")),
+        acc.add(_chunk(content="lo", tool_calls=[_tc_delta(0, id="call_1", name="web_fetch", arguments='{"url"')])),
+        acc.add(_chunk(tool_calls=[_tc_delta(0, arguments=': "https://x.y"}')])),
+        acc.add(_chunk(tool_calls=[_tc_delta(1, id="call_2", name="list_tasks", arguments="{}")],
+                       finish_reason="tool_calls")),
+        acc.add(SimpleNamespace(choices=[], usage=SimpleNamespace(
+            prompt_tokens=10, completion_tokens=5, total_tokens=15))),
+    ]
+
+    response = acc.build()
+    assert "".join(deltas) == "Hello"
+    assert response.content == "Hello"
+    assert response.finish_reason == "tool_calls"
+    assert [(tc.id, tc.name, tc.arguments) for tc in response.tool_calls] == [
+        ("call_1", "web_fetch", {"url": "https://x.y"}),
+        ("call_2", "list_tasks", {}),
+    ]
+    assert response.usage["total_tokens"] == 15
+
+
+async def test_default_chat_stream_falls_back_to_chat() -> None:
+    class PlainProvider(LLMProvider):
+        async def chat(self, *args: Any, **kwargs: Any) -> LLMResponse:
+            return LLMResponse(content="done")
+
+        def get_default_model(self) -> str:
+            return "plain"
+
+    chunks = [c async for c in PlainProvider().chat_stream(messages=[])]
+    assert chunks[0].delta == "done"
+    assert chunks[-1].response.content == "done"
+
+
+async def test_codex_sse_yields_deltas_then_response() -> None:
+    events = [
+        {"type": "response.output_text.delta", "delta": "Hi "},
+        {"type": "response.output_text.delta", "delta": "there"},
+        {"type": "response.completed", "response": {"status": "completed"}},
+    ]
+
+    class FakeSSE:
+        async def aiter_lines(self):
+            for e in events:
+                yield f"data: {json.dumps(e)}"
+                yield ""
+
+    chunks = [c async for c in _consume_sse(FakeSSE())]
+    assert [c.delta for c in chunks[:-1]] == ["Hi ", "there"]
+    assert chunks[-1].response.content == "Hi there"
+
+
+async def test_agent_loop_streams_snapshots_to_progress(tmp_path) -> None:
+    provider = FakeProvider(["<think>plan</think>Hel", "lo ", "world"], LLMResponse(content="Hello world"))
+    loop = AgentLoop(bus=MessageBus(), provider=provider, workspace=tmp_path)
+    loop.STREAM_INTERVAL = 0
+    updates: list[tuple[str, bool]] = []
+
+    async def on_progress(content: str, *, streaming: bool = False) -> None:
+        updates.append((content, streaming))
+
+    response, streamed = await loop._chat([{"role": "user", "content": "hi"}], on_progress)
+
+    assert streamed
+    assert response.content == "Hello world"
+    assert updates == [("Hel", True), ("Hello", True), ("Hello world", True)]
+
+
+async def test_agent_loop_does_not_stream_when_disabled(tmp_path) -> None:
+    provider = FakeProvider(["a", "b"], LLMResponse(content="ab"))
+    loop = AgentLoop(bus=MessageBus(), provider=provider, workspace=tmp_path, stream=False)
+    on_progress = MagicMock()
+
+    response, streamed = await loop._chat([{"role": "user", "content": "hi"}], on_progress)
+
+    assert not streamed
+    assert response.content == "ab"
+    on_progress.assert_not_called()
@@ -0,0 +1,77 @@
+from typing import Any
+
+from nanobot.agent.loop import AgentLoop
+from nanobot.bus.queue import MessageBus
+from nanobot.providers.base import LLMProvider, LLMResponse, ToolCallRequest
+
+
+class ScriptedProvider(LLMProvider):
+    def __init__(self, responses: list[LLMResponse]):
+        super().__init__()
+        self.responses = responses
+        self.calls = 0
+
+    async def chat(self, *args: Any, **kwargs: Any) -> LLMResponse:
+        self.calls += 1
+        return self.responses.pop(0)
+
+    def get_default_model(self) -> str:
+        return "scripted"
+
+
+def _loop(tmp_path, responses: list[LLMResponse]) -> AgentLoop:
+    return AgentLoop(bus=MessageBus(), provider=ScriptedProvider(responses), workspace=tmp_path)
+
+
+def test_announces_tool_action() -> None:
+    assert AgentLoop._announces_tool_action("Let me check your calendar.")
+    assert AgentLoop._announces_tool_action("Sure, let me look that up...")
+    assert AgentLoop._announces_tool_action("One moment, I'll search for that…")
+    assert not AgentLoop._announces_tool_action("Hi! How can I help you today?")
+    assert not AgentLoop._announces_tool_action("Let me know if you need anything else.")
+    assert not AgentLoop._announces_tool_action("Let me check. It is sunny today.")
+
+
+def test_complete_answers_are_not_mistaken_for_announcements() -> None:
+    for reply in (
+        "I'll look forward to it!",
+        "Thanks for checking in!",
+        "Hold on tight, Tamer!",
+        "Sure, I will use a softer tone",
+        "Here is your list:",
+        "One moment, searching...",
+    ):
+        assert not AgentLoop._announces_tool_action(reply), reply
+
+
+async def test_plain_reply_is_accepted_with_one_call(tmp_path) -> None:
+    loop = _loop(tmp_path, [LLMResponse(content="Hello there!")])
+
+    content, tools = await loop._run_agent_loop([{"role": "user", "content": "hi"}])
+
+    assert content == "Hello there!"
+    assert loop.provider.calls == 1
+    assert loop.retry_stats == {"fired": 0, "changed": 0}
+
+
+async def test_announced_action_is_retried_and_counted(tmp_path) -> None:
+    loop = _loop(tmp_path, [
+        LLMResponse(content="Let me check the weather."),
+        LLMResponse(content="", tool_calls=[ToolCallRequest(id="c1", name="list_dir", arguments={"path": "."})]),
+        LLMResponse(content="Sunny."),
+    ])
+
+    content, tools = await loop._run_agent_loop([{"role": "user", "content": "weather?"}])
+
+    assert content == "Sunny."
+    assert tools == ["list_dir"]
+    assert loop.retry_stats == {"fired": 1, "changed": 1}
+
+
+async def test_retry_that_changes_nothing_is_counted(tmp_path) -> None:
+    loop = _loop(tmp_path, [LLMResponse(content="Let me look."), LLMResponse(content="Nothing to see.")])
+
+    content, _ = await loop._run_agent_loop([{"role": "user", "content": "?"}])
+
+    assert content == "Nothing to see."
+    assert loop.retry_stats == {"fired": 1, "changed": 0}
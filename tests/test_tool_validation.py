@@ -1,3 +1,5 @@
+import asyncio
+import time
 from typing import Any
 
 from nanobot.agent.tools.base import Tool
@@ -86,3 +88,68 @@ async def test_registry_returns_validation_error() -> None:
     reg.register(SampleTool())
     result = await reg.execute("sample", {"query": "hi"})
     assert "Invalid parameters" in result
+
+
+class SleepTool(Tool):
+    def __init__(self, name: str, read_only: bool, log: list[str]):
+        self._name = name
+        self._read_only = read_only
+        self._log = log
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def description(self) -> str:
+        return "sleep tool"
+
+    @property
+    def parameters(self) -> dict[str, Any]:
+        return {"type": "object", "properties": {"delay": {"type": "number"}}, "required": ["delay"]}
+
+    @property
+    def read_only(self) -> bool:
+        return self._read_only
+
+    async def execute(self, delay: float, **kwargs: Any) -> str:
+        self._log.append(f"start {self._name}")
+        await asyncio.sleep(delay)
+        self._log.append(f"end {self._name}")
+        return f"{self._name}:{delay}"
+
+
+async def test_execute_many_runs_safe_tools_in_parallel_and_keeps_order() -> None:
+    log: list[str] = []
+    reg = ToolRegistry()
+    reg.register(SleepTool("a", True, log))
+    reg.register(SleepTool("b", True, log))
+
+    started = time.monotonic()
+    results = await reg.execute_many([("a", {"delay": 0.1}), ("b", {"delay": 0.01})])
+    elapsed = time.monotonic() - started
+
+    assert results == ["a:0.1", "b:0.01"]
+    assert elapsed < 0.18
+    assert log[:2] == ["start a", "start b"]
+
+
+async def test_execute_many_serializes_unsafe_tools() -> None:
+    log: list[str] = []
+    reg = ToolRegistry()
+    reg.register(SleepTool("read", True, log))
+    reg.register(SleepTool("write", False, log))
+
+    results = await reg.execute_many([
+        ("read", {"delay": 0.01}), ("write", {"delay": 0.01}), ("read", {"delay": 0.01}),
+    ])
+
+    assert results == ["read:0.01", "write:0.01", "read:0.01"]
+    assert log == ["start read", "end read", "start write", "end write", "start read", "end read"]
+
+
+async def test_execute_many_reports_unknown_tool_in_place() -> None:
+    reg = ToolRegistry()
+    reg.register(SampleTool())
+    results = await reg.execute_many([("missing", {}), ("sample", {"query": "hi", "count": 1})])
+    assert results == ["Error: Tool 'missing' not found", "ok"]
@@ -0,0 +1,93 @@
+import asyncio
+from typing import Any
+from unittest.mock import patch
+
+from typer.testing import CliRunner
+
+from nanobot.agent.loop import AgentLoop
+from nanobot.agent.tracing import Tracer, load_traces, span
+from nanobot.bus.queue import MessageBus
+from nanobot.cli.commands import app
+from nanobot.config.schema import Config
+from nanobot.providers.base import LLMProvider, LLMResponse, ToolCallRequest
+
+
+class ScriptedProvider(LLMProvider):
+    def __init__(self, responses: list[LLMResponse]):
+        super().__init__()
+        self.responses = responses
+
+    async def chat(self, *args: Any, **kwargs: Any) -> LLMResponse:
+        return self.responses.pop(0)
+
+    def get_default_model(self) -> str:
+        return "scripted"
+
+
+def test_span_is_noop_outside_a_turn() -> None:
+    with span("orphan") as s:
+        s.set(x=1)
+    assert s.trace_id == ""
+
+
+async def test_spans_nest_across_tasks_and_threads(tmp_path) -> None:
+    tracer = Tracer(tmp_path)
+
+    def blocking() -> None:
+        with span("in_thread"):
+            pass
+
+    async def child(name: str) -> None:
+        with span(name):
+            await asyncio.to_thread(blocking)
+
+    with tracer.turn("turn", session="t:1") as root:
+        with span("outer"):
+            await asyncio.gather(child("a"), child("b"))
+
+    spans = next(iter(load_traces(tmp_path / "spans.jsonl").values()))
+    by_id = {s["span_id"]: s for s in spans}
+    edges = sorted((s["name"], by_id[s["parent_id"]]["name"] if s["parent_id"] else None) for s in spans)
+    assert edges == [
+        ("a", "outer"), ("b", "outer"), ("in_thread", "a"), ("in_thread", "b"), ("outer", "turn"), ("turn", None),
+    ]
+    assert all(s["trace_id"] == root.trace_id for s in spans)
+
+
+async def test_agent_turn_records_pipeline_spans(tmp_path) -> None:
+    provider = ScriptedProvider([
+        LLMResponse(content="", tool_calls=[ToolCallRequest(id="c1", name="list_dir", arguments={"path": "."})],
+                    usage={"prompt_tokens": 100, "completion_tokens": 7}),
+        LLMResponse(content="done", usage={"prompt_tokens": 120, "completion_tokens": 3}),
+    ])
+    loop = AgentLoop(bus=MessageBus(), provider=provider, workspace=tmp_path, stream=False)
+
+    async def no_digimon():
+        return "", ""
+
+    loop.context._get_digimon_prompt = no_digimon
+
+    assert await loop.process_direct("look around", session_key="cli:trace") == "done"
+
+    spans = next(iter(load_traces(tmp_path / "traces" / "spans.jsonl").values()))
+    names = [s["name"] for s in spans]
+    for expected in ("turn", "session.load", "context.build", "context.digimon", "llm.chat", "tool", "session.save"):
+        assert expected in names
+    llm = [s for s in spans if s["name"] == "llm.chat"]
+    assert [s["attrs"]["prompt_tokens"] for s in llm] == [100, 120]
+
+
+def test_trace_command_lists_turns(tmp_path) -> None:
+    tracer = Tracer(tmp_path / "traces")
+    with tracer.turn("turn", session="telegram:42") as root:
+        with span("llm.chat") as s:
+            s.set(prompt_tokens=10, completion_tokens=2)
+
+    config = Config()
+    config.agents.defaults.workspace = str(tmp_path)
+    with patch("nanobot.config.loader.load_config", return_value=config):
+        listing = CliRunner().invoke(app, ["trace"], env={"COLUMNS": "200"})
+        detail = CliRunner().invoke(app, ["trace", root.trace_id[:6]], env={"COLUMNS": "200"})
+
+    assert listing.exit_code == 0 and "telegram:42" in listing.stdout
+    assert detail.exit_code == 0 and "llm.chat" in detail.stdout